@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+End-to-end packets/sec of a Sender and a run_receiver.py process over
+loopback, with no emulated link in between, so the figure is what the
+sockets, event loops and strategy cost together. The Sender runs a
+fixed window, so congestion control does not throttle it.
+
+    python3 -m benchmarks.bench_loopback
+"""
+
+import argparse
+import contextlib
+import os
+import subprocess
+import sys
+from typing import Dict
+from src.helpers import get_open_udp_port, RECEIVER_FILE
+from src.senders import Sender
+from src.strategies import FixedWindowStrategy
+
+WINDOW = 100
+BATCH_SIZE = 32
+# name: (Sender options, run_receiver.py options)
+CONFIGURATIONS = {
+    'unbatched': ({}, []),
+    'batched': ({'batch_size': BATCH_SIZE}, ['--batched']),
+}
+
+
+def packets_per_second(seconds: float, sender_options: Dict, receiver_args: list, protocol: str = 'binary') -> float:
+    """ACKs per second the Sender took in."""
+    port = get_open_udp_port()
+    sender = Sender(port, FixedWindowStrategy(WINDOW), protocol=protocol, **sender_options)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    receiver_process = subprocess.Popen(
+        [sys.executable, RECEIVER_FILE, '--protocol', protocol] + receiver_args + ['127.0.0.1', str(port)],
+        cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            sender.handshake()
+        sender.run(seconds)
+    finally:
+        receiver_process.kill()
+        receiver_process.wait()
+        sender.sock.close()
+    return sender.strategy.total_acks / seconds
+
+
+def results(seconds: float = 2.0) -> Dict[str, float]:
+    return dict(('loopback/%s' % name, packets_per_second(seconds, sender_options, receiver_args))
+                for name, (sender_options, receiver_args) in CONFIGURATIONS.items())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=2.0)
+    args = parser.parse_args()
+
+    for name, rate in results(args.seconds).items():
+        print("%-24s %12.0f packets/s" % (name, rate))
+
+
+if __name__ == '__main__':
+    main()
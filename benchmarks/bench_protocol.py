@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+Compares packets/sec for the JSON and binary wire formats.
+
+Each iteration does the serialization work one segment costs end to end:
+the sender encodes the segment, the receiver decodes it and encodes an
+ACK, and the sender decodes the ACK.
+
+    python3 -m benchmarks.bench_protocol
+"""
+
+import argparse
+import time
+from typing import Dict
+from src.protocol import PROTOCOLS, Protocol
+from src.receiver import Receiver
+
+
+def packets_per_second(protocol: Protocol, num_packets: int) -> float:
+    start = time.perf_counter()
+    for seq_num in range(num_packets):
+        serialized_segment = protocol.encode({
+            'seq_num': seq_num,
+            'send_ts': time.time(),
+            'sent_bytes': 0
+        })
+        segment = protocol.decode(serialized_segment)
+        serialized_ack = protocol.encode(Receiver.construct_ack(segment, len(serialized_segment)))
+        protocol.decode(serialized_ack)
+    return num_packets / (time.perf_counter() - start)
+
+
+def results(num_packets: int = 200000) -> Dict[str, float]:
+    return dict(('protocol/%s' % name, packets_per_second(protocol, num_packets))
+                for name, protocol in PROTOCOLS.items())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--packets', type=int, default=200000)
+    args = parser.parse_args()
+
+    for name, protocol in PROTOCOLS.items():
+        print("%-8s %12.0f packets/s" % (name, packets_per_second(protocol, args.packets)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Segments/sec through Peer.add_segment and Peer.next_ack, for windows
+of 10 to 100k segments in flight and three arrival patterns:
+
+    in_order   every segment arrives in sequence
+    reordered  each window's worth of segments arrives shuffled
+    lossy      1% of each window's segments arrive only at its end, as
+               retransmissions would, so holes stay open a whole window
+
+Throughput should not depend on the window size; if it falls as the
+window grows, something has gone quadratic.
+
+    python3 -m benchmarks.bench_receiver
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+from src.receiver import Peer, construct_ack
+
+WINDOW_SIZES = (10, 100, 1000, 10000, 100000)
+PATTERNS = ('in_order', 'reordered', 'lossy')
+LOSS_RATE = 0.01
+SEGMENT_SIZE = 40
+
+
+def arrival_order(num_segments: int, window: int, pattern: str, seed: int = 0) -> List[int]:
+    rng = random.Random(seed)
+    order: List[int] = []
+    for start in range(0, num_segments, window):
+        block = list(range(start, min(start + window, num_segments)))
+        if pattern == 'reordered':
+            rng.shuffle(block)
+        elif pattern == 'lossy':
+            lost = set(rng.sample(block, max(1, int(len(block) * LOSS_RATE))))
+            block = [seq_num for seq_num in block if seq_num not in lost] + sorted(lost)
+        order.extend(block)
+    return order
+
+
+def segments_per_second(window: int, pattern: str, num_segments: int) -> float:
+    acks = [construct_ack({'seq_num': seq_num, 'send_ts': 0.0}, SEGMENT_SIZE)
+            for seq_num in arrival_order(num_segments, window, pattern)]
+    # Room for a whole window of segments above a hole
+    peer = Peer(0, 2 * window)
+    add_segment, next_ack = peer.add_segment, peer.next_ack
+
+    start = time.perf_counter()
+    for ack in acks:
+        add_segment(ack)
+        next_ack()
+    elapsed = time.perf_counter() - start
+    assert peer.high_water_mark == num_segments - 1
+    return num_segments / elapsed
+
+
+def results(num_segments: int = 200000) -> Dict[str, float]:
+    return dict(('peer/%s/%d' % (pattern, window), segments_per_second(window, pattern, num_segments))
+                for pattern in PATTERNS for window in WINDOW_SIZES)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--segments', type=int, default=200000)
+    args = parser.parse_args()
+
+    for name, rate in results(args.segments).items():
+        print("%-24s %12.0f segments/s" % (name, rate))
+
+
+if __name__ == '__main__':
+    main()
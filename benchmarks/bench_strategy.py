@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Segments/sec through TahoeStrategy.next_packet_to_send and process_ack,
+with the window held at 10 to 100k segments, for the arrival patterns
+of bench_receiver. Each round the strategy sends a whole window, a Peer
+takes it in the pattern's order and its ACKs go back to the strategy.
+Only the strategy's calls are timed, on a virtual clock that moves on
+one RTT per round.
+
+In the lossy pattern, holes produce duplicate ACKs and so fast
+retransmits, which put the retransmission queue's bookkeeping on the
+timed path too. The timeout pattern, which only this benchmark has,
+loses the tail of each round, which no duplicate ACKs reveal: the clock
+moves on past the RTO, and the strategy times out and goes back N,
+resending the tail as retransmissions before carrying on.
+
+Throughput should not depend on the window size; if it falls as the
+window grows, something has gone quadratic.
+
+    python3 -m benchmarks.bench_strategy
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+from src.protocol import get_protocol
+from src.receiver import Peer
+from src.strategies import TahoeStrategy
+from benchmarks import bench_receiver
+from benchmarks.bench_receiver import WINDOW_SIZES, LOSS_RATE, SEGMENT_SIZE
+
+RTT = 0.05  # seconds
+PATTERNS = bench_receiver.PATTERNS + ('timeout',)
+
+
+def arrange(segments: List[bytes], pattern: str, rng: random.Random, resent: int = 0) -> List[bytes]:
+    """
+    One round's segments in the order they reach the receiver. The first
+    resent of them went out before, and the timeout pattern does not lose
+    those again.
+    """
+    if pattern == 'reordered':
+        segments = list(segments)
+        rng.shuffle(segments)
+    elif pattern == 'lossy':
+        lost = set(rng.sample(range(len(segments)), max(1, int(len(segments) * LOSS_RATE))))
+        segments = ([segment for index, segment in enumerate(segments) if index not in lost] +
+                    [segments[index] for index in sorted(lost)])
+    elif pattern == 'timeout' and len(segments) > resent:
+        segments = segments[:len(segments) - max(1, int((len(segments) - resent) * LOSS_RATE))]
+    return segments
+
+
+def segments_per_second(window: int, pattern: str, num_segments: int, seed: int = 0) -> float:
+    protocol = get_protocol('binary')
+    rng = random.Random(seed)
+    now = [0.0]
+    strategy = TahoeStrategy(window, window)
+    strategy.protocol = protocol
+    strategy.clock = lambda: now[0]
+    strategy.start_time = 0.0
+    peer = Peer(0, 2 * window, sack_blocks=0)
+    peer.clock = strategy.clock
+    next_packet_to_send, process_ack = strategy.next_packet_to_send, strategy.process_ack
+
+    elapsed = 0.0
+    sent_through = 0
+    while strategy.next_ack < num_segments:
+        # Held at the window being measured, whatever losses did to it
+        strategy.cwnd = window
+        start = time.perf_counter()
+        segments = []
+        segment = next_packet_to_send()
+        while segment is not None:
+            segments.append(segment)
+            segment = next_packet_to_send()
+        elapsed += time.perf_counter() - start
+        # Only used by the timeout pattern, which has no fast retransmits,
+        # so each round's segments are consecutive
+        resent = max(0, sent_through - (strategy.seq_num - len(segments)))
+        sent_through = max(sent_through, strategy.seq_num)
+
+        acks = []
+        for segment in arrange(segments, pattern, rng, resent):
+            ack = peer.receive_segment(protocol.decode(segment), SEGMENT_SIZE)
+            if ack is not None:
+                acks.append(protocol.encode(ack))
+        now[0] += RTT
+
+        start = time.perf_counter()
+        for serialized_ack in acks:
+            process_ack(serialized_ack)
+        elapsed += time.perf_counter() - start
+        if pattern == 'timeout':
+            # The lost tail is still outstanding: let its timer run out
+            now[0] += strategy.rtt_estimator.rto
+    return strategy.next_ack / elapsed
+
+
+def results(num_segments: int = 200000) -> Dict[str, float]:
+    return dict(('tahoe/%s/%d' % (pattern, window), segments_per_second(window, pattern, num_segments))
+                for pattern in PATTERNS for window in WINDOW_SIZES)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--segments', type=int, default=200000)
+    args = parser.parse_args()
+
+    for name, rate in results(args.segments).items():
+        print("%-24s %12.0f segments/s" % (name, rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Runs every benchmark and checks the results two ways:
+
+    regressions  any rate more than --threshold below the same benchmark
+                 in the saved baseline (benchmarks/baseline.json)
+    scaling      any receiver or strategy pattern whose rate at the
+                 largest window is below MIN_SCALING of its rate at the
+                 smallest, the sign of work that grows with the window
+
+and exits 1 if either finds anything, so it can gate a change. Save a
+baseline on the machine the suite is compared on with --save; rates
+from another machine mean little.
+
+    python3 -m benchmarks.suite [--quick] [--skip-loopback] [--save]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+from typing import Dict, List
+from benchmarks import bench_loopback, bench_protocol, bench_receiver, bench_strategy
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# Fraction a rate may fall below its baseline before it counts as a regression
+DEFAULT_THRESHOLD = 0.2
+# Least fraction of its smallest-window rate a pattern keeps at the largest window
+MIN_SCALING = 0.25
+
+
+def run_all(quick: bool = False, loopback: bool = True) -> Dict[str, float]:
+    num_segments = 50000 if quick else 200000
+    rates: Dict[str, float] = {}
+    rates.update(bench_protocol.results(num_segments))
+    rates.update(bench_receiver.results(num_segments))
+    rates.update(bench_strategy.results(num_segments))
+    if loopback:
+        rates.update(bench_loopback.results(1.0 if quick else 2.0))
+    return rates
+
+
+def regressions(rates: Dict[str, float], baseline: Dict[str, float],
+                threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """A line for each rate more than threshold below its baseline."""
+    problems = []
+    for name, rate in sorted(rates.items()):
+        if name in baseline and rate < baseline[name] * (1 - threshold):
+            problems.append("%s: %.0f/s, %.0f%% below the baseline's %.0f/s" % (
+                name, rate, (1 - rate / baseline[name]) * 100, baseline[name]))
+    return problems
+
+
+def scaling_problems(rates: Dict[str, float], min_scaling: float = MIN_SCALING) -> List[str]:
+    """
+    A line for each <benchmark>/<pattern>/<window> group whose rate at the
+    largest window is below min_scaling of its rate at the smallest.
+    """
+    groups: Dict[str, Dict[int, float]] = {}
+    for name, rate in rates.items():
+        prefix, _, window = name.rpartition('/')
+        if prefix.count('/') == 1 and window.isdigit():
+            groups.setdefault(prefix, {})[int(window)] = rate
+    problems = []
+    for prefix, by_window in sorted(groups.items()):
+        smallest, largest = min(by_window), max(by_window)
+        if largest > smallest and by_window[largest] < by_window[smallest] * min_scaling:
+            problems.append("%s: %.0f/s at a window of %d but %.0f/s at %d" % (
+                prefix, by_window[largest], largest, by_window[smallest], smallest))
+    return problems
+
+
+def load_baseline(path: str = BASELINE_FILE) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baseline_file:
+        return json.load(baseline_file)['rates']
+
+
+def machine_description() -> str:
+    """The OS, CPU model and CPU count, enough to tell whether a baseline is comparable."""
+    processor = platform.processor() or platform.machine()
+    if os.path.exists('/proc/cpuinfo'):
+        with open('/proc/cpuinfo') as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith('model name'):
+                    processor = line.partition(':')[2].strip()
+                    break
+    return '%s, %s, %d CPUs' % (platform.platform(), processor, os.cpu_count() or 1)
+
+
+def save_baseline(rates: Dict[str, float], path: str = BASELINE_FILE) -> None:
+    with open(path, 'w') as baseline_file:
+        json.dump({'machine': machine_description(), 'python': platform.python_version(), 'rates': rates},
+                  baseline_file, indent=2, sort_keys=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--quick', action='store_true', help='fewer segments and shorter loopback runs')
+    parser.add_argument('--skip-loopback', action='store_true', help='only the in-process benchmarks')
+    parser.add_argument('--save', action='store_true', help='save the results as the new baseline')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='fraction below the baseline that counts as a regression')
+    args = parser.parse_args()
+
+    rates = run_all(args.quick, not args.skip_loopback)
+    baseline = load_baseline(args.baseline)
+    for name, rate in sorted(rates.items()):
+        change = "%+6.1f%%" % ((rate / baseline[name] - 1) * 100) if name in baseline else ''
+        print("%-24s %12.0f/s %s" % (name, rate, change))
+
+    problems = regressions(rates, baseline, args.threshold) + scaling_problems(rates)
+    if args.save:
+        save_baseline(rates, args.baseline)
+        print("\nSaved baseline to %s" % args.baseline)
+    if problems:
+        print("")
+        for problem in problems:
+            print(problem)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
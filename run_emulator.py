@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+import argparse
+import signal
+import sys
+from src.emulator import LinkEmulator
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('sender_relay_port_pairs', nargs='*', type=int)
+    parser.add_argument('--delay', type=int, required=True, help='one-way delay in ms')
+    parser.add_argument('--queue-size', type=int, required=True, help='downlink droptail queue size in bytes')
+    parser.add_argument('--trace-file', required=True)
+    parser.add_argument('--loss', type=float, default=0.0, help='downlink loss rate')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    ports = args.sender_relay_port_pairs
+
+    mahimahi_settings = {
+        'delay': args.delay,
+        'queue_size': args.queue_size,
+        'trace_file': args.trace_file,
+        'loss': args.loss
+    }
+    emulator = LinkEmulator(mahimahi_settings, [(ports[i], ports[i+1]) for i in range(0, len(ports), 2)], seed=args.seed)
+
+    # Exit through the finally block, so the counters get printed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        emulator.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.cleanup()
+
+
+if __name__ == '__main__':
+    main()
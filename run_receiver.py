@@ -1,16 +1,60 @@
 #!/usr/bin/env python
 
 import argparse
-from src.receiver import Receiver
+import signal
+from src.receiver import Receiver, DELAYED_ACK_TIMEOUT
+from src.protocol import DEFAULT_PROTOCOL, PROTOCOLS
+from src.sack import DEFAULT_SACK_BLOCKS
+from src.eventlog import EventLog
+from src.telemetry import TelemetryPublisher, DEFAULT_INTERVAL
+from src.sharded_receiver import ShardedReceiver, interrupt, write_stats
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument('ip_port_pairs', nargs='*')
+    parser.add_argument('--protocol', choices=list(PROTOCOLS), default=DEFAULT_PROTOCOL)
+    parser.add_argument('--batched', action='store_true', help='drain the socket on each wakeup')
+    parser.add_argument('--sack-blocks', type=int, default=DEFAULT_SACK_BLOCKS,
+                        help='most SACK blocks per ACK, 0 to disable SACK')
+    parser.add_argument('--ack-every', type=int, default=1,
+                        help='acknowledge every Nth in-order segment (delayed ACKs when above 1)')
+    parser.add_argument('--ack-delay', type=float, default=DELAYED_ACK_TIMEOUT * 1000,
+                        help='longest a delayed ACK waits, in ms')
+    parser.add_argument('--event-log', default=None, help='file to append receive and ACK events to')
+    parser.add_argument('--telemetry', default=None, help='file to publish live window occupancy to')
+    parser.add_argument('--telemetry-interval', type=float, default=DEFAULT_INTERVAL, help='seconds between samples')
+    parser.add_argument('--shards', type=int, default=1,
+                        help='worker processes to split the peers across, each with its own socket; '
+                             'event logs and telemetry get the worker index appended')
     args = parser.parse_args()
     peers = args.ip_port_pairs
+    peer_addrs = [(peers[i], int(peers[i+1])) for i in range(0, len(peers), 2)]
+    receiver_options = dict(protocol=args.protocol, batched=args.batched, sack_blocks=args.sack_blocks,
+                            ack_every=args.ack_every, ack_delay=args.ack_delay / 1000.0)
 
-    receiver = Receiver([(peers[i], int(peers[i+1])) for i in range(0, len(peers), 2)])
+    # Stopped with SIGTERM as well as Ctrl-C, so the stats are reported,
+    # logs closed and any workers stopped
+    signal.signal(signal.SIGTERM, interrupt)
+
+    if args.shards > 1:
+        sharded_receiver = ShardedReceiver(peer_addrs, args.shards, args.event_log, args.telemetry,
+                                           args.telemetry_interval, **receiver_options).start()
+        try:
+            sharded_receiver.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            write_stats(sharded_receiver.stop(), args.shards)
+        return
+
+    event_log = EventLog(args.event_log) if args.event_log else None
+    receiver = Receiver(peer_addrs, event_log=event_log, **receiver_options)
+    telemetry = None
+    if args.telemetry:
+        telemetry = TelemetryPublisher(args.telemetry, args.telemetry_interval)
+        telemetry.add_receiver(receiver)
+        telemetry.start()
 
     try:
         receiver.perform_handshakes()
@@ -19,6 +63,10 @@ def main() -> None:
         pass
     finally:
         receiver.cleanup()
+        if telemetry is not None:
+            telemetry.stop()
+        if event_log is not None:
+            event_log.close()
 
 
 if __name__ == '__main__':
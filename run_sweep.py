@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+"""
+Runs a parameter sweep described by a JSON file, for example:
+
+    {
+      "grid": {"strategy": ["tahoe", "cubic", "bbr"], "queue_size": [10000, 100000], "flows": [1, 4]},
+      "fixed": {"trace_file": "12mbps.trace", "delay": 10, "seconds_to_run": 20}
+    }
+
+    python3 run_sweep.py sweep.json --out results/
+"""
+
+import argparse
+import json
+from src.sweep import expand_grid, run_sweep
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('sweep_file')
+    parser.add_argument('--out', required=True, help='result directory, shared with earlier runs of the sweep')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes, one per CPU by default')
+    args = parser.parse_args()
+
+    with open(args.sweep_file) as sweep_file:
+        sweep = json.load(sweep_file)
+    cells = expand_grid(sweep['grid'], **sweep.get('fixed', {}))
+    num_run = run_sweep(cells, args.out, args.processes)
+    print("Ran %d of %d cells, results in %s" % (num_run, len(cells), args.out))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""
+Shows the live statistics a run publishes, refreshing at a fixed rate:
+
+    python3 run_telemetry.py /tmp/run.stats /tmp/run.stats.receiver
+"""
+
+import argparse
+import os
+import sys
+import time
+from src.telemetry import read_stats, format_stats
+
+CLEAR_SCREEN = '\033[H\033[J'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', nargs='+', help='telemetry files, as given to the publishers')
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between refreshes')
+    parser.add_argument('--count', type=int, default=None, help='refresh this many times, then exit')
+    args = parser.parse_args()
+
+    refreshes = 0
+    try:
+        while args.count is None or refreshes < args.count:
+            sections = []
+            for path in args.paths:
+                if os.path.exists(path):
+                    sections.append("%s\n%s" % (path, format_stats(read_stats(path))))
+                else:
+                    sections.append("%s\n(waiting for the run to start)" % path)
+            if sys.stdout.isatty():
+                sys.stdout.write(CLEAR_SCREEN)
+            print("\n\n".join(sections))
+            sys.stdout.flush()
+            refreshes += 1
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
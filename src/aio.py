@@ -0,0 +1,246 @@
+"""
+asyncio transports for Sender and Receiver.
+
+These drive the same SenderStrategy and Peer objects as src.senders and
+src.receiver, but from datagram endpoints on an event loop, so many flows
+can share one thread cooperatively and experiments can be embedded in
+async code. Timers are loop callbacks rather than poll() timeouts.
+"""
+
+import asyncio
+import sys
+from typing import Dict, List, Optional, Tuple
+from src.strategies import SenderStrategy
+from src.receiver import Peer, RECEIVE_WINDOW, DELAYED_ACK_TIMEOUT
+from src.protocol import DEFAULT_PROTOCOL, get_protocol
+from src.iostats import IOStats
+from src.sack import DEFAULT_SACK_BLOCKS
+from src.timers import wakeup_time
+from src.pacing import Pacer
+
+# How long a sender whose window is closed waits before asking its
+# strategy again, if the strategy has no retransmission timer running
+IDLE_INTERVAL = 0.01  # seconds
+HANDSHAKE_TIMEOUT = 1.0  # seconds
+HANDSHAKE_RETRIES = 10
+
+
+def install_uvloop() -> bool:
+    """Use uvloop for new event loops if it is installed. Returns whether it is."""
+    try:
+        import uvloop # type: ignore
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+class AsyncSender(asyncio.DatagramProtocol):
+    def __init__(self, port: int, strategy: SenderStrategy, protocol: str = DEFAULT_PROTOCOL,
+                 idle_interval: float = IDLE_INTERVAL, pacing: bool = False,
+                 pacing_rate: Optional[float] = None) -> None:
+        """Pacing is as for Sender: strategies that require it are always paced."""
+        self.port = port
+        self.protocol = get_protocol(protocol)
+        self.strategy = strategy
+        self.strategy.protocol = self.protocol
+        self.idle_interval = idle_interval
+        self.io_stats = IOStats()
+
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.peer_addr: Optional[Tuple] = None
+        self.connected: Optional[asyncio.Future] = None
+        self.running = False
+        self.writing_paused = False
+        self.idle_timer: Optional[asyncio.TimerHandle] = None
+        self.pacer: Optional[Pacer] = None
+        if pacing or pacing_rate is not None or strategy.requires_pacing:
+            self.pacer = Pacer(strategy, pacing_rate)
+
+    async def open(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.connected = loop.create_future()
+        await loop.create_datagram_endpoint(lambda: self, local_addr=('0.0.0.0', self.port))
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: Tuple) -> None:
+        self.io_stats.packets_received += 1
+        if self.peer_addr is None:
+            if self.protocol.decode(data).get('handshake'):
+                assert self.transport is not None
+                self.peer_addr = addr
+                self.transport.sendto(self.protocol.encode({'handshake': True}), addr)
+                print('[sender] Connected to receiver: %s:%s\n' % addr)
+                if self.connected is not None and not self.connected.done():
+                    self.connected.set_result(addr)
+            return
+
+        self.strategy.process_ack(data)
+        self.pump()
+
+    def pause_writing(self) -> None:
+        self.writing_paused = True
+
+    def resume_writing(self) -> None:
+        self.writing_paused = False
+        self.pump()
+
+    async def handshake(self) -> None:
+        """Handshake to establish connection with receiver."""
+        if self.transport is None:
+            await self.open()
+        assert self.connected is not None
+        await self.connected
+
+    def pump(self) -> None:
+        """Send everything the strategy will release, and the pacer let go, right now."""
+        if not self.running or self.writing_paused:
+            return
+        transport = self.transport
+        # Running is only set once the handshake has opened the transport
+        assert transport is not None
+        now = self.strategy.clock()
+        while True:
+            if self.pacer is not None:
+                wait = self.pacer.time_until_departure(now)
+                if wait > 0:
+                    self.wake_after(wait)
+                    return
+            next_segment = self.strategy.next_packet_to_send()
+            if next_segment is None:
+                break
+            transport.sendto(next_segment, self.peer_addr)
+            self.io_stats.packets_sent += 1
+            if self.pacer is not None:
+                self.pacer.on_send(now, len(next_segment))
+            if self.writing_paused:
+                return
+
+        # Sleep until the retransmission deadline
+        self.wake_after(wakeup_time(self.strategy.next_timeout(), now, self.idle_interval) - now)
+
+    def wake_after(self, delay: float) -> None:
+        """Pump again in delay seconds, rescheduling if that is earlier than the wakeup already pending."""
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self.idle_timer is not None:
+            if self.idle_timer.when() <= when:
+                return
+            self.idle_timer.cancel()
+        self.idle_timer = loop.call_at(when, self.on_idle_timer)
+
+    def on_idle_timer(self) -> None:
+        self.idle_timer = None
+        self.pump()
+
+    async def run(self, seconds_to_run: float) -> None:
+        self.running = True
+        self.pump()
+        await asyncio.sleep(seconds_to_run)
+        self.running = False
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+            self.idle_timer = None
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+
+class AsyncReceiver(asyncio.DatagramProtocol):
+    def __init__(self, peers: List[Tuple[str, int]], window_size: int = RECEIVE_WINDOW,
+                 protocol: str = DEFAULT_PROTOCOL, local_addr: Tuple[str, int] = ('0.0.0.0', 0),
+                 sack_blocks: int = DEFAULT_SACK_BLOCKS, ack_every: int = 1,
+                 ack_delay: float = DELAYED_ACK_TIMEOUT) -> None:
+        self.protocol = get_protocol(protocol)
+        self.local_addr = local_addr
+        self.peers: Dict[Tuple, Peer] = {}
+        for peer in peers:
+            self.peers[peer] = Peer(peer[1], window_size, sack_blocks, ack_every, ack_delay)
+        self.unconnected_peers = set(self.peers)
+        self.io_stats = IOStats()
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.all_connected: Optional[asyncio.Future] = None
+
+    async def open(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.all_connected = loop.create_future()
+        await loop.create_datagram_endpoint(lambda: self, local_addr=self.local_addr)
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: Tuple) -> None:
+        self.io_stats.packets_received += 1
+        peer = self.peers.get(addr)
+        if peer is None:
+            return
+
+        parsed = self.protocol.decode(data)
+        if addr in self.unconnected_peers:
+            if parsed.get('handshake'):
+                self.unconnected_peers.discard(addr)
+                assert self.all_connected is not None
+                if not self.unconnected_peers and not self.all_connected.done():
+                    self.all_connected.set_result(True)
+            return
+
+        deadline = peer.delayed_ack_deadline
+        next_ack = peer.receive_segment(parsed, len(data))
+        if next_ack is not None:
+            self.send_ack(next_ack, addr)
+        elif peer.delayed_ack_deadline is not None and peer.delayed_ack_deadline != deadline:
+            self.schedule_delayed_ack(addr, peer.delayed_ack_deadline)
+
+    def send_ack(self, ack: Dict, addr: Tuple) -> None:
+        assert self.transport is not None
+        self.transport.sendto(self.protocol.encode(ack), addr)
+        self.io_stats.packets_sent += 1
+
+    def schedule_delayed_ack(self, addr: Tuple, deadline: float) -> None:
+        delay = max(deadline - self.peers[addr].clock(), 0.0)
+        asyncio.get_running_loop().call_later(delay, self.on_delayed_ack_timer, addr)
+
+    def on_delayed_ack_timer(self, addr: Tuple) -> None:
+        peer = self.peers[addr]
+        deadline = peer.delayed_ack_deadline
+        if deadline is None:
+            # The ACK went out with a later segment
+            return
+        ack = peer.flush_delayed_ack()
+        if ack is not None:
+            self.send_ack(ack, addr)
+        else:
+            # The loop's clock ran a little ahead of the peer's
+            self.schedule_delayed_ack(addr, deadline)
+
+    async def perform_handshakes(self) -> bool:
+        """Handshake with peer senders, retrying like Receiver.perform_handshakes."""
+        if self.transport is None:
+            await self.open()
+        if not self.unconnected_peers:
+            return True
+        assert self.transport is not None and self.all_connected is not None
+
+        for _ in range(HANDSHAKE_RETRIES + 1):
+            for peer in self.unconnected_peers:
+                self.transport.sendto(self.protocol.encode({'handshake': True}), peer)
+            try:
+                await asyncio.wait_for(asyncio.shield(self.all_connected), HANDSHAKE_TIMEOUT)
+                return True
+            except asyncio.TimeoutError:
+                sys.stderr.write('[receiver] Handshake timed out and retrying...\n')
+        sys.stderr.write('[receiver] Handshake failed after %d retries\n' % HANDSHAKE_RETRIES)
+        return False
+
+    def cleanup(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+
+async def run_senders(senders: List[AsyncSender], seconds_to_run: float) -> None:
+    """Handshake every sender, then run them all concurrently on this loop."""
+    await asyncio.gather(*[sender.handshake() for sender in senders])
+    await asyncio.gather(*[sender.run(seconds_to_run) for sender in senders])
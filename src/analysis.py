@@ -0,0 +1,234 @@
+"""
+Offline analysis of recorded runs.
+
+Everything here works on the structured arrays read_events returns, so a
+run can be analysed, and analysed again, without running it again. The
+work is done with whole-array NumPy operations (bincount, lexsort,
+accumulate), with no Python loop over events, so a log of tens of
+millions of events takes seconds rather than minutes.
+
+RTTs are measured from the log itself: each ACK is matched with the last
+time the segment it acknowledges was sent. As in the strategies, ACKs
+of retransmitted segments give no sample (Karn's rule).
+
+The log does not record how big segments were, so byte rates take the
+segment_size of the protocol the run used (Protocol.segment_size).
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from src.eventlog import EVENT_NAMES, SEND, RETRANSMIT, ACK, TIMEOUT, FAST_RETRANSMIT
+
+# Width of the windows rates and percentiles are computed over
+DEFAULT_WINDOW = 1.0  # seconds
+DEFAULT_PERCENTILES = (50, 95, 99)
+# Losses closer together than this belong to the same episode
+DEFAULT_EPISODE_GAP = 0.2  # seconds
+LOSS_EPISODE_DTYPE = np.dtype([('start', '<f8'), ('end', '<f8'), ('losses', '<i8')])
+
+
+def split_flows(events: np.ndarray) -> Dict[int, np.ndarray]:
+    """The events of each flow, in their original order."""
+    flow_ids = events['flow']
+    flows = np.unique(flow_ids)
+    if len(flows) == 1:
+        return {int(flows[0]): events}
+    order = np.argsort(flow_ids, kind='stable')
+    starts = np.searchsorted(flow_ids[order], flows)
+    return dict(zip(flows.tolist(), np.split(events[order], starts[1:])))
+
+
+def of_kind(events: np.ndarray, *kinds: int) -> np.ndarray:
+    """
+    Mask of the events of any of kinds. Indexing single columns with it
+    copies far less than indexing whole records would.
+    """
+    table = np.zeros(256, dtype=bool)
+    table[list(kinds)] = True
+    return table[events['kind']]
+
+
+def rtt_samples(events: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(time of each ACK that gives an RTT sample, the sample) for one flow."""
+    times = events['time']
+    seq_nums = events['seq_num']
+    sends = of_kind(events, SEND, RETRANSMIT)
+    acks = of_kind(events, ACK)
+    if not sends.any() or not acks.any():
+        return np.zeros(0), np.zeros(0)
+
+    send_seq_nums = seq_nums[sends]
+    ack_seq_nums = seq_nums[acks]
+    size = int(max(send_seq_nums.max(), ack_seq_nums.max())) + 1
+    # Time each segment was last sent. Sends are in time order, so among
+    # repeated sequence numbers the last assignment wins.
+    send_times = np.full(size, np.nan)
+    send_times[send_seq_nums] = times[sends]
+    retransmitted = np.zeros(size, dtype=bool)
+    retransmitted[seq_nums[of_kind(events, RETRANSMIT)]] = True
+
+    ack_times = times[acks]
+    rtts = ack_times - send_times[ack_seq_nums]
+    valid = ~retransmitted[ack_seq_nums] & ~np.isnan(rtts)
+    return ack_times[valid], rtts[valid]
+
+
+def queueing_delays(rtts: np.ndarray) -> np.ndarray:
+    """Each RTT less the smallest, which is taken to be the propagation delay."""
+    if len(rtts) == 0:
+        return rtts
+    return rtts - rtts.min()
+
+
+def newly_acked(events: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(time of each ACK, segments it newly acknowledged cumulatively) for one flow."""
+    acks = of_kind(events, ACK)
+    highest = np.maximum.accumulate(events['seq_num'][acks])
+    return events['time'][acks], np.diff(highest, prepend=-1)
+
+
+def window_edges(start: float, end: float, window: float) -> np.ndarray:
+    return start + window * np.arange(max(1, int(np.ceil((end - start) / window))) + 1)
+
+
+def windowed_rate(times: np.ndarray, weights: Optional[np.ndarray], edges: np.ndarray) -> np.ndarray:
+    """Sum of weights (or count of times) per second, in each window between edges."""
+    window = edges[1] - edges[0]
+    bins = np.clip(((times - edges[0]) // window).astype(np.int64), 0, len(edges) - 2)
+    return np.bincount(bins, weights, minlength=len(edges) - 1) / window
+
+
+def windowed_percentiles(times: np.ndarray, values: np.ndarray, edges: np.ndarray,
+                         percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> np.ndarray:
+    """
+    Percentiles of the values in each window between edges, interpolated
+    as numpy.percentile does, one row per window and NaN for empty ones.
+    """
+    num_windows = len(edges) - 1
+    window = edges[1] - edges[0]
+    bins = np.clip(((times - edges[0]) // window).astype(np.int64), 0, num_windows - 1)
+    order = np.lexsort((values, bins))
+    sorted_values = values[order]
+    counts = np.bincount(bins, minlength=num_windows)
+    starts = np.cumsum(counts) - counts
+
+    result = np.full((num_windows, len(percentiles)), np.nan)
+    occupied = counts > 0
+    for column, percentile in enumerate(percentiles):
+        position = (counts[occupied] - 1) * (percentile / 100.0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, counts[occupied] - 1)
+        fraction = position - lower
+        low_values = sorted_values[starts[occupied] + lower]
+        high_values = sorted_values[starts[occupied] + upper]
+        result[occupied, column] = low_values + (high_values - low_values) * fraction
+    return result
+
+
+def loss_episodes(events: np.ndarray, gap: float = DEFAULT_EPISODE_GAP) -> np.ndarray:
+    """
+    Runs of losses (fast retransmits and timeouts) of one flow with less
+    than gap seconds between consecutive ones, as LOSS_EPISODE_DTYPE.
+    """
+    times = np.sort(events['time'][of_kind(events, FAST_RETRANSMIT, TIMEOUT)])
+    episodes = np.zeros(0, dtype=LOSS_EPISODE_DTYPE)
+    if len(times) == 0:
+        return episodes
+    boundaries = np.flatnonzero(np.diff(times) >= gap) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(times)]))
+    episodes = np.zeros(len(starts), dtype=LOSS_EPISODE_DTYPE)
+    episodes['start'] = times[starts]
+    episodes['end'] = times[ends - 1]
+    episodes['losses'] = ends - starts
+    return episodes
+
+
+def flow_time_series(events: np.ndarray, segment_size: int, window: float = DEFAULT_WINDOW,
+                     percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, np.ndarray]:
+    """
+    Per-window columns for one flow: throughput (everything sent) and
+    goodput (new data acknowledged) in bytes per second, retransmissions
+    per second, and RTT and queueing delay percentiles in ms.
+    """
+    edges = window_edges(events['time'].min(), events['time'].max(), window)
+    times = events['time']
+    ack_times, acked = newly_acked(events)
+    rtt_times, rtts = rtt_samples(events)
+
+    series = {
+        'time': edges[:-1],
+        'throughput': windowed_rate(times[of_kind(events, SEND, RETRANSMIT)], None, edges) * segment_size,
+        'goodput': windowed_rate(ack_times, acked.astype(float), edges) * segment_size,
+        'retransmits': windowed_rate(times[of_kind(events, RETRANSMIT)], None, edges),
+    }
+    rtt_percentiles = windowed_percentiles(rtt_times, rtts * 1000, edges, percentiles)
+    delay_percentiles = windowed_percentiles(rtt_times, queueing_delays(rtts) * 1000, edges, percentiles)
+    for column, percentile in enumerate(percentiles):
+        series['rtt_p%g_ms' % percentile] = rtt_percentiles[:, column]
+        series['queueing_delay_p%g_ms' % percentile] = delay_percentiles[:, column]
+    return series
+
+
+def flow_summary(events: np.ndarray, segment_size: int,
+                 episode_gap: float = DEFAULT_EPISODE_GAP) -> Dict[str, float]:
+    """Whole-run figures for one flow."""
+    kinds = np.bincount(events['kind'], minlength=max(EVENT_NAMES) + 1)
+    duration = float(events['time'].max() - events['time'].min()) or np.nan
+    _, acked = newly_acked(events)
+    _, rtts = rtt_samples(events)
+    delays = queueing_delays(rtts)
+    sent = kinds[SEND] + kinds[RETRANSMIT]
+
+    def percentile(values: np.ndarray, p: float) -> float:
+        return float(np.percentile(values, p)) * 1000 if len(values) else np.nan
+
+    return {
+        'duration': duration,
+        'segments_sent': int(sent),
+        'retransmits': int(kinds[RETRANSMIT]),
+        'retransmission_rate': float(kinds[RETRANSMIT]) / sent if sent else np.nan,
+        'throughput': sent * segment_size / duration,
+        'goodput': float(acked.sum()) * segment_size / duration,
+        'rtt_p50_ms': percentile(rtts, 50),
+        'rtt_p95_ms': percentile(rtts, 95),
+        'rtt_p99_ms': percentile(rtts, 99),
+        'queueing_delay_mean_ms': float(delays.mean()) * 1000 if len(delays) else np.nan,
+        'queueing_delay_p95_ms': percentile(delays, 95),
+        'fast_retransmits': int(kinds[FAST_RETRANSMIT]),
+        'timeouts': int(kinds[TIMEOUT]),
+        'loss_episodes': len(loss_episodes(events, episode_gap)),
+    }
+
+
+def flow_table(events: np.ndarray, segment_size: int,
+               episode_gap: float = DEFAULT_EPISODE_GAP) -> Dict[str, np.ndarray]:
+    """flow_summary of every sending flow in a log, one array per column."""
+    rows = []
+    for flow, flow_events in split_flows(events).items():
+        if not of_kind(flow_events, SEND, RETRANSMIT).any():
+            # Only the receiving end of this flow is in the log
+            continue
+        row: Dict[str, float] = {'flow': flow}
+        row.update(flow_summary(flow_events, segment_size, episode_gap))
+        rows.append(row)
+    if not rows:
+        return {}
+    return dict((name, np.array([row[name] for row in rows])) for name in rows[0])
+
+
+def aggregate_table(table: Dict[str, np.ndarray]) -> Dict[str, float]:
+    """
+    Totals over the flows of a flow_table, and Jain's fairness index of
+    their goodputs (1 when every flow gets the same).
+    """
+    goodputs = table['goodput']
+    sent = table['segments_sent'].sum()
+    return {
+        'flows': len(table['flow']),
+        'throughput': float(table['throughput'].sum()),
+        'goodput': float(goodputs.sum()),
+        'retransmission_rate': float(table['retransmits'].sum()) / sent if sent else np.nan,
+        'loss_episodes': int(table['loss_episodes'].sum()),
+        'fairness': float(goodputs.sum() ** 2 / (len(goodputs) * (goodputs ** 2).sum())),
+    }
@@ -0,0 +1,85 @@
+"""
+Delivery rate sampling, after draft-cheng-iccrg-delivery-rate-estimation.
+
+Each segment is stamped, when it is sent, with how much had been delivered
+so far and when. When its ACK arrives, the data delivered in between
+divided by the time it took gives a sample of the rate the path delivers
+at. Taking the longer of the send and ACK intervals keeps ACK compression
+from inflating the sample.
+
+Counts are in segments, so rates are in segments per second, the unit of
+SenderStrategy.pacing_rate. The senders always have data to send, so
+unlike the draft nothing is ever marked application-limited.
+"""
+
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+class RateSample(object):
+    def __init__(self, delivery_rate: float, interval: float, delivered: int) -> None:
+        self.delivery_rate = delivery_rate
+        # Seconds over which delivered segments were delivered
+        self.interval = interval
+        self.delivered = delivered
+
+
+class DeliveryRateEstimator(object):
+    def __init__(self) -> None:
+        # Segments delivered so far, and when the latest of them was
+        self.delivered = 0
+        self.delivered_time: Optional[float] = None
+        # Send time of the segment whose ACK gave the latest sample
+        self.first_sent_time: Optional[float] = None
+
+    def on_send(self, segment: Dict, now: float, in_flight: int) -> None:
+        """Stamp segment, which is about to be sent with in_flight segments outstanding."""
+        if in_flight == 0 or self.delivered_time is None:
+            # Nothing to measure against, start a new interval
+            self.first_sent_time = now
+            self.delivered_time = now
+        segment['delivered'] = self.delivered
+        segment['delivered_time'] = self.delivered_time
+        segment['first_sent_time'] = self.first_sent_time
+
+    def on_ack(self, segment: Optional[Dict], newly_acked: int, now: float) -> Optional[RateSample]:
+        """
+        Count newly_acked segments as delivered. segment is the latest one
+        they include; a sample is taken from it if it was stamped.
+        """
+        self.delivered += newly_acked
+        self.delivered_time = now
+        if segment is None or 'delivered' not in segment:
+            return None
+
+        self.first_sent_time = segment['send_ts']
+        send_elapsed = segment['send_ts'] - segment['first_sent_time']
+        ack_elapsed = now - segment['delivered_time']
+        interval = max(send_elapsed, ack_elapsed)
+        if interval <= 0:
+            return None
+        delivered = self.delivered - segment['delivered']
+        return RateSample(delivered / interval, interval, delivered)
+
+
+class WindowedMaxFilter(object):
+    """
+    Maximum of the samples taken over the last window units of time (or
+    of anything else that only grows, such as round trips). Samples that
+    a later, larger one makes irrelevant are dropped, so the deque stays
+    short.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self.samples: Deque[Tuple[float, float]] = deque()
+
+    def update(self, value: float, now: float) -> None:
+        while self.samples and self.samples[-1][1] <= value:
+            self.samples.pop()
+        self.samples.append((now, value))
+        while self.samples[0][0] <= now - self.window:
+            self.samples.popleft()
+
+    def get(self) -> float:
+        return self.samples[0][1] if self.samples else 0.0
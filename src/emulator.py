@@ -0,0 +1,231 @@
+"""
+Userspace stand-in for mahimahi on machines that do not have it.
+
+LinkEmulator is a UDP relay on loopback. It sits between each Sender and
+run_receiver.py and applies the same link model as the simulator: a fixed
+one-way delay in both directions, random loss and a droptail byte queue
+on the downlink, and trace-driven delivery on both directions. As with
+mahimahi, every flow shares the same queues.
+
+For each flow the relay owns two sockets. The receiver is pointed at the
+receiver-facing socket in place of the sender, and the sender sees the
+sender-facing socket as its peer, so neither needs to know the relay is
+there.
+"""
+
+import heapq
+import selectors
+import socket
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from src.link import Link, LossModel, TraceSchedule, IP_UDP_OVERHEAD, TRACE_DIR
+from src.traces import load_trace, trace_path
+
+DOWNLINK = 0
+UPLINK = 1
+# Longest any queue or timer makes the relay sleep before re-checking
+MAX_SLEEP = 0.1  # seconds
+
+
+class TimerWheel(object):
+    """
+    Hashed timing wheel with 1 ms slots. Scheduling and expiring are O(1)
+    per item; items further out than the wheel spans wait in an overflow
+    heap until they come within range. The earliest occupied tick is
+    remembered, and only looked for again once it has expired.
+    """
+
+    def __init__(self, num_slots: int = 4096) -> None:
+        self.num_slots = num_slots
+        self.slots: List[List[Any]] = [[] for _ in range(num_slots)]
+        # Every tick before this one has been expired
+        self.current_tick = 0
+        self.count = 0
+        # Earliest tick with an item in its slot, None if unknown or empty
+        self.next_due: Optional[int] = None
+        self.overflow: List[Tuple[int, int, Any]] = []
+        self.overflow_count = 0
+
+    def __len__(self) -> int:
+        return self.count + len(self.overflow)
+
+    def schedule(self, due_ms: float, item: Any) -> None:
+        tick = max(int(due_ms) + (0 if due_ms == int(due_ms) else 1), self.current_tick)
+        if tick - self.current_tick >= self.num_slots:
+            self.overflow_count += 1
+            heapq.heappush(self.overflow, (tick, self.overflow_count, item))
+            return
+        self.add_to_slot(tick, item)
+
+    def add_to_slot(self, tick: int, item: Any) -> None:
+        self.slots[tick % self.num_slots].append(item)
+        if self.count == 0:
+            self.next_due = tick
+        elif self.next_due is not None:
+            self.next_due = min(self.next_due, tick)
+        self.count += 1
+
+    def expire(self, now_ms: float) -> List[Any]:
+        """Return every item due at or before now_ms, in due order."""
+        expired: List[Any] = []
+        last_tick = int(now_ms)
+        while self.current_tick <= last_tick:
+            if self.count == 0 and not self.overflow:
+                self.current_tick = last_tick + 1
+                break
+            while self.overflow and self.overflow[0][0] - self.current_tick < self.num_slots:
+                tick, _, item = heapq.heappop(self.overflow)
+                self.add_to_slot(tick, item)
+            slot = self.slots[self.current_tick % self.num_slots]
+            if slot:
+                expired.extend(slot)
+                self.count -= len(slot)
+                slot.clear()
+            self.current_tick += 1
+        if self.next_due is not None and self.next_due < self.current_tick:
+            self.next_due = None
+        return expired
+
+    def next_due_ms(self) -> Optional[int]:
+        """Tick of the earliest pending item, or None if there are none."""
+        due = None
+        if self.count > 0:
+            if self.next_due is None:
+                # Ticks expire() will walk over anyway
+                tick = self.current_tick
+                while not self.slots[tick % self.num_slots]:
+                    tick += 1
+                self.next_due = tick
+            due = self.next_due
+        if self.overflow and (due is None or self.overflow[0][0] < due):
+            due = self.overflow[0][0]
+        return due
+
+
+class RelayedFlow(object):
+    def __init__(self, index: int, sender_port: int, relay_port: int) -> None:
+        self.index = index
+        self.sender_addr = ('127.0.0.1', sender_port)
+        self.receiver_addr: Optional[Tuple] = None
+
+        # The receiver talks to this socket as if it were the sender
+        self.receiver_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.receiver_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.receiver_sock.bind(('127.0.0.1', relay_port))
+        self.receiver_sock.setblocking(False)
+
+        # The sender talks to this socket as if it were the receiver
+        self.sender_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sender_sock.bind(('127.0.0.1', 0))
+        self.sender_sock.setblocking(False)
+
+    def close(self) -> None:
+        self.receiver_sock.close()
+        self.sender_sock.close()
+
+
+class LinkEmulator(object):
+    def __init__(self, mahimahi_settings: Dict, port_pairs: List[Tuple[int, int]],
+                 seed: Optional[int] = None, trace_dir: str = TRACE_DIR) -> None:
+        """port_pairs holds a (sender port, relay port) pair for every flow."""
+        self.delay_ms = float(mahimahi_settings['delay'])
+        schedule = TraceSchedule(load_trace(trace_path(mahimahi_settings['trace_file'], trace_dir)))
+        self.downlink = Link(schedule, mahimahi_settings['queue_size'])
+        self.uplink = Link(schedule)
+        self.loss = LossModel(mahimahi_settings.get('loss') or 0.0, seed)
+        self.delays = TimerWheel()
+
+        self.flows = [RelayedFlow(i, sender_port, relay_port) for i, (sender_port, relay_port) in enumerate(port_pairs)]
+        self.selector = selectors.DefaultSelector()
+        for flow in self.flows:
+            self.selector.register(flow.sender_sock, selectors.EVENT_READ, (flow, DOWNLINK))
+            self.selector.register(flow.receiver_sock, selectors.EVENT_READ, (flow, UPLINK))
+
+        self.start_time = time.monotonic()
+        self.datagrams_in = 0
+        self.datagrams_out = 0
+
+    def now_ms(self) -> float:
+        return (time.monotonic() - self.start_time) * 1000
+
+    def on_readable(self, flow: RelayedFlow, direction: int, now_ms: float) -> None:
+        sock = flow.sender_sock if direction == DOWNLINK else flow.receiver_sock
+        while True:
+            try:
+                data, addr = sock.recvfrom(1600)
+            except BlockingIOError:
+                return
+            self.datagrams_in += 1
+            if direction == DOWNLINK:
+                # mm-delay, then mm-loss, then mm-link
+                self.delays.schedule(now_ms + self.delay_ms, (flow, DOWNLINK, data))
+            else:
+                flow.receiver_addr = addr
+                # mm-link, then mm-delay on the way out
+                self.uplink.enqueue((flow, data), len(data) + IP_UDP_OVERHEAD, now_ms)
+
+    def on_delay_expired(self, flow: RelayedFlow, direction: int, data: bytes, now_ms: float) -> None:
+        if direction == DOWNLINK:
+            if not self.loss.drop():
+                self.downlink.enqueue((flow, data), len(data) + IP_UDP_OVERHEAD, now_ms)
+        else:
+            self.forward(flow.sender_sock, data, flow.sender_addr)
+
+    def forward(self, sock: socket.socket, data: bytes, addr: Optional[Tuple]) -> None:
+        if addr is None:
+            return
+        try:
+            sock.sendto(data, addr)
+            self.datagrams_out += 1
+        except (BlockingIOError, ConnectionRefusedError):
+            pass
+
+    def serve_links(self, now_ms: float) -> None:
+        while self.downlink.is_busy() and self.downlink.next_opportunity_ms() <= now_ms:
+            for flow, data in self.downlink.serve_opportunity():
+                self.forward(flow.receiver_sock, data, flow.receiver_addr)
+        while self.uplink.is_busy() and self.uplink.next_opportunity_ms() <= now_ms:
+            for flow, data in self.uplink.serve_opportunity():
+                self.delays.schedule(now_ms + self.delay_ms, (flow, UPLINK, data))
+
+    def next_wakeup_ms(self) -> Optional[float]:
+        candidates = []
+        for link in (self.downlink, self.uplink):
+            if link.is_busy():
+                candidates.append(link.next_opportunity_ms())
+        next_due = self.delays.next_due_ms()
+        if next_due is not None:
+            candidates.append(next_due)
+        return min(candidates) if candidates else None
+
+    def run(self, seconds_to_run: Optional[float] = None) -> None:
+        end_ms = None if seconds_to_run is None else self.now_ms() + seconds_to_run * 1000
+        while end_ms is None or self.now_ms() < end_ms:
+            now_ms = self.now_ms()
+            next_wakeup = self.next_wakeup_ms()
+            timeout = MAX_SLEEP if next_wakeup is None else min(MAX_SLEEP, max(0.0, (next_wakeup - now_ms) / 1000))
+
+            for key, _ in self.selector.select(timeout):
+                flow, direction = key.data
+                self.on_readable(flow, direction, self.now_ms())
+
+            now_ms = self.now_ms()
+            for flow, direction, data in self.delays.expire(now_ms):
+                self.on_delay_expired(flow, direction, data, now_ms)
+            self.serve_links(now_ms)
+
+    def stats(self) -> Dict:
+        return {
+            'downlink': self.downlink.stats(),
+            'uplink': self.uplink.stats(),
+            'random_losses': self.loss.drops,
+            'datagrams_in': self.datagrams_in,
+            'datagrams_out': self.datagrams_out,
+        }
+
+    def cleanup(self) -> None:
+        sys.stderr.write('[emulator] %s\n' % self.stats())
+        self.selector.close()
+        for flow in self.flows:
+            flow.close()
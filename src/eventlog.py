@@ -0,0 +1,127 @@
+"""
+Append-only log of per-packet events, for analysis after a run.
+
+Every send, retransmission, ACK and loss a strategy sees, and every
+segment a Receiver takes in and ACK it sends back, can be written to an
+EventLog as a fixed-size binary record. Records go straight into a
+memory-mapped file that grows a chunk at a time, so appending one is a
+struct.pack_into, and records already written survive the process being
+killed (as run_with_mahi_settings does to the receiver). read_events
+returns a file as a NumPy structured array.
+
+An EventLog is not thread-safe and must not be shared between
+processes. Give each thread, or each shard of run_multiplexed, its own.
+"""
+
+import mmap
+import os
+import struct
+from typing import Optional
+import numpy as np
+
+# Record kinds. 0 marks space that was allocated but never written.
+SEND = 1
+RETRANSMIT = 2
+ACK = 3
+DUPLICATE_ACK = 4
+# The retransmission timer went off, value is the window after it did
+TIMEOUT = 5
+# Duplicate ACKs or SACK blocks showed seq_num to be lost
+FAST_RETRANSMIT = 6
+# Receiver events. value is the size of the segment for RECEIVE.
+RECEIVE = 7
+ACK_SENT = 8
+EVENT_NAMES = {
+    SEND: 'send',
+    RETRANSMIT: 'retransmit',
+    ACK: 'ack',
+    DUPLICATE_ACK: 'duplicate_ack',
+    TIMEOUT: 'timeout',
+    FAST_RETRANSMIT: 'fast_retransmit',
+    RECEIVE: 'receive',
+    ACK_SENT: 'ack_sent',
+}
+
+# time, seq_num, value, flow, kind, padded to 32 bytes
+EVENT_RECORD = struct.Struct('<dqdHB5x')
+EVENT_DTYPE = np.dtype({
+    'names': ['time', 'seq_num', 'value', 'flow', 'kind'],
+    'formats': ['<f8', '<i8', '<f8', '<u2', 'u1'],
+    'offsets': [0, 8, 16, 24, 26],
+    'itemsize': EVENT_RECORD.size,
+})
+# Records the file grows by at a time
+CHUNK_RECORDS = 32768
+
+
+class EventLog(object):
+    def __init__(self, path: str, chunk_records: int = CHUNK_RECORDS) -> None:
+        """Open path for appending, creating it if it does not exist."""
+        self.path = path
+        self.chunk_size = chunk_records * EVENT_RECORD.size
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self.fd).st_size
+        # Where the next record goes, in the file
+        self.end = size - size % EVENT_RECORD.size
+        self.count = 0
+        self.map: Optional[mmap.mmap] = None
+        self.pack_into = EVENT_RECORD.pack_into
+        self.grow()
+
+    def grow(self) -> None:
+        """Extend the file by a chunk and map from the next record to its end."""
+        if self.map is not None:
+            self.map.close()
+        # mmap offsets must be a multiple of the allocation granularity
+        self.map_start = self.end - self.end % mmap.ALLOCATIONGRANULARITY
+        file_size = self.end + self.chunk_size
+        os.ftruncate(self.fd, file_size)
+        self.map = mmap.mmap(self.fd, file_size - self.map_start, offset=self.map_start)
+        # Next record and end of the space for records, in the mapping
+        self.offset = self.end - self.map_start
+        self.limit = file_size - self.map_start
+
+    def append(self, time: float, flow: int, kind: int, seq_num: int, value: float = 0.0) -> None:
+        # map is only None once closed, which is not checked on this path
+        self.pack_into(self.map, self.offset, time, seq_num, value, flow, kind) # type: ignore
+        self.offset += EVENT_RECORD.size
+        self.count += 1
+        if self.offset == self.limit:
+            self.end = self.map_start + self.offset
+            self.grow()
+
+    def flush(self) -> None:
+        if self.map is not None:
+            self.map.flush()
+
+    def close(self) -> None:
+        """Unmap and cut the file back to the records written."""
+        if self.map is None:
+            return
+        self.end = self.map_start + self.offset
+        self.map.close()
+        self.map = None
+        os.ftruncate(self.fd, self.end)
+        os.close(self.fd)
+
+    def __enter__(self) -> 'EventLog':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_events(path: str) -> np.ndarray:
+    """
+    Every record in an event log, as an array of EVENT_DTYPE, memory-mapped
+    unless the file has unwritten space at the end (its writer was killed
+    or is still running).
+    """
+    num_records = os.path.getsize(path) // EVENT_RECORD.size
+    if num_records == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE)
+    events = np.memmap(path, dtype=EVENT_DTYPE, mode='r', shape=(num_records,))
+    written = events['kind'] != 0
+    if written.all():
+        return events
+    return events[written]
@@ -1,12 +1,17 @@
-import matplotlib.pyplot as plt
-from subprocess import Popen
+from subprocess import Popen, TimeoutExpired
 import socket
 from threading import Thread
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 from src.senders import Sender
+from src.multiplexer import run_multiplexed
+from src.simulator import SimulatedFlow, simulate_with_mahi_settings
+from src.reporting import summarize, write_report, show_plots
+from src.telemetry import TelemetryPublisher, receiver_path
 
 RECEIVER_FILE = "run_receiver.py"
-AVERAGE_SEGMENT_SIZE = 80
+# How long the receiver gets to exit once asked to
+RECEIVER_STOP_TIMEOUT = 5  # seconds
+EMULATOR_FILE = "run_emulator.py"
 
 def generate_mahimahi_command(mahimahi_settings: Dict) -> str:
     if mahimahi_settings.get('loss'):
@@ -30,52 +35,130 @@ def get_open_udp_port():
     return port
 
         
-def print_performance(sender: Sender, num_seconds: int):
+def print_performance(sender: Union[Sender, SimulatedFlow], num_seconds: int, plot: bool = True,
+                      report_dir: Optional[str] = None, show: bool = False):
+    """
+    With report_dir, the summary and plots are written there. Plots are
+    only shown, which blocks outside a notebook, when show is True.
+    plot=False leaves the plots out either way.
+    """
+    summary = summarize(sender, num_seconds)
     print("Results for sender %d:" % sender.port)
-    print("Total Acks: %d" % sender.strategy.total_acks)
-    print("Num Duplicate Acks: %d" % sender.strategy.num_duplicate_acks)
+    print("Total Acks: %d" % summary['total_acks'])
+    print("Num Duplicate Acks: %d" % summary['duplicate_acks'])
     
-    print("%% duplicate acks: %f" % ((float(sender.strategy.num_duplicate_acks * 100))/sender.strategy.total_acks))
-    print("Throughput (bytes/s): %f" % (AVERAGE_SEGMENT_SIZE * (sender.strategy.ack_count/num_seconds)))
-    print("Average RTT (ms): %f" % ((float(sum(sender.strategy.rtts))/len(sender.strategy.rtts)) * 1000))
+    print("%% duplicate acks: %f" % summary['duplicate_ack_percent'])
+    print("Throughput (bytes/s): %f" % summary['throughput'])
+    print("Average RTT (ms): %f" % summary['rtt_mean_ms'])
+    print("RTT p50/p95/p99 (ms): %f / %f / %f" % (summary['rtt_p50_ms'], summary['rtt_p95_ms'],
+                                                 summary['rtt_p99_ms']))
+    print("Syscalls per packet: %f" % summary['syscalls_per_packet'])
+    # With delayed ACKs, fewer ACKs come back and each acknowledges more
+    if summary['packets_sent']:
+        print("ACKs per segment sent: %f" % summary['acks_per_segment_sent'])
+    print("Segments per ACK: %f" % summary['segments_per_ack'])
+
+    if report_dir is not None:
+        write_report(sender, num_seconds, report_dir, plot)
+    if plot and show:
+        show_plots(sender)
     
-    timestamps = [ ack[0] for ack in sender.strategy.times_of_acknowledgements]
-    seq_nums = [ ack[1] for ack in sender.strategy.times_of_acknowledgements]
+def generate_emulator_command(mahimahi_settings: Dict, port_pairs: List) -> str:
+    """Command line for run_emulator.py that mirrors generate_mahimahi_command."""
+    loss = mahimahi_settings.get('loss')
+    return "python3 {emulator_file} --delay {delay} --queue-size {queue_size} --trace-file {trace_file}{loss_directive} {ports}".format(
+      emulator_file=EMULATOR_FILE,
+      delay=mahimahi_settings['delay'],
+      queue_size=mahimahi_settings['queue_size'],
+      trace_file=mahimahi_settings['trace_file'],
+      loss_directive=" --loss %f" % loss if loss else "",
+      ports=" ".join("%d %d" % pair for pair in port_pairs)
+    )
 
-    plt.scatter(timestamps, seq_nums)
-    plt.xlabel("Timestamps")
-    plt.ylabel("Sequence Numbers")
+def run_with_mahi_settings(mahimahi_settings: Dict, seconds_to_run: int, senders: List, batched_receiver: bool = False,
+                           runner: str = 'threads', num_processes: int = 1, emulator: str = 'mahimahi',
+                           plot: bool = True, report_dir: Optional[str] = None,
+                           receiver_event_log: Optional[str] = None, telemetry: Optional[str] = None,
+                           receiver_shards: int = 1, show: bool = False):
+    """
+    runner is either 'threads' (one thread per sender) or 'multiplexed' (one
+    event loop for every sender, optionally sharded over num_processes).
 
-    plt.show()
-    
-    plt.plot(sender.strategy.cwnds)
-    plt.xlabel("Time")
-    plt.ylabel("Congestion Window Size")
-    plt.show()
-    print("")
-    
-    if len(sender.strategy.slow_start_thresholds) > 0:
-        plt.plot(sender.strategy.slow_start_thresholds)
-        plt.xlabel("Time")
-        plt.ylabel("Slow start threshold")
-        plt.show()
-    print("")
-    
-def run_with_mahi_settings(mahimahi_settings: Dict, seconds_to_run: int, senders: List):
-    mahimahi_cmd = generate_mahimahi_command(mahimahi_settings)
+    emulator is either 'mahimahi' or 'python', which runs the receiver behind
+    run_emulator.py on loopback for machines without mahimahi installed.
 
-    sender_ports = " ".join(["$MAHIMAHI_BASE %s" % sender.port for sender in senders])
-    
-    cmd = "%s -- sh -c 'python3 %s %s'" % (mahimahi_cmd, RECEIVER_FILE, sender_ports)
-    receiver_process = Popen(cmd, shell=True)
+    receiver_event_log is a file for the receiver to append its events
+    to. Senders log to the EventLog they were given, if any.
+
+    With telemetry, the senders publish live statistics to that file and
+    the receiver to receiver_path(telemetry), for run_telemetry.py to show.
+
+    With receiver_shards above 1, the receiver splits the senders across
+    that many worker processes (see src/sharded_receiver.py).
+
+    plot, report_dir and show are as for print_performance.
+    """
+    # The receiver speaks a single wire format to all of its peers
+    protocols = set(sender.protocol.name for sender in senders)
+    if len(protocols) != 1:
+        raise ValueError("All senders must use the same protocol, got: %s" % ", ".join(sorted(protocols)))
+
+    receiver_args = "--protocol %s" % protocols.pop()
+    if batched_receiver:
+        receiver_args += " --batched"
+    if receiver_event_log:
+        receiver_args += " --event-log %s" % receiver_event_log
+    if telemetry:
+        receiver_args += " --telemetry %s" % receiver_path(telemetry)
+    if receiver_shards > 1:
+        receiver_args += " --shards %d" % receiver_shards
+
+    emulator_process = None
+    if emulator == 'python':
+        port_pairs = [(sender.port, get_open_udp_port()) for sender in senders]
+        emulator_process = Popen(generate_emulator_command(mahimahi_settings, port_pairs).split())
+        relay_ports = " ".join(["127.0.0.1 %d" % relay_port for _, relay_port in port_pairs])
+        receiver_process = Popen(("python3 %s %s %s" % (RECEIVER_FILE, receiver_args, relay_ports)).split())
+    else:
+        mahimahi_cmd = generate_mahimahi_command(mahimahi_settings)
+        sender_ports = " ".join(["$MAHIMAHI_BASE %s" % sender.port for sender in senders])
+        cmd = "%s -- sh -c 'python3 %s %s %s'" % (mahimahi_cmd, RECEIVER_FILE, receiver_args, sender_ports)
+        receiver_process = Popen(cmd, shell=True)
     for sender in senders:
         sender.handshake()
-    threads = [Thread(target=sender.run, args=[seconds_to_run]) for sender in senders]
-    for thread in threads:
-        thread.start()
-    for thread in threads:
-        thread.join()
+    publisher = None
+    if telemetry:
+        publisher = TelemetryPublisher(telemetry)
+        for sender in senders:
+            publisher.add_sender(sender)
+        publisher.start()
+    if runner == 'multiplexed':
+        run_multiplexed(senders, seconds_to_run, num_processes)
+    else:
+        threads = [Thread(target=sender.run, args=[seconds_to_run]) for sender in senders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    if publisher is not None:
+        publisher.stop()
     
     for sender in senders:
-        print_performance(sender, seconds_to_run)
-    receiver_process.kill()
+        print_performance(sender, seconds_to_run, plot, report_dir, show)
+    # Not killed outright, so a sharded receiver can stop its workers and report
+    receiver_process.terminate()
+    try:
+        receiver_process.wait(RECEIVER_STOP_TIMEOUT)
+    except TimeoutExpired:
+        receiver_process.kill()
+    if emulator_process is not None:
+        emulator_process.terminate()
+
+def simulate_and_print_performance(mahimahi_settings: Dict, seconds_to_run: int, strategies: List, seed: Optional[int] = None,
+                                   pacing: bool = False, plot: bool = True, report_dir: Optional[str] = None,
+                                   show: bool = False):
+    """Like run_with_mahi_settings, but on the simulator instead of mahimahi."""
+    simulation = simulate_with_mahi_settings(mahimahi_settings, seconds_to_run, strategies, seed=seed, pacing=pacing)
+    for flow in simulation.flows:
+        print_performance(flow, seconds_to_run, plot, report_dir, show)
+    return simulation
@@ -0,0 +1,18 @@
+class IOStats(object):
+    """Counts socket syscalls and the datagrams they moved."""
+
+    def __init__(self) -> None:
+        self.syscalls = 0
+        self.packets_sent = 0
+        self.packets_received = 0
+
+    def syscalls_per_packet(self) -> float:
+        packets = self.packets_sent + self.packets_received
+        if packets == 0:
+            return 0.0
+        return float(self.syscalls) / packets
+
+    def __str__(self) -> str:
+        return "syscalls: %d, packets sent: %d, packets received: %d, syscalls/packet: %f" % (
+            self.syscalls, self.packets_sent, self.packets_received, self.syscalls_per_packet()
+        )
@@ -0,0 +1,155 @@
+"""
+Model of the mahimahi link that generate_mahimahi_command sets up.
+
+A trace file lists, one per line, the millisecond timestamps at which the
+link can deliver an MTU-sized packet. The schedule repeats with a period
+equal to the last timestamp. Packets wait in a droptail queue bounded in
+bytes, and each delivery opportunity drains up to MTU bytes from it; a
+packet larger than what is left of an opportunity carries over into the
+next one, as in mahimahi's LinkQueue.
+"""
+
+import random
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+# Bytes that one delivery opportunity can carry
+MTU = 1504
+# IPv4 + UDP headers, which mahimahi counts towards packet sizes
+IP_UDP_OVERHEAD = 28
+TRACE_DIR = 'traces'
+
+
+class TraceSchedule(object):
+    """
+    Delivery opportunity times (in ms) of a trace, repeated forever. The
+    timestamps are kept as given, so a memory-mapped trace from
+    src.traces.load_trace is used in place rather than copied.
+    """
+
+    def __init__(self, timestamps: Union[Sequence[int], np.ndarray]) -> None:
+        self.timestamps: np.ndarray = np.asarray(timestamps)
+        if not len(self.timestamps) or self.timestamps[-1] <= 0:
+            raise ValueError("Trace must end with a positive timestamp")
+        self.period = int(self.timestamps[-1])
+
+    def time_of(self, index: int) -> int:
+        """Time of the index-th opportunity, counting across repetitions."""
+        cycle, offset = divmod(index, len(self.timestamps))
+        return cycle * self.period + int(self.timestamps[offset])
+
+    def first_after(self, time_ms: float) -> int:
+        """Index of the first opportunity strictly later than time_ms."""
+        cycle = int(time_ms // self.period)
+        offset = int(np.searchsorted(self.timestamps, time_ms - cycle * self.period, side='right'))
+        return cycle * len(self.timestamps) + offset
+
+
+class DroptailQueue(object):
+    """FIFO of (packet, size) bounded in bytes. A limit of None means unbounded."""
+
+    def __init__(self, byte_limit: Optional[int] = None) -> None:
+        self.byte_limit = byte_limit
+        self.packets: Deque[Tuple[Any, int]] = deque()
+        self.size_bytes = 0
+        self.max_size_bytes = 0
+        self.drops = 0
+        self.dropped_bytes = 0
+        self.enqueued = 0
+
+    def __len__(self) -> int:
+        return len(self.packets)
+
+    def enqueue(self, packet: Any, size: int) -> bool:
+        if self.byte_limit is not None and self.size_bytes + size > self.byte_limit:
+            self.drops += 1
+            self.dropped_bytes += size
+            return False
+        self.packets.append((packet, size))
+        self.size_bytes += size
+        self.enqueued += 1
+        self.max_size_bytes = max(self.max_size_bytes, self.size_bytes)
+        return True
+
+    def dequeue(self) -> Tuple[Any, int]:
+        packet, size = self.packets.popleft()
+        self.size_bytes -= size
+        return packet, size
+
+
+class Link(object):
+    """
+    One direction of an emulated mahimahi link: a droptail queue drained by
+    a trace schedule. Callers enqueue packets as they arrive and call
+    serve_opportunity() at each opportunity time; next_opportunity_ms()
+    says when that is while there is anything to send.
+    """
+
+    def __init__(self, schedule: TraceSchedule, byte_limit: Optional[int] = None) -> None:
+        self.schedule = schedule
+        self.queue = DroptailQueue(byte_limit)
+        # Index of the next opportunity to use
+        self.next_index = 0
+        self.in_transit: Optional[Any] = None
+        self.in_transit_bytes_left = 0
+        self.delivered = 0
+        self.delivered_bytes = 0
+
+    def is_busy(self) -> bool:
+        return self.in_transit is not None or len(self.queue) > 0
+
+    def enqueue(self, packet: Any, size: int, now_ms: float) -> bool:
+        if not self.is_busy():
+            # Opportunities that passed while the link was idle are wasted
+            self.next_index = max(self.next_index, self.schedule.first_after(now_ms))
+        return self.queue.enqueue(packet, size)
+
+    def next_opportunity_ms(self) -> int:
+        return self.schedule.time_of(self.next_index)
+
+    def serve_opportunity(self) -> List[Any]:
+        """Use the next opportunity and return the packets it finished delivering."""
+        self.next_index += 1
+        delivered = []
+        bytes_left = MTU
+        while bytes_left > 0:
+            if self.in_transit is None:
+                if not self.queue:
+                    break
+                self.in_transit, self.in_transit_bytes_left = self.queue.dequeue()
+            sent = min(bytes_left, self.in_transit_bytes_left)
+            bytes_left -= sent
+            self.in_transit_bytes_left -= sent
+            self.delivered_bytes += sent
+            if self.in_transit_bytes_left == 0:
+                delivered.append(self.in_transit)
+                self.in_transit = None
+        self.delivered += len(delivered)
+        return delivered
+
+    def stats(self) -> Dict:
+        return {
+            'enqueued': self.queue.enqueued,
+            'delivered': self.delivered,
+            'delivered_bytes': self.delivered_bytes,
+            'drops': self.queue.drops,
+            'dropped_bytes': self.queue.dropped_bytes,
+            'queue_bytes': self.queue.size_bytes,
+            'max_queue_bytes': self.queue.max_size_bytes,
+        }
+
+
+class LossModel(object):
+    """Independent random loss with probability rate, like mm-loss."""
+
+    def __init__(self, rate: float = 0.0, seed: Optional[int] = None) -> None:
+        self.rate = rate
+        self.random = random.Random(seed)
+        self.drops = 0
+
+    def drop(self) -> bool:
+        if self.rate > 0 and self.random.random() < self.rate:
+            self.drops += 1
+            return True
+        return False
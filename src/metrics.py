@@ -0,0 +1,198 @@
+"""
+Compact storage for the per-ACK metrics strategies record.
+
+MetricSeries keeps every sample in typed arrays that grow a chunk at a
+time, so a sample costs 8 bytes instead of a boxed Python float in a
+list. RingSeries keeps only the most recent samples, for runs long enough
+that even that is too much, while still aggregating over everything it
+has seen. Both expose the same interface, so SenderStrategy and
+print_performance do not care which one they are given.
+"""
+
+import math
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+CHUNK_SIZE = 65536
+# Relative accuracy of RingSeries percentiles
+PERCENTILE_PRECISION = 0.01
+
+
+class MetricSeries(object):
+    """Every sample, in typed arrays of CHUNK_SIZE entries."""
+
+    def __init__(self, typecode: str = 'd') -> None:
+        self.typecode = typecode
+        self.chunks: List[array] = [array(typecode)]
+        self.append_to_chunk = self.chunks[-1].append
+        self.count = 0
+
+    def append(self, value: float) -> None:
+        self.append_to_chunk(value)
+        self.count += 1
+        if self.count % CHUNK_SIZE == 0:
+            self.chunks.append(array(self.typecode))
+            self.append_to_chunk = self.chunks[-1].append
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[float]:
+        for chunk in self.chunks:
+            yield from chunk
+
+    def __getitem__(self, index: int) -> float:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("series index out of range")
+        return self.chunks[index // CHUNK_SIZE][index % CHUNK_SIZE]
+
+    def to_numpy(self) -> np.ndarray:
+        if len(self.chunks) == 1:
+            return np.frombuffer(self.chunks[0], dtype=self.typecode).copy()
+        return np.concatenate([np.frombuffer(chunk, dtype=chunk.typecode) for chunk in self.chunks])
+
+    def mean(self) -> float:
+        return float(self.to_numpy().mean()) if self.count else math.nan
+
+    def min(self) -> float:
+        return float(self.to_numpy().min()) if self.count else math.nan
+
+    def max(self) -> float:
+        return float(self.to_numpy().max()) if self.count else math.nan
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return math.nan
+        return float(np.percentile(self.to_numpy(), p))
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.mean(),
+            'min': self.min(),
+            'max': self.max(),
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+class RingSeries(MetricSeries):
+    """
+    The last capacity samples, plus count, mean, min and max over every
+    sample and percentiles from a log-bucketed histogram that are within
+    PERCENTILE_PRECISION of the true value.
+    """
+
+    def __init__(self, capacity: int, typecode: str = 'd') -> None:
+        # The chunks of MetricSeries are not used, only the ring
+        self.typecode = typecode
+        self.count = 0
+        self.capacity = capacity
+        # Doubles or integers, depending on typecode
+        self.ring: array = array(typecode)
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        # Index of the oldest sample once the ring is full
+        self.start = 0
+        self.histogram: Dict[int, int] = {}
+        self.log_base = math.log1p(PERCENTILE_PRECISION)
+
+    def append(self, value: float) -> None:
+        if len(self.ring) < self.capacity:
+            self.ring.append(value)
+        else:
+            self.ring[self.start] = value
+            self.start = (self.start + 1) % self.capacity
+        self.count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+        bucket = self.bucket_of(value)
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def bucket_of(self, value: float) -> int:
+        # Non-positive samples share one bucket below all of the others
+        if value <= 0:
+            return -(2 ** 62)
+        return int(math.floor(math.log(value) / self.log_base))
+
+    def __len__(self) -> int:
+        return len(self.ring)
+
+    def __iter__(self) -> Iterator[float]:
+        yield from self.ring[self.start:]
+        yield from self.ring[:self.start]
+
+    def __getitem__(self, index: int) -> float:
+        if index < 0:
+            index += len(self.ring)
+        if not 0 <= index < len(self.ring):
+            raise IndexError("series index out of range")
+        return self.ring[(self.start + index) % len(self.ring)]
+
+    def to_numpy(self) -> np.ndarray:
+        values = np.frombuffer(self.ring, dtype=self.ring.typecode)
+        return np.concatenate([values[self.start:], values[:self.start]])
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def min(self) -> float:
+        return self.minimum if self.count else math.nan
+
+    def max(self) -> float:
+        return self.maximum if self.count else math.nan
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return math.nan
+        rank = p / 100.0 * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen > rank:
+                if bucket == -(2 ** 62):
+                    return min(0.0, self.maximum)
+                # Midpoint of the bucket, clamped to what was observed
+                estimate = math.exp((bucket + 0.5) * self.log_base)
+                return max(self.minimum, min(self.maximum, estimate))
+        return self.maximum
+
+
+def new_series(capacity: Optional[int] = None, typecode: str = 'd') -> MetricSeries:
+    """An unbounded MetricSeries, or a RingSeries if capacity is given."""
+    if capacity is None:
+        return MetricSeries(typecode)
+    return RingSeries(capacity, typecode)
+
+
+class TimestampedSeries(object):
+    """
+    (timestamp, value) pairs stored as two series. Appending and iterating
+    use tuples, like the list of tuples it replaces.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, typecode: str = 'q') -> None:
+        self.timestamps = new_series(capacity, 'd')
+        self.values = new_series(capacity, typecode)
+
+    def append(self, sample: Tuple[float, float]) -> None:
+        self.timestamps.append(sample[0])
+        self.values.append(sample[1])
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        return zip(self.timestamps, self.values)
+
+    def __getitem__(self, index: int) -> Tuple[float, float]:
+        return self.timestamps[index], self.values[index]
@@ -0,0 +1,132 @@
+import heapq
+import multiprocessing
+import selectors
+import time
+from typing import List, Optional, Tuple
+from src.senders import Sender
+from src.timers import wakeup_time
+
+# How long a flow whose window is closed waits before its strategy is
+# asked again, when the strategy has no retransmission timer running.
+IDLE_INTERVAL = 0.01  # seconds
+
+
+class MultiplexedRunner(object):
+    """
+    Drives many Senders from a single selectors loop in one thread.
+
+    Flows that can send are served round-robin, one segment each per pass,
+    so no flow gets to dump its whole window ahead of the others. A flow
+    whose strategy releases nothing is parked until either an ACK arrives
+    on its socket or its entry in the timer schedule comes due, which is
+    the strategy's retransmission deadline when it has one. Paced flows
+    (those with a Pacer, which includes every strategy that requires
+    pacing) are also parked until their next departure time.
+    """
+
+    def __init__(self, senders: List[Sender], idle_interval: float = IDLE_INTERVAL) -> None:
+        self.senders = senders
+        self.idle_interval = idle_interval
+        self.selector = selectors.DefaultSelector()
+        for index, sender in enumerate(senders):
+            sender.sock.setblocking(False)
+            self.selector.register(sender.sock, selectors.EVENT_READ, index)
+
+        self.ready = list(range(len(senders)))
+        self.is_ready = [True] * len(senders)
+        # (when, flow index) min-heap of parked flows
+        self.timers: List[Tuple[float, int]] = []
+
+    def wake(self, index: int) -> None:
+        if not self.is_ready[index]:
+            self.is_ready[index] = True
+            self.ready.append(index)
+
+    def park(self, index: int, now: float, when: Optional[float] = None) -> None:
+        """Park a flow until when, or by default its strategy's next timeout."""
+        self.is_ready[index] = False
+        if when is None:
+            when = wakeup_time(self.senders[index].strategy.next_timeout(), now, self.idle_interval)
+        heapq.heappush(self.timers, (when, index))
+
+    def send_pass(self, now: float) -> None:
+        still_ready = []
+        for index in self.ready:
+            pacer = self.senders[index].pacer
+            if pacer is not None and pacer.time_until_departure(now) > 0:
+                self.park(index, now, pacer.next_departure)
+            elif self.senders[index].try_send():
+                still_ready.append(index)
+            else:
+                self.park(index, now)
+        self.ready = still_ready
+
+    def fire_timers(self, now: float) -> None:
+        while self.timers and self.timers[0][0] <= now:
+            _, index = heapq.heappop(self.timers)
+            self.wake(index)
+
+    def run(self, seconds_to_run: float) -> None:
+        start_time = time.time()
+        end_time = start_time + seconds_to_run
+
+        now = start_time
+        while now < end_time:
+            self.send_pass(now)
+
+            if self.ready:
+                timeout = 0.0
+            elif self.timers:
+                timeout = max(0.0, min(self.timers[0][0], end_time) - now)
+            else:
+                timeout = end_time - now
+
+            for key, _ in self.selector.select(timeout):
+                index = key.data
+                self.senders[index].recv_batch()
+                self.wake(index)
+
+            now = time.time()
+            self.fire_timers(now)
+
+        self.selector.close()
+
+
+def _run_shard(senders: List[Sender], seconds_to_run: float, idle_interval: float, conn) -> None:
+    MultiplexedRunner(senders, idle_interval).run(seconds_to_run)
+    conn.send([(sender.strategy, sender.io_stats) for sender in senders])
+    conn.close()
+
+
+def run_multiplexed(senders: List[Sender], seconds_to_run: float, num_processes: int = 1,
+                    idle_interval: float = IDLE_INTERVAL) -> None:
+    """
+    Run senders in one event loop, or split them across num_processes
+    forked processes that each run their own loop. In the sharded case
+    the children send their strategies back when they finish, so the
+    Sender objects end up with the same results as an in-process run.
+    """
+    if num_processes <= 1 or len(senders) <= 1:
+        MultiplexedRunner(senders, idle_interval).run(seconds_to_run)
+        return
+    if any(sender.strategy.event_log is not None for sender in senders):
+        raise ValueError("Event logs cannot be shared across processes, run with num_processes=1")
+
+    context = multiprocessing.get_context('fork')
+    shards = [senders[i::num_processes] for i in range(num_processes)]
+    workers = []
+    for shard in shards:
+        if not shard:
+            continue
+        parent_conn, child_conn = context.Pipe(duplex=False)
+        process = context.Process(target=_run_shard, args=(shard, seconds_to_run, idle_interval, child_conn))
+        process.start()
+        child_conn.close()
+        workers.append((shard, process, parent_conn))
+
+    for shard, process, conn in workers:
+        results = conn.recv()
+        for sender, (strategy, io_stats) in zip(shard, results):
+            sender.strategy = strategy
+            sender.io_stats = io_stats
+        process.join()
@@ -0,0 +1,45 @@
+"""
+Pacing: spreading a window's worth of segments over a round trip instead
+of sending them back to back.
+
+Pacer is a departure-time scheduler. Each segment pushes the next
+departure back by the segment's share of the rate, so callers only ever
+ask how long to wait. The rate is either fixed in bytes per second or
+taken from the strategy (SenderStrategy.pacing_rate, in segments per
+second, which by default follows cwnd / SRTT).
+"""
+
+from typing import Optional
+from src.strategies import SenderStrategy
+
+# How far behind schedule the pacer may fall before it stops trying to
+# catch up. Sleeps overshoot by about this much, so this lets the segments
+# that came due during one go out together, but a flow that was idle for
+# longer does not earn a burst.
+PACING_SLACK = 0.002  # seconds
+
+
+class Pacer(object):
+    def __init__(self, strategy: SenderStrategy, rate: Optional[float] = None,
+                 slack: float = PACING_SLACK) -> None:
+        """rate is in bytes per second. Without it, the strategy sets the pace."""
+        self.strategy = strategy
+        self.rate = rate
+        self.slack = slack
+        self.next_departure = 0.0
+
+    def time_until_departure(self, now: float) -> float:
+        """Seconds until the next segment may leave, 0 if it may leave now."""
+        return max(0.0, self.next_departure - now)
+
+    def interval(self, size_bytes: int) -> float:
+        if self.rate is not None:
+            return size_bytes / self.rate
+        segments_per_second = self.strategy.pacing_rate()
+        if not segments_per_second:
+            # No RTT sample yet, the window alone limits sending
+            return 0.0
+        return 1.0 / segments_per_second
+
+    def on_send(self, now: float, size_bytes: int) -> None:
+        self.next_departure = max(self.next_departure, now - self.slack) + self.interval(size_bytes)
@@ -0,0 +1,95 @@
+import json
+import struct
+from typing import Dict, Optional, Union
+
+# Flag bits carried in the binary header
+HANDSHAKE_FLAG = 0x01
+
+# seq_num, send_ts, sent_bytes, ack_bytes, flags
+BINARY_HEADER = struct.Struct('!qdqqB')
+# start, end of a SACK block. ACKs append one per block after the header.
+SACK_BLOCK = struct.Struct('!qq')
+
+
+class Protocol(object):
+    """Serializes segments, ACKs and handshakes to and from datagrams."""
+
+    name = ''
+    # Size of every data segment, if the format is fixed-size
+    fixed_size: Optional[int] = None
+    # Bytes a data segment takes, on average if the format is not fixed-size
+    segment_size = 0
+
+    def encode(self, message: Dict) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: Union[bytes, str]) -> Dict:
+        raise NotImplementedError
+
+
+class JsonProtocol(Protocol):
+    """Human readable wire format. Slow, but handy for debugging."""
+
+    name = 'json'
+    # Roughly what a segment encodes to
+    segment_size = 80
+
+    def encode(self, message: Dict) -> bytes:
+        return json.dumps(message).encode()
+
+    def decode(self, data: Union[bytes, str]) -> Dict:
+        return json.loads(data)
+
+
+class BinaryProtocol(Protocol):
+    """
+    Fixed-layout binary header. Every segment is BINARY_HEADER.size bytes;
+    ACKs are followed by their SACK blocks, if they have any.
+    """
+
+    name = 'binary'
+    fixed_size = BINARY_HEADER.size
+    segment_size = BINARY_HEADER.size
+
+    def encode(self, message: Dict) -> bytes:
+        flags = HANDSHAKE_FLAG if message.get('handshake') else 0
+        header = BINARY_HEADER.pack(
+            message.get('seq_num', 0),
+            message.get('send_ts', 0.0),
+            message.get('sent_bytes', 0),
+            message.get('ack_bytes', 0),
+            flags
+        )
+        sack = message.get('sack')
+        if not sack:
+            return header
+        return header + b''.join(SACK_BLOCK.pack(start, end) for start, end in sack)
+
+    def decode(self, data: Union[bytes, str]) -> Dict:
+        # Only the JSON format is ever handed text
+        seq_num, send_ts, sent_bytes, ack_bytes, flags = BINARY_HEADER.unpack_from(data) # type: ignore
+        if flags & HANDSHAKE_FLAG:
+            return {'handshake': True}
+        message = {
+            'seq_num': seq_num,
+            'send_ts': send_ts,
+            'sent_bytes': sent_bytes,
+            'ack_bytes': ack_bytes
+        }
+        if len(data) > BINARY_HEADER.size:
+            message['sack'] = [list(block) for block in SACK_BLOCK.iter_unpack(data[BINARY_HEADER.size:])] # type: ignore
+        return message
+
+
+PROTOCOLS: Dict[str, Protocol] = {
+    JsonProtocol.name: JsonProtocol(),
+    BinaryProtocol.name: BinaryProtocol(),
+}
+
+DEFAULT_PROTOCOL = BinaryProtocol.name
+
+
+def get_protocol(name: str) -> Protocol:
+    if name not in PROTOCOLS:
+        raise ValueError("Unknown protocol %r, expected one of: %s" % (name, ", ".join(PROTOCOLS)))
+    return PROTOCOLS[name]
@@ -1,8 +1,13 @@
+import math
 import sys
-import json
 import socket
 import select
-from typing import List, Dict, Tuple
+import time
+from typing import Iterable, List, Dict, Tuple, Optional
+from src.protocol import DEFAULT_PROTOCOL, get_protocol
+from src.iostats import IOStats
+from src.eventlog import EventLog, RECEIVE, ACK_SENT
+from src.sack import DEFAULT_SACK_BLOCKS, RangeSet
 
 READ_FLAGS = select.POLLIN | select.POLLPRI
 WRITE_FLAGS = select.POLLOUT
@@ -13,52 +18,211 @@ ALL_FLAGS = READ_FLAGS | WRITE_FLAGS | ERR_FLAGS
 # This is set to a large enough value to
 # accomodate any reasonable congestion window size.
 RECEIVE_WINDOW = 100000
+# Longest an in-order segment waits for its ACK in delayed-ACK mode, as in
+# Linux's minimum delayed ACK timeout
+DELAYED_ACK_TIMEOUT = 0.04  # seconds
+
+def construct_ack(data: Dict, num_bytes: int):
+    """Construct an ACK for a parsed datagram that was num_bytes long."""
+    return {
+      'seq_num': data['seq_num'],
+      'send_ts': data['send_ts'],
+      'ack_bytes': num_bytes
+    }
+
 
 class Peer(object):
-    def __init__(self, port: int, window_size: int) -> None:
+    """
+    Reorder buffer for a single sender.
+
+    Segments above the cumulative ACK point (high_water_mark) are kept in a
+    ring of window_size slots indexed by seq_num, so adding a segment and
+    advancing past filled holes is amortized O(1).
+
+    With sack_blocks set, ACKs also carry up to that many ranges of the
+    buffered segments (RFC 2018): first the one the segment just received
+    is in, then the lowest others.
+
+    With ack_every above 1, in-order segments are acknowledged every
+    ack_every segments, or ack_delay seconds after the first one that is
+    still unacknowledged, whichever comes first (RFC 1122's delayed ACKs).
+    Segments out of order, and segments that fill a hole, are acknowledged
+    straight away so the sender hears about losses without delay. The
+    owner of the Peer sends what flush_delayed_ack returns once
+    delayed_ack_deadline has passed.
+    """
+
+    def __init__(self, port: int, window_size: int, sack_blocks: int = DEFAULT_SACK_BLOCKS,
+                 ack_every: int = 1, ack_delay: float = DELAYED_ACK_TIMEOUT) -> None:
         self.window_size = window_size
         self.port = port
         self.seq_num = -1
         self.attempts = 0
         self.previous_ack = None
         self.high_water_mark = -1
-        self.window: List[Dict] = []
+        # The most recent in-order segment, which is what we ACK
+        self.last_in_order: Optional[Dict] = None
+        self.slots: List[Optional[Dict]] = [None] * window_size
+        self.num_buffered = 0
+        self.highest_buffered = -1
+        self.dropped_segments = 0
+        self.sack_blocks = sack_blocks
+        # Ranges of buffered segments
+        self.sacked = RangeSet()
+
+        self.ack_every = ack_every
+        self.ack_delay = ack_delay
+        # Source of the current time. The simulator swaps in a virtual clock.
+        self.clock = time.time
+        # In-order segments received since the last ACK, and when the
+        # first of them has to be acknowledged by
+        self.unacked_segments = 0
+        self.delayed_ack_deadline: Optional[float] = None
+        self.segments_received = 0
+        self.acks_sent = 0
+
+    @property
+    def window(self) -> List[Dict]:
+        """The last in-order segment followed by buffered out-of-order segments."""
+        window = [] if self.last_in_order is None else [self.last_in_order]
+        if self.num_buffered > 0:
+            for seq_num in range(self.high_water_mark + 2, self.highest_buffered + 1):
+                segment = self.slots[seq_num % self.window_size]
+                if segment is not None:
+                    window.append(segment)
+        return window
 
-    def window_has_no_missing_segments(self):
-        seq_nums = [seg['seq_num'] for seg in self.window]
-        return all([seq_nums[i] + 1 ==  seq_nums[i+1] for i in range(len(seq_nums[:-1]))])
+    def window_occupancy(self) -> int:
+        """Same as len(self.window), without materializing it."""
+        return self.num_buffered + (0 if self.last_in_order is None else 1)
 
-    def process_window(self):
-        seq_nums = [seg['seq_num'] for seg in self.window]
-        if self.window_has_no_missing_segments():
-            self.high_water_mark = max(self.high_water_mark, self.window[-1]['seq_num'])
-            self.window = self.window[-1:]
-        elif len(self.window) == self.window_size:
-            self.window = self.window[:-1]
-            print("chopping window")
+    def window_has_no_missing_segments(self) -> bool:
+        return self.num_buffered == 0
 
     def add_segment(self, ack: Dict):
         seq_num = ack['seq_num']
 
-        if all([seq_num != item['seq_num'] for item in self.window]):
-            self.window.append(ack)
-        self.window.sort(key=lambda a: a['seq_num'])
+        if seq_num <= self.high_water_mark:
+            # Already acknowledged
+            return
 
-        self.process_window()
+        if seq_num - self.high_water_mark >= self.window_size:
+            # Beyond the receive window
+            self.dropped_segments += 1
+            return
+
+        if seq_num == self.high_water_mark + 1:
+            self.high_water_mark = seq_num
+            self.last_in_order = ack
+            # Advance through any holes this segment filled
+            while self.num_buffered > 0:
+                index = (self.high_water_mark + 1) % self.window_size
+                segment = self.slots[index]
+                if segment is None:
+                    break
+                self.slots[index] = None
+                self.num_buffered -= 1
+                self.high_water_mark += 1
+                self.last_in_order = segment
+            if self.sacked.count:
+                self.sacked.discard_through(self.high_water_mark)
+            return
+
+        index = seq_num % self.window_size
+        if self.slots[index] is None:
+            self.slots[index] = ack
+            self.num_buffered += 1
+            self.highest_buffered = max(self.highest_buffered, seq_num)
+            self.sacked.add(seq_num, seq_num)
+
+    def next_ack(self) -> Optional[Dict]:
+        return self.last_in_order
+
+    def sack_blocks_for(self, seq_num: int) -> List[List[int]]:
+        """Up to sack_blocks ranges to report after receiving seq_num."""
+        latest = self.sacked.find(seq_num)
+        blocks = [] if latest is None else [latest]
+        for sacked_range in self.sacked:
+            if len(blocks) >= self.sack_blocks:
+                break
+            if sacked_range is not latest:
+                blocks.append(sacked_range)
+        return [list(block) for block in blocks]
+
+    def receive_segment(self, data: Dict, num_bytes: int) -> Optional[Dict]:
+        """Buffer a parsed data segment and return the ACK to send back, if any."""
+        seq_num = data['seq_num']
+        if seq_num <= self.high_water_mark:
+            return None
+        self.segments_received += 1
+        filled_hole = self.num_buffered > 0
+        self.add_segment(construct_ack(data, num_bytes))
+
+        if self.ack_every > 1 and seq_num == self.high_water_mark and not filled_hole:
+            self.unacked_segments += 1
+            if self.unacked_segments < self.ack_every:
+                if self.delayed_ack_deadline is None:
+                    self.delayed_ack_deadline = self.clock() + self.ack_delay
+                return None
+        return self.ack_for(seq_num)
+
+    def ack_for(self, seq_num: int) -> Optional[Dict]:
+        """The ACK to send now, after receiving seq_num."""
+        ack = self.next_ack()
+        if ack is None:
+            return None
+        self.unacked_segments = 0
+        self.delayed_ack_deadline = None
+        self.acks_sent += 1
+        if not self.sack_blocks or not self.sacked.count:
+            return ack
+        return dict(ack, sack=self.sack_blocks_for(seq_num))
+
+    def flush_delayed_ack(self) -> Optional[Dict]:
+        """The delayed ACK, if its deadline has passed."""
+        if self.delayed_ack_deadline is None or self.clock() < self.delayed_ack_deadline:
+            return None
+        return self.ack_for(self.high_water_mark)
+
+    def acks_per_segment(self) -> float:
+        if self.segments_received == 0:
+            return 0.0
+        return float(self.acks_sent) / self.segments_received
+
+
+def next_delayed_ack(peers: Iterable[Peer]) -> Optional[float]:
+    """When the earliest delayed ACK of any of peers is due, None if none is pending."""
+    return min((peer.delayed_ack_deadline for peer in peers if peer.delayed_ack_deadline is not None),
+               default=None)
+
+
+def time_to_delayed_ack(peers: Iterable[Peer], now: float) -> Optional[float]:
+    """Seconds until the earliest delayed ACK of any of peers is due, None if none is pending."""
+    deadline = next_delayed_ack(peers)
+    if deadline is None:
+        return None
+    return max(deadline - now, 0.0)
 
-    def next_ack(self):
-        for i in range(len(self.window[:-1])):
-            if self.window[i + 1]['seq_num'] > self.window[i]['seq_num'] + 1:
-                return self.window[i]
-        else:
-            return self.window[-1]
 
 class Receiver(object):
-    def __init__(self, peers: List[Tuple[str, int]], window_size: int = RECEIVE_WINDOW) -> None:
+    def __init__(self, peers: List[Tuple[str, int]], window_size: int = RECEIVE_WINDOW, protocol: str = DEFAULT_PROTOCOL,
+                 batched: bool = False, sack_blocks: int = DEFAULT_SACK_BLOCKS, ack_every: int = 1,
+                 ack_delay: float = DELAYED_ACK_TIMEOUT, event_log: Optional[EventLog] = None) -> None:
+        """
+        sack_blocks is the most SACK blocks an ACK carries, 0 to send none.
+        With ack_every above 1, ACKs are delayed as described on Peer.
+        With event_log, every segment taken in and ACK sent is recorded
+        there, tagged with the peer's port.
+        """
         self.recv_window_size = window_size
+        self.protocol = get_protocol(protocol)
+        self.batched = batched
+        self.io_stats = IOStats()
         self.peers: Dict[Tuple, Peer] = {}
         for peer in peers:
-            self.peers[peer] = Peer(peer[1], window_size)
+            self.peers[peer] = Peer(peer[1], window_size, sack_blocks, ack_every, ack_delay)
+        self.delayed_acks = ack_every > 1
+        self.event_log = event_log
 
         # UDP socket and poller
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -68,16 +232,12 @@ class Receiver(object):
         self.poller.register(self.sock, ALL_FLAGS)
 
     def cleanup(self):
+        sys.stderr.write('[receiver] %s\n' % self.io_stats)
+        for peer in self.peers.values():
+            sys.stderr.write('[receiver] peer %d: ACKs per segment: %f\n' % (peer.port, peer.acks_per_segment()))
         self.sock.close()
 
-    def construct_ack(self, serialized_data: str):
-        """Construct a serialized ACK that acks a serialized datagram."""
-        data = json.loads(serialized_data)
-        return {
-          'seq_num': data['seq_num'],
-          'send_ts': data['send_ts'],
-          'ack_bytes': len(serialized_data)
-        }
+    construct_ack = staticmethod(construct_ack)
 
     def perform_handshakes(self):
         """Handshake with peer sender. Must be called before run()."""
@@ -93,7 +253,7 @@ class Receiver(object):
 
         while len(unconnected_peers) > 0:
             for peer in unconnected_peers:
-                self.sock.sendto(json.dumps({'handshake': True}).encode(), peer)
+                self.sock.sendto(self.protocol.encode({'handshake': True}), peer)
 
             events = self.poller.poll(TIMEOUT)
 
@@ -118,24 +278,96 @@ class Receiver(object):
                     msg, addr = self.sock.recvfrom(1600)
 
                     if addr in unconnected_peers:
-                        if json.loads(msg.decode()).get('handshake'):
+                        if self.protocol.decode(msg).get('handshake'):
                             unconnected_peers.remove(addr)
 
+    def handle_datagram(self, serialized_data: bytes, addr: Tuple) -> None:
+        if addr in self.peers:
+            peer = self.peers[addr]
+
+            data = self.protocol.decode(serialized_data)
+            if self.event_log is not None:
+                self.event_log.append(time.time(), peer.port, RECEIVE, data['seq_num'], len(serialized_data))
+            if data['seq_num'] > peer.high_water_mark:
+                next_ack = peer.receive_segment(data, len(serialized_data))
+
+                if next_ack is not None:
+                    self.send_ack(next_ack, addr)
+
+    def send_ack(self, ack: Dict, addr: Tuple) -> None:
+        self.sock.sendto(self.protocol.encode(ack), addr)
+        self.io_stats.syscalls += 1
+        self.io_stats.packets_sent += 1
+        if self.event_log is not None:
+            self.event_log.append(time.time(), addr[1], ACK_SENT, ack['seq_num'])
+
+    def flush_delayed_acks(self) -> None:
+        for addr, peer in self.peers.items():
+            ack = peer.flush_delayed_ack()
+            if ack is not None:
+                self.send_ack(ack, addr)
+
+    def poll_timeout_ms(self) -> Optional[int]:
+        """How long poll() may block before a delayed ACK is due, None for as long as it takes."""
+        if not self.delayed_acks:
+            return None
+        timeout = time_to_delayed_ack(self.peers.values(), time.time())
+        return None if timeout is None else int(math.ceil(timeout * 1000))
+
     def run(self):
-        self.sock.setblocking(1)  # blocking UDP socket
+        if self.batched:
+            self.run_batched()
+            return
+
+        if self.delayed_acks:
+            # Datagrams are waited for in poll(), which takes the time left
+            # until the next delayed ACK afresh on every pass
+            self.sock.setblocking(0)
+            self.poller.modify(self.sock, READ_ERR_FLAGS)
+        else:
+            self.sock.setblocking(True)  # blocking UDP socket
 
         while True:
-            serialized_data, addr = self.sock.recvfrom(1600)
+            if self.delayed_acks:
+                # Send what is due, and wake up in time for the next one
+                self.flush_delayed_acks()
+                events = self.poller.poll(self.poll_timeout_ms())
+                self.io_stats.syscalls += 1
+                for fd, flag in events:
+                    if flag & ERR_FLAGS:
+                        sys.exit('Channel closed or error occurred')
+                if not events:
+                    continue
+                try:
+                    serialized_data, addr = self.sock.recvfrom(1600)
+                except BlockingIOError:
+                    continue
+            else:
+                serialized_data, addr = self.sock.recvfrom(1600)
+            self.io_stats.syscalls += 1
+            self.io_stats.packets_received += 1
+            self.handle_datagram(serialized_data, addr)
 
-            if addr in self.peers:
-                peer = self.peers[addr]
+    def run_batched(self):
+        """Wait for the socket to become readable, then drain it until EAGAIN."""
+        self.sock.setblocking(0)
+        self.poller.modify(self.sock, READ_ERR_FLAGS)
 
-                data = json.loads(serialized_data)
-                seq_num = data['seq_num']
-                if seq_num > peer.high_water_mark:
-                    ack = self.construct_ack(serialized_data)
-                    peer.add_segment(ack)
-                    print(len(peer.window))
+        while True:
+            events = self.poller.poll(self.poll_timeout_ms())
+            self.io_stats.syscalls += 1
+            if self.delayed_acks:
+                self.flush_delayed_acks()
+            for fd, flag in events:
+                if flag & ERR_FLAGS:
+                    sys.exit('Channel closed or error occurred')
 
-                    if peer.next_ack() is not None:
-                        self.sock.sendto(json.dumps(peer.next_ack()).encode(), addr)
+            while True:
+                try:
+                    serialized_data, addr = self.sock.recvfrom(1600)
+                except BlockingIOError:
+                    self.io_stats.syscalls += 1
+                    break
+                self.io_stats.syscalls += 1
+                self.io_stats.packets_received += 1
+                self.handle_datagram(serialized_data, addr)
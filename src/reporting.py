@@ -0,0 +1,141 @@
+"""
+Results of a run as numbers, and as figures that do not block.
+
+summarize gives the figures print_performance prints as a dict, and
+write_report saves them as JSON alongside PNGs drawn with the Agg
+backend, so a report can be produced on a machine without a display.
+Long series are thinned with min/max bucketing before they are drawn:
+each bucket keeps its lowest and highest point, so spikes and drops
+survive while a run of millions of ACKs plots in a fraction of a second.
+
+matplotlib is only imported when a figure is drawn.
+"""
+
+import json
+import math
+import os
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+# Most points drawn for any one series
+MAX_PLOT_POINTS = 5000
+
+
+def summarize(sender, num_seconds: float) -> Dict:
+    """What print_performance reports about a Sender, SimulatedFlow or AsyncSender."""
+    strategy = sender.strategy
+    io_stats = sender.io_stats
+    rtts = strategy.rtts
+    return {
+        'port': sender.port,
+        'total_acks': strategy.total_acks,
+        'duplicate_acks': strategy.num_duplicate_acks,
+        'duplicate_ack_percent': (float(strategy.num_duplicate_acks * 100) / strategy.total_acks
+                                  if strategy.total_acks else math.nan),
+        'ack_count': strategy.ack_count,
+        'acked_segments': strategy.acked_segments,
+        # Segments, rather than ACKs, so delayed ACKs do not show as less throughput
+        'throughput': strategy.protocol.segment_size * strategy.acked_segments / num_seconds,
+        'rtt_mean_ms': rtts.mean() * 1000,
+        'rtt_p50_ms': rtts.percentile(50) * 1000,
+        'rtt_p95_ms': rtts.percentile(95) * 1000,
+        'rtt_p99_ms': rtts.percentile(99) * 1000,
+        'syscalls_per_packet': io_stats.syscalls_per_packet(),
+        'packets_sent': io_stats.packets_sent,
+        'packets_received': io_stats.packets_received,
+        'acks_per_segment_sent': (float(io_stats.packets_received) / io_stats.packets_sent
+                                  if io_stats.packets_sent else math.nan),
+        'segments_per_ack': strategy.segments_per_ack(),
+    }
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int = MAX_PLOT_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    At most max_points of (x, y), in order: the lowest and highest y of
+    each of max_points / 2 buckets of consecutive points.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    count = len(y)
+    if count <= max_points:
+        return x, y
+
+    bucket_size = int(math.ceil(count / float(max(1, max_points // 2))))
+    num_full = count // bucket_size
+    buckets = y[:num_full * bucket_size].reshape(num_full, bucket_size)
+    starts = np.arange(num_full) * bucket_size
+    indices = [starts + buckets.argmin(axis=1), starts + buckets.argmax(axis=1)]
+    if num_full * bucket_size < count:
+        tail = y[num_full * bucket_size:]
+        indices.append(num_full * bucket_size + np.array([tail.argmin(), tail.argmax()]))
+    keep = np.unique(np.concatenate(indices))
+    return x[keep], y[keep]
+
+
+def plot_series(sender, new_figure: Optional[Callable[[], 'Figure']] = None) -> List[Tuple[str, 'Figure']]:
+    """
+    (name, figure) for each plot of a run, downsampled. Figures come from
+    new_figure, by default bare Figures that are off any display.
+    """
+    if new_figure is None:
+        from matplotlib.figure import Figure
+        new_figure = Figure
+
+    strategy = sender.strategy
+    acknowledgements = strategy.times_of_acknowledgements
+    plots = [
+        ('acks', downsample(acknowledgements.timestamps.to_numpy(), acknowledgements.values.to_numpy()),
+         "Timestamps", "Sequence Numbers", True),
+    ]
+    cwnds = strategy.cwnds.to_numpy()
+    plots.append(('cwnd', downsample(np.arange(len(cwnds)), cwnds), "Time", "Congestion Window Size", False))
+    if len(strategy.slow_start_thresholds) > 0:
+        thresholds = strategy.slow_start_thresholds.to_numpy()
+        plots.append(('ssthresh', downsample(np.arange(len(thresholds)), thresholds),
+                      "Time", "Slow start threshold", False))
+
+    figures = []
+    for name, (x, y), xlabel, ylabel, scatter in plots:
+        figure = new_figure()
+        axes = figure.add_subplot(1, 1, 1)
+        if scatter:
+            axes.scatter(x, y, s=4)
+        else:
+            axes.plot(x, y)
+        axes.set_xlabel(xlabel)
+        axes.set_ylabel(ylabel)
+        figures.append((name, figure))
+    return figures
+
+
+def write_report(sender, num_seconds: float, report_dir: str, plot: bool = True) -> Dict:
+    """
+    Write sender_<port>.json, and unless plot is False a PNG per plot,
+    into report_dir. Returns the summary.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    os.makedirs(report_dir, exist_ok=True)
+    prefix = os.path.join(report_dir, 'sender_%d' % sender.port)
+    summary = summarize(sender, num_seconds)
+    with open(prefix + '.json', 'w') as summary_file:
+        json.dump(summary, summary_file, indent=2, sort_keys=True)
+
+    if plot:
+        for name, figure in plot_series(sender):
+            FigureCanvasAgg(figure).print_png(prefix + '_%s.png' % name)
+    return summary
+
+
+def show_plots(sender) -> None:
+    """
+    Show the plots on the current pyplot backend, as a notebook does. With
+    a non-interactive backend this blocks until the windows are closed.
+    """
+    import matplotlib.pyplot as plt
+
+    plot_series(sender, plt.figure)
+    plt.show()
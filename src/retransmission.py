@@ -0,0 +1,75 @@
+from typing import Any, Dict, Iterator
+from src.sack import RangeSet
+
+
+class RetransmissionQueue(object):
+    """
+    In-flight segments keyed by sequence number.
+
+    Sequence numbers are dense integers, so a cumulative ACK is handled by
+    walking a front pointer forward and popping what it passes, which is
+    amortized O(1) per segment.
+
+    Segments that have been sent more than once are remembered, as ranges,
+    until they are acknowledged, so that RTT samples from their ACKs can be
+    discarded (Karn's rule). Going back after a timeout resends a run of
+    segments, which is a single range however long the run.
+    """
+
+    def __init__(self) -> None:
+        self.segments: Dict[int, Any] = {}
+        # No segment below this sequence number is in flight
+        self.front = 0
+        self.retransmitted = RangeSet()
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def __contains__(self, seq_num: int) -> bool:
+        return seq_num in self.segments
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.segments)
+
+    def __getitem__(self, seq_num: int) -> Any:
+        return self.segments[seq_num]
+
+    def __setitem__(self, seq_num: int, segment: Any) -> None:
+        self.add(seq_num, segment)
+
+    def __delitem__(self, seq_num: int) -> None:
+        self.pop(seq_num)
+
+    def get(self, seq_num: int, default: Any = None) -> Any:
+        return self.segments.get(seq_num, default)
+
+    def items(self):
+        return self.segments.items()
+
+    def add(self, seq_num: int, segment: Any) -> None:
+        self.segments[seq_num] = segment
+        self.front = min(self.front, seq_num)
+
+    def mark_retransmitted(self, seq_num: int) -> None:
+        self.retransmitted.add(seq_num, seq_num)
+
+    def retransmitted_through(self, seq_num: int) -> bool:
+        """Whether any in-flight segment with a sequence number <= seq_num was retransmitted."""
+        return self.retransmitted.count > 0 and self.retransmitted.ranges[0][0] <= seq_num
+
+    def pop(self, seq_num: int, default: Any = None) -> Any:
+        if self.retransmitted.count:
+            self.retransmitted.discard(seq_num, seq_num)
+        return self.segments.pop(seq_num, default)
+
+    def acknowledge_through(self, seq_num: int) -> int:
+        """Drop every segment with a sequence number <= seq_num. Returns the number dropped."""
+        dropped = 0
+        while self.front <= seq_num and self.segments:
+            if self.segments.pop(self.front, None) is not None:
+                dropped += 1
+            self.front += 1
+        self.front = max(self.front, seq_num + 1)
+        if self.retransmitted.count:
+            self.retransmitted.discard_through(seq_num)
+        return dropped
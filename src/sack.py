@@ -0,0 +1,205 @@
+"""
+Selective acknowledgements (RFC 2018) and the sender's scoreboard (RFC 6675).
+
+The receiver reports up to DEFAULT_SACK_BLOCKS ranges of segments it holds
+above the cumulative ACK point, as inclusive [start, end] pairs. The sender
+merges them into a Scoreboard, which tells it which segments have arrived,
+which are lost, and how many are still in the network.
+"""
+
+from bisect import bisect_right
+from typing import List, Optional
+
+# TCP fits three blocks next to the timestamp option
+DEFAULT_SACK_BLOCKS = 3
+
+
+class RangeSet(object):
+    """
+    Sorted, disjoint, inclusive [start, end] ranges of sequence numbers.
+    Adjacent ranges are merged, so there is one range per run of segments
+    and the list stays as short as the number of holes between them.
+    """
+
+    def __init__(self) -> None:
+        self.ranges: List[List[int]] = []
+        # Sequence numbers covered by all of the ranges
+        self.count = 0
+
+    def __len__(self) -> int:
+        return len(self.ranges)
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+    def highest(self) -> int:
+        return self.ranges[-1][1] if self.ranges else -1
+
+    def find(self, seq_num: int) -> Optional[List[int]]:
+        """The range that contains seq_num, if any."""
+        index = bisect_right(self.ranges, [seq_num, float('inf')]) - 1
+        if index >= 0 and self.ranges[index][1] >= seq_num:
+            return self.ranges[index]
+        return None
+
+    def __contains__(self, seq_num: int) -> bool:
+        return self.find(seq_num) is not None
+
+    def add(self, start: int, end: int) -> int:
+        """Add [start, end]. Returns how many sequence numbers were not covered before."""
+        ranges = self.ranges
+        # First range that overlaps or touches [start, end], and one past the last
+        first = bisect_right(ranges, [start, float('inf')]) - 1
+        if first < 0 or ranges[first][1] < start - 1:
+            first += 1
+        last = bisect_right(ranges, [end + 1, float('inf')])
+
+        covered = 0
+        if first < last:
+            start = min(start, ranges[first][0])
+            end = max(end, ranges[last - 1][1])
+            covered = sum(merged[1] - merged[0] + 1 for merged in ranges[first:last])
+        ranges[first:last] = [[start, end]]
+        added = end - start + 1 - covered
+        self.count += added
+        return added
+
+    def discard(self, start: int, end: int) -> int:
+        """Drop [start, end]. Returns how many sequence numbers were covered."""
+        ranges = self.ranges
+        # First range that overlaps [start, end], and one past the last
+        first = bisect_right(ranges, [start, float('inf')]) - 1
+        if first < 0 or ranges[first][1] < start:
+            first += 1
+        last = bisect_right(ranges, [end, float('inf')])
+        if first >= last:
+            return 0
+
+        dropped = sum(min(range_end, end) - max(range_start, start) + 1
+                      for range_start, range_end in ranges[first:last])
+        kept = []
+        if ranges[first][0] < start:
+            kept.append([ranges[first][0], start - 1])
+        if ranges[last - 1][1] > end:
+            kept.append([end + 1, ranges[last - 1][1]])
+        ranges[first:last] = kept
+        self.count -= dropped
+        return dropped
+
+    def discard_through(self, seq_num: int) -> int:
+        """Drop every sequence number <= seq_num. Returns how many were covered."""
+        ranges = self.ranges
+        # Ranges that start at or below seq_num, dropped in one go
+        index = bisect_right(ranges, [seq_num, float('inf')])
+        dropped = 0
+        if index and ranges[index - 1][1] > seq_num:
+            # The last of them continues above seq_num and is only cut short
+            index -= 1
+            dropped += seq_num + 1 - ranges[index][0]
+            ranges[index][0] = seq_num + 1
+        dropped += sum(end - start + 1 for start, end in ranges[:index])
+        del ranges[:index]
+        self.count -= dropped
+        return dropped
+
+    def count_above(self, seq_num: int) -> int:
+        """How many covered sequence numbers are > seq_num."""
+        count = 0
+        for start, end in reversed(self.ranges):
+            if end <= seq_num:
+                break
+            count += end - max(start, seq_num + 1) + 1
+        return count
+
+
+class Scoreboard(object):
+    """
+    What the sender knows from SACK blocks about the segments in flight.
+
+    A hole is taken to be lost once a segment dup_thresh or more above it
+    has been SACKed (the forward-acknowledgement rule, which reads the
+    same as three duplicate ACKs when segments arrive in order). pipe()
+    is then RFC 6675's estimate of the segments still in the network:
+    everything outstanding, less what has arrived and what is lost, plus
+    the retransmissions of lost segments.
+    """
+
+    def __init__(self, dup_thresh: int) -> None:
+        self.dup_thresh = dup_thresh
+        self.sacked = RangeSet()
+        # Segments retransmitted in the current recovery that have not
+        # been SACKed or acknowledged since
+        self.retransmitted = RangeSet()
+        # No lost segment below this is left to retransmit
+        self.cursor = 0
+
+    def update(self, blocks: List, floor: int) -> int:
+        """
+        Merge SACK blocks, ignoring anything below floor, the next
+        sequence number to be cumulatively acknowledged. Returns the
+        number of segments newly known to have arrived.
+        """
+        newly_sacked = 0
+        for start, end in blocks:
+            start = max(start, floor)
+            if start <= end:
+                newly_sacked += self.sacked.add(start, end)
+                if self.retransmitted.count:
+                    self.retransmitted.discard(start, end)
+        return newly_sacked
+
+    def acknowledge_through(self, seq_num: int) -> int:
+        """Forget everything <= seq_num. Returns how many of those segments had been SACKed."""
+        self.retransmitted.discard_through(seq_num)
+        self.cursor = max(self.cursor, seq_num + 1)
+        return self.sacked.discard_through(seq_num)
+
+    def is_sacked(self, seq_num: int) -> bool:
+        return seq_num in self.sacked
+
+    def skip_sacked(self, seq_num: int) -> int:
+        """seq_num, or the first sequence number after the SACKed run it is in."""
+        if seq_num > self.sacked.highest():
+            return seq_num
+        sacked_range = self.sacked.find(seq_num)
+        return seq_num if sacked_range is None else sacked_range[1] + 1
+
+    def lost_through(self) -> int:
+        """Highest sequence number that counts as lost if it has not been SACKed."""
+        return self.sacked.highest() - self.dup_thresh
+
+    def lost(self, next_ack: int) -> int:
+        """Number of holes at or above next_ack that count as lost."""
+        lost_through = self.lost_through()
+        if lost_through < next_ack:
+            return 0
+        sacked = self.sacked.count - self.sacked.count_above(lost_through)
+        return lost_through - next_ack + 1 - sacked
+
+    def pipe(self, next_ack: int, seq_num: int) -> int:
+        """Segments in the network, with next_ack..seq_num - 1 outstanding."""
+        outstanding = seq_num - next_ack
+        return outstanding - self.sacked.count - self.lost(next_ack) + self.retransmitted.count
+
+    def next_lost(self, next_ack: int) -> Optional[int]:
+        """Lowest lost segment not yet retransmitted in this recovery, if any."""
+        seq_num = max(self.cursor, next_ack)
+        lost_through = self.lost_through()
+        while seq_num <= lost_through:
+            seq_num = self.skip_sacked(seq_num)
+            if seq_num > lost_through:
+                break
+            if seq_num not in self.retransmitted:
+                self.cursor = seq_num
+                return seq_num
+            seq_num += 1
+        self.cursor = seq_num
+        return None
+
+    def on_retransmit(self, seq_num: int) -> None:
+        self.retransmitted.add(seq_num, seq_num)
+
+    def reset_recovery(self) -> None:
+        """Start over on what has been retransmitted, at a new recovery or a timeout."""
+        self.retransmitted = RangeSet()
+        self.cursor = 0
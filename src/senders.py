@@ -1,10 +1,16 @@
+import math
 import sys
-import json
 import socket
 import select
+import struct
 import time
-from typing import List, Dict, Optional
+from typing import List, Optional
 from src.strategies import SenderStrategy
+from src.protocol import DEFAULT_PROTOCOL, get_protocol
+from src.iostats import IOStats
+from src.eventlog import EventLog
+from src.pacing import Pacer
+from src.timers import wakeup_time
 
 READ_FLAGS = select.POLLIN | select.POLLPRI
 WRITE_FLAGS = select.POLLOUT
@@ -12,9 +18,19 @@ ERR_FLAGS = select.POLLERR | select.POLLHUP | select.POLLNVAL
 READ_ERR_FLAGS = READ_FLAGS | ERR_FLAGS
 ALL_FLAGS = READ_FLAGS | WRITE_FLAGS | ERR_FLAGS
 
+# Linux UDP generic segmentation offload, from linux/udp.h
+UDP_SEGMENT = getattr(socket, 'UDP_SEGMENT', 103)
+# The kernel refuses to split a send into more segments than this
+UDP_MAX_SEGMENTS = 64
+# How long a paced sender whose window is closed sleeps before asking its
+# strategy again, if the strategy has no retransmission timer running
+IDLE_INTERVAL = 0.01  # seconds
+
 
 class Sender(object):
-    def __init__(self, port: int, strategy: SenderStrategy) -> None:
+    def __init__(self, port: int, strategy: SenderStrategy, protocol: str = DEFAULT_PROTOCOL,
+                 batch_size: int = 1, gso: bool = False, pacing: bool = False,
+                 pacing_rate: Optional[float] = None, event_log: Optional[EventLog] = None) -> None:
         self.port = port
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -24,17 +40,119 @@ class Sender(object):
         self.poller.modify(self.sock, ALL_FLAGS)
         self.peer_addr = None
 
+        self.protocol = get_protocol(protocol)
         self.strategy = strategy
+        self.strategy.protocol = self.protocol
+        # The strategy records sends, ACKs and losses, tagged with our port
+        if event_log is not None:
+            self.strategy.event_log = event_log
+            self.strategy.event_flow = port
+
+        # With batch_size > 1, each wakeup drains every pending ACK and sends
+        # up to batch_size segments. GSO hands a whole burst of equally-sized
+        # segments to the kernel in one sendmsg.
+        self.batch_size = batch_size
+        self.gso = gso and sys.platform.startswith('linux') and self.protocol.fixed_size is not None
+        self.io_stats = IOStats()
+
+        # A paced sender spreads segments out at the strategy's pacing rate,
+        # or at pacing_rate bytes per second if that is given, and sleeps
+        # between departures instead of polling for POLLOUT. Strategies
+        # that require pacing are always paced.
+        self.pacer: Optional[Pacer] = None
+        if pacing or pacing_rate is not None or strategy.requires_pacing:
+            self.pacer = Pacer(strategy, pacing_rate)
 
     def send(self) -> None:
-        next_segment =  self.strategy.next_packet_to_send()
-        if next_segment is not None:
-            self.sock.sendto(next_segment.encode(), self.peer_addr) # type: ignore
+        self.try_send()
         time.sleep(0)
 
+    def try_send(self) -> bool:
+        """Send the next segment if the strategy releases one. Returns whether it did."""
+        next_segment =  self.strategy.next_packet_to_send()
+        if next_segment is None:
+            return False
+        self.sock.sendto(next_segment, self.peer_addr) # type: ignore
+        self.io_stats.syscalls += 1
+        self.io_stats.packets_sent += 1
+        if self.pacer is not None:
+            self.pacer.on_send(time.time(), len(next_segment))
+        return True
+
     def recv(self):
         serialized_ack, addr = self.sock.recvfrom(1600)
-        self.strategy.process_ack(serialized_ack.decode())
+        self.io_stats.syscalls += 1
+        self.io_stats.packets_received += 1
+        self.strategy.process_ack(serialized_ack)
+
+    def send_batch(self) -> None:
+        """Send everything the strategy will release, up to batch_size segments."""
+        burst: List[bytes] = []
+        while len(burst) < self.batch_size:
+            next_segment = self.strategy.next_packet_to_send()
+            if next_segment is None:
+                break
+            burst.append(next_segment)
+        self.transmit(burst)
+        time.sleep(0)
+
+    def transmit(self, burst: List[bytes]) -> None:
+        if self.gso:
+            for i in range(0, len(burst), UDP_MAX_SEGMENTS):
+                self.send_gso(burst[i:i + UDP_MAX_SEGMENTS])
+        else:
+            for segment in burst:
+                self.sock.sendto(segment, self.peer_addr) # type: ignore
+            self.io_stats.syscalls += len(burst)
+        self.io_stats.packets_sent += len(burst)
+
+    def send_paced(self) -> float:
+        """
+        Send every segment whose departure time has come. Returns how long
+        to wait before calling again.
+        """
+        burst: List[bytes] = []
+        now = time.time()
+        while True:
+            wait = self.pacer.time_until_departure(now) # type: ignore
+            if wait > 0:
+                break
+            next_segment = self.strategy.next_packet_to_send()
+            if next_segment is None:
+                wait = wakeup_time(self.strategy.next_timeout(), now, IDLE_INTERVAL) - now
+                break
+            burst.append(next_segment)
+            self.pacer.on_send(now, len(next_segment)) # type: ignore
+        self.transmit(burst)
+        return wait
+
+    def send_gso(self, burst: List[bytes]) -> None:
+        if len(burst) == 1:
+            self.sock.sendto(burst[0], self.peer_addr) # type: ignore
+            self.io_stats.syscalls += 1
+            return
+        ancillary = [(socket.SOL_UDP, UDP_SEGMENT, struct.pack('=H', self.protocol.fixed_size))]
+        try:
+            self.sock.sendmsg([b''.join(burst)], ancillary, 0, self.peer_addr)
+            self.io_stats.syscalls += 1
+        except OSError:
+            # Kernel or route without UDP GSO support, fall back for good
+            self.gso = False
+            for segment in burst:
+                self.sock.sendto(segment, self.peer_addr) # type: ignore
+            self.io_stats.syscalls += len(burst) + 1
+
+    def recv_batch(self) -> None:
+        """Process every ACK waiting on the socket."""
+        while True:
+            try:
+                serialized_ack, addr = self.sock.recvfrom(1600)
+            except BlockingIOError:
+                self.io_stats.syscalls += 1
+                return
+            self.io_stats.syscalls += 1
+            self.io_stats.packets_received += 1
+            self.strategy.process_ack(serialized_ack)
 
 
     def handshake(self):
@@ -42,24 +160,32 @@ class Sender(object):
 
         while True:
             msg, addr = self.sock.recvfrom(1600)
-            parsed_handshake = json.loads(msg.decode())
+            parsed_handshake = self.protocol.decode(msg)
             if parsed_handshake.get('handshake') and self.peer_addr is None:
                 self.peer_addr = addr
-                self.sock.sendto(json.dumps({'handshake': True}).encode(), self.peer_addr)
+                self.sock.sendto(self.protocol.encode({'handshake': True}), self.peer_addr)
                 print('[sender] Connected to receiver: %s:%s\n' % addr)
                 break
         self.sock.setblocking(0)
 
-    def run(self, seconds_to_run: int):
-        curr_flags = ALL_FLAGS
+    def run(self, seconds_to_run: float):
+        if self.pacer is not None:
+            self.run_paced(seconds_to_run)
+            return
+
         TIMEOUT = 1000  # ms
         start_time = time.time()
+        if self.batch_size > 1:
+            send, recv = self.send_batch, self.recv_batch
+        else:
+            send, recv = self.send, self.recv
 
         while time.time() - start_time < seconds_to_run:
 
             events = self.poller.poll(TIMEOUT)
+            self.io_stats.syscalls += 1
             if not events:
-                self.send()
+                send()
             for fd, flag in events:
                 assert self.sock.fileno() == fd
 
@@ -67,7 +193,29 @@ class Sender(object):
                     sys.exit('Error occurred to the channel')
 
                 if flag & READ_FLAGS:
-                    self.recv()
+                    recv()
 
                 if flag & WRITE_FLAGS:
-                    self.send()
+                    send()
+
+    def run_paced(self, seconds_to_run: float) -> None:
+        # Only ACKs wake the loop up. Otherwise it sleeps in poll until the
+        # next departure is due.
+        self.poller.modify(self.sock, READ_ERR_FLAGS)
+        recv = self.recv_batch if self.batch_size > 1 else self.recv
+        start_time = time.time()
+        wait = 0.0
+
+        while time.time() - start_time < seconds_to_run:
+            events = self.poller.poll(math.ceil(wait * 1000))
+            self.io_stats.syscalls += 1
+            for fd, flag in events:
+                assert self.sock.fileno() == fd
+
+                if flag & ERR_FLAGS:
+                    sys.exit('Error occurred to the channel')
+
+                if flag & READ_FLAGS:
+                    recv()
+            wait = self.send_paced()
+        self.poller.modify(self.sock, ALL_FLAGS)
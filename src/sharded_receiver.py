@@ -0,0 +1,139 @@
+"""
+A receiver split across processes, for runs with more senders than one
+Receiver loop keeps up with.
+
+A ShardedReceiver forks num_shards workers. Each runs its own Receiver,
+on its own socket, for every num_shards-th peer, and does the handshakes
+with those peers itself. Senders take the receiver's address from the
+handshake, so each sender ends up talking to the worker that owns it.
+Sharing one port with SO_REUSEPORT is not used: the kernel would hash
+flows across the workers regardless of which worker owns which peer.
+
+When stopped, the workers send back their IOStats and per-peer counts,
+which are merged into one set of statistics for the whole receiver.
+Event logs and telemetry are per worker, at the given path with the
+worker's index appended.
+"""
+
+import multiprocessing
+import signal
+import sys
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Dict, List, Optional, Tuple
+from src.receiver import Receiver
+from src.iostats import IOStats
+from src.eventlog import EventLog
+from src.telemetry import TelemetryPublisher, DEFAULT_INTERVAL
+
+
+def shard_path(path: Optional[str], index: int) -> Optional[str]:
+    """Where worker index writes what would otherwise go to path."""
+    return None if path is None else '%s.%d' % (path, index)
+
+
+def receiver_stats(receiver: Receiver) -> Dict:
+    """A receiver's IOStats, and (segments received, ACKs sent, segments dropped) by peer port."""
+    return {
+        'io_stats': receiver.io_stats,
+        'peers': dict((peer.port, (peer.segments_received, peer.acks_sent, peer.dropped_segments))
+                      for peer in receiver.peers.values()),
+    }
+
+
+def merge_stats(stats: List[Dict]) -> Dict:
+    io_stats = IOStats()
+    peers: Dict[int, Tuple[int, int, int]] = {}
+    for shard in stats:
+        io_stats.syscalls += shard['io_stats'].syscalls
+        io_stats.packets_sent += shard['io_stats'].packets_sent
+        io_stats.packets_received += shard['io_stats'].packets_received
+        peers.update(shard['peers'])
+    return {'io_stats': io_stats, 'peers': peers}
+
+
+def write_stats(stats: Dict, num_shards: int) -> None:
+    """Report merged stats as Receiver.cleanup reports its own."""
+    sys.stderr.write('[receiver] %d shards, %s\n' % (num_shards, stats['io_stats']))
+    for port, (segments_received, acks_sent, _) in sorted(stats['peers'].items()):
+        acks_per_segment = float(acks_sent) / segments_received if segments_received else 0.0
+        sys.stderr.write('[receiver] peer %d: ACKs per segment: %f\n' % (port, acks_per_segment))
+
+
+def interrupt(signum, frame) -> None:
+    """SIGTERM handler that stops a receiver as Ctrl-C does."""
+    raise KeyboardInterrupt
+
+
+def _run_shard(peers: List[Tuple[str, int]], receiver_options: Dict, event_log_path: Optional[str],
+               telemetry_path: Optional[str], telemetry_interval: float, conn) -> None:
+    signal.signal(signal.SIGTERM, interrupt)
+    event_log = EventLog(event_log_path) if event_log_path else None
+    receiver = Receiver(peers, event_log=event_log, **receiver_options)
+    telemetry = None
+    if telemetry_path:
+        telemetry = TelemetryPublisher(telemetry_path, telemetry_interval)
+        telemetry.add_receiver(receiver)
+        telemetry.start()
+
+    try:
+        receiver.perform_handshakes()
+        receiver.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.sock.close()
+        if telemetry is not None:
+            telemetry.stop()
+        if event_log is not None:
+            event_log.close()
+        conn.send(receiver_stats(receiver))
+        conn.close()
+
+
+class ShardedReceiver(object):
+    def __init__(self, peers: List[Tuple[str, int]], num_shards: int, event_log: Optional[str] = None,
+                 telemetry: Optional[str] = None, telemetry_interval: float = DEFAULT_INTERVAL,
+                 **receiver_options) -> None:
+        """receiver_options are passed on to each worker's Receiver."""
+        self.shards = [peers[index::num_shards] for index in range(num_shards)]
+        self.event_log = event_log
+        self.telemetry = telemetry
+        self.telemetry_interval = telemetry_interval
+        self.receiver_options = receiver_options
+        self.workers: List[Tuple[BaseProcess, Connection]] = []
+
+    def start(self) -> 'ShardedReceiver':
+        context = multiprocessing.get_context('fork')
+        for index, shard in enumerate(self.shards):
+            if not shard:
+                continue
+            parent_conn, child_conn = context.Pipe(duplex=False)
+            process = context.Process(target=_run_shard, args=(
+                shard, self.receiver_options, shard_path(self.event_log, index),
+                shard_path(self.telemetry, index), self.telemetry_interval, child_conn))
+            process.start()
+            child_conn.close()
+            self.workers.append((process, parent_conn))
+        return self
+
+    def wait(self) -> None:
+        """Block until every worker has stopped, which they only do when signalled."""
+        for process, _ in self.workers:
+            process.join()
+
+    def stop(self) -> Dict:
+        """Stop the workers and return their merged stats."""
+        for process, _ in self.workers:
+            if process.is_alive():
+                process.terminate()
+        stats = []
+        for process, conn in self.workers:
+            try:
+                stats.append(conn.recv())
+            except EOFError:
+                # The worker died before it could report
+                pass
+            process.join()
+        self.workers = []
+        return merge_stats(stats)
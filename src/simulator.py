@@ -0,0 +1,263 @@
+"""
+Discrete-event simulator that stands in for a mahimahi run.
+
+It replays the trace named in a mahimahi settings dict, with the same
+one-way delay, downlink loss and downlink droptail queue that
+generate_mahimahi_command configures, and drives unmodified
+SenderStrategy objects and receiver Peers on a virtual clock. Nothing
+touches the network, so runs take as long as the CPU needs rather than
+seconds_to_run.
+"""
+
+import heapq
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from src.strategies import SenderStrategy
+from src.receiver import Peer, RECEIVE_WINDOW, DELAYED_ACK_TIMEOUT
+from src.protocol import DEFAULT_PROTOCOL, get_protocol
+from src.iostats import IOStats
+from src.eventlog import EventLog, RECEIVE, ACK_SENT
+from src.sack import DEFAULT_SACK_BLOCKS
+from src.pacing import Pacer
+from src.timers import wakeup_time
+from src.link import Link, LossModel, TraceSchedule, IP_UDP_OVERHEAD, TRACE_DIR
+from src.traces import load_trace, trace_path
+
+# How long, in virtual seconds, a flow whose window is closed and whose
+# strategy has no retransmission timer running waits before it is asked again
+IDLE_INTERVAL = 0.01
+# Most segments a flow may send at one instant before yielding to other events
+MAX_BURST = 10000
+
+
+class DelayLine(object):
+    """
+    Fixed propagation delay. Every packet is delayed by the same amount,
+    so they leave in arrival order and only the head needs a pending event.
+    """
+
+    def __init__(self, simulation: 'Simulation', delay: float, on_exit: Callable) -> None:
+        self.simulation = simulation
+        self.delay = delay
+        self.on_exit = on_exit
+        self.packets: Deque[Tuple[float, Any]] = deque()
+
+    def push(self, packet: Any) -> None:
+        due = self.simulation.time + self.delay
+        self.packets.append((due, packet))
+        if len(self.packets) == 1:
+            self.simulation.schedule(due, self.release)
+
+    def release(self, _: Any = None) -> None:
+        now = self.simulation.time
+        packets = self.packets
+        while packets and packets[0][0] <= now:
+            self.on_exit(packets.popleft()[1])
+        if packets:
+            self.simulation.schedule(packets[0][0], self.release)
+
+
+class SimulatedFlow(object):
+    """
+    A simulated sender. It carries the same port, strategy and io_stats
+    attributes as Sender, so print_performance works on it unchanged.
+    """
+
+    def __init__(self, port: int, strategy: SenderStrategy, pacer: Optional[Pacer] = None,
+                 sack_blocks: int = DEFAULT_SACK_BLOCKS, ack_every: int = 1,
+                 ack_delay: float = DELAYED_ACK_TIMEOUT) -> None:
+        self.port = port
+        self.strategy = strategy
+        self.pacer = pacer
+        self.peer = Peer(port, RECEIVE_WINDOW, sack_blocks, ack_every, ack_delay)
+        self.io_stats = IOStats()
+        # Time of the next on_wakeup that is still current
+        self.wakeup_at: Optional[float] = None
+        self.departure_pending = False
+
+
+class Simulation(object):
+    def __init__(self, mahimahi_settings: Dict, strategies: List[SenderStrategy],
+                 protocol: str = DEFAULT_PROTOCOL, seed: Optional[int] = None,
+                 idle_interval: float = IDLE_INTERVAL, trace_dir: str = TRACE_DIR,
+                 pacing: bool = False, pacing_rate: Optional[float] = None,
+                 sack_blocks: int = DEFAULT_SACK_BLOCKS, ack_every: int = 1,
+                 ack_delay: float = DELAYED_ACK_TIMEOUT, event_log: Optional[EventLog] = None) -> None:
+        """
+        pacing and pacing_rate pace every flow, as they do for a Sender.
+        sack_blocks, ack_every and ack_delay are passed on to the receiving
+        Peer, as they are by Receiver. event_log records the events of
+        both ends of every flow, in virtual time, tagged with its port.
+        """
+        self.protocol = get_protocol(protocol)
+        self.delay = mahimahi_settings['delay'] / 1000.0
+        self.idle_interval = idle_interval
+        self.event_log = event_log
+
+        schedule = TraceSchedule(load_trace(trace_path(mahimahi_settings['trace_file'], trace_dir)))
+        # Data travels on the downlink, which is where mahimahi puts the
+        # droptail queue and the loss. ACKs go back on an unbounded uplink.
+        self.downlink = Link(schedule, mahimahi_settings['queue_size'])
+        self.uplink = Link(schedule)
+        self.loss = LossModel(mahimahi_settings.get('loss') or 0.0, seed)
+        self.downlink_delay = DelayLine(self, self.delay, self.on_downlink_arrival)
+        self.uplink_delay = DelayLine(self, self.delay, self.on_ack)
+
+        self.time = 0.0
+        self.events: List[Tuple[float, int, Callable, Any]] = []
+        self.event_count = 0
+
+        self.flows = []
+        for port, strategy in enumerate(strategies):
+            strategy.clock = self.now
+            strategy.protocol = self.protocol
+            strategy.start_time = self.now()
+            strategy.event_log = event_log
+            strategy.event_flow = port
+            # Virtual time never oversleeps, so there is nothing to catch up on
+            paced = pacing or pacing_rate is not None or strategy.requires_pacing
+            pacer = Pacer(strategy, pacing_rate, slack=0.0) if paced else None
+            flow = SimulatedFlow(port, strategy, pacer, sack_blocks, ack_every, ack_delay)
+            flow.peer.clock = self.now
+            self.flows.append(flow)
+
+    def now(self) -> float:
+        return self.time
+
+    def schedule(self, when: float, callback: Callable, arg: Any = None) -> None:
+        self.event_count += 1
+        heapq.heappush(self.events, (when, self.event_count, callback, arg))
+
+    def run(self, seconds_to_run: float) -> 'Simulation':
+        for flow in self.flows:
+            self.schedule_wakeup(flow, self.time)
+
+        end_time = self.time + seconds_to_run
+        events = self.events
+        while events and events[0][0] <= end_time:
+            when, _, callback, arg = heapq.heappop(events)
+            self.time = when
+            callback(arg)
+        self.time = end_time
+        return self
+
+    # Sender side
+
+    def schedule_wakeup(self, flow: SimulatedFlow, when: float) -> None:
+        # A pending wakeup that is due sooner covers this one. One that is
+        # due later is superseded and ignored when it fires.
+        if flow.wakeup_at is not None and flow.wakeup_at <= when:
+            return
+        flow.wakeup_at = when
+        self.schedule(when, self.on_wakeup, flow)
+
+    def on_wakeup(self, flow: SimulatedFlow) -> None:
+        if flow.wakeup_at != self.time:
+            return
+        flow.wakeup_at = None
+        self.send_segments(flow)
+
+    def on_departure(self, flow: SimulatedFlow) -> None:
+        flow.departure_pending = False
+        self.send_segments(flow)
+
+    def send_segments(self, flow: SimulatedFlow) -> None:
+        pacer = flow.pacer
+        for _ in range(MAX_BURST):
+            if pacer is not None:
+                wait = pacer.time_until_departure(self.time)
+                if wait > 0:
+                    if not flow.departure_pending:
+                        flow.departure_pending = True
+                        self.schedule(self.time + wait, self.on_departure, flow)
+                    return
+            segment = flow.strategy.next_packet_to_send()
+            if segment is None:
+                break
+            flow.io_stats.packets_sent += 1
+            self.downlink_delay.push((flow, segment))
+            if pacer is not None:
+                pacer.on_send(self.time, len(segment))
+        else:
+            self.schedule_wakeup(flow, self.time)
+            return
+
+        self.schedule_wakeup(flow, wakeup_time(flow.strategy.next_timeout(), self.time, self.idle_interval))
+
+    def on_ack(self, packet: Tuple[SimulatedFlow, bytes]) -> None:
+        flow, ack = packet
+        flow.io_stats.packets_received += 1
+        flow.strategy.process_ack(ack)
+        self.send_segments(flow)
+
+    # Links
+
+    def on_downlink_arrival(self, packet: Tuple[SimulatedFlow, bytes]) -> None:
+        if self.loss.drop():
+            return
+        self.enqueue(self.downlink, packet, self.on_downlink_opportunity)
+
+    def on_uplink_arrival(self, packet: Tuple[SimulatedFlow, bytes]) -> None:
+        self.enqueue(self.uplink, packet, self.on_uplink_opportunity)
+
+    def enqueue(self, link: Link, packet: Tuple[SimulatedFlow, bytes], on_opportunity: Callable) -> None:
+        was_busy = link.is_busy()
+        if link.enqueue(packet, len(packet[1]) + IP_UDP_OVERHEAD, self.time * 1000) and not was_busy:
+            self.schedule(link.next_opportunity_ms() / 1000.0, on_opportunity, link)
+
+    def on_downlink_opportunity(self, link: Link) -> None:
+        for packet in link.serve_opportunity():
+            self.on_segment(packet)
+        if link.is_busy():
+            self.schedule(link.next_opportunity_ms() / 1000.0, self.on_downlink_opportunity, link)
+
+    def on_uplink_opportunity(self, link: Link) -> None:
+        for packet in link.serve_opportunity():
+            self.uplink_delay.push(packet)
+        if link.is_busy():
+            self.schedule(link.next_opportunity_ms() / 1000.0, self.on_uplink_opportunity, link)
+
+    # Receiver side
+
+    def on_segment(self, packet: Tuple[SimulatedFlow, bytes]) -> None:
+        flow, serialized_data = packet
+        data = self.protocol.decode(serialized_data)
+        if self.event_log is not None:
+            self.event_log.append(self.time, flow.port, RECEIVE, data['seq_num'], len(serialized_data))
+        deadline = flow.peer.delayed_ack_deadline
+        next_ack = flow.peer.receive_segment(data, len(serialized_data))
+        if next_ack is not None:
+            self.send_ack(flow, next_ack)
+        elif flow.peer.delayed_ack_deadline is not None and flow.peer.delayed_ack_deadline != deadline:
+            self.schedule(flow.peer.delayed_ack_deadline, self.on_delayed_ack_timer, flow)
+
+    def on_delayed_ack_timer(self, flow: SimulatedFlow) -> None:
+        # Does nothing if the ACK went out with a later segment
+        ack = flow.peer.flush_delayed_ack()
+        if ack is not None:
+            self.send_ack(flow, ack)
+
+    def send_ack(self, flow: SimulatedFlow, ack: Dict) -> None:
+        if self.event_log is not None:
+            self.event_log.append(self.time, flow.port, ACK_SENT, ack['seq_num'])
+        self.on_uplink_arrival((flow, self.protocol.encode(ack)))
+
+    def stats(self) -> Dict:
+        return {
+            'downlink': self.downlink.stats(),
+            'uplink': self.uplink.stats(),
+            'random_losses': self.loss.drops,
+            'events': self.event_count,
+        }
+
+
+def simulate_with_mahi_settings(mahimahi_settings: Dict, seconds_to_run: int, strategies: List[SenderStrategy],
+                                protocol: str = DEFAULT_PROTOCOL, seed: Optional[int] = None,
+                                pacing: bool = False, pacing_rate: Optional[float] = None,
+                                sack_blocks: int = DEFAULT_SACK_BLOCKS, ack_every: int = 1,
+                                ack_delay: float = DELAYED_ACK_TIMEOUT,
+                                event_log: Optional[EventLog] = None) -> Simulation:
+    """Simulated counterpart of run_with_mahi_settings. Returns the finished Simulation."""
+    return Simulation(mahimahi_settings, strategies, protocol=protocol, seed=seed,
+                      pacing=pacing, pacing_rate=pacing_rate, sack_blocks=sack_blocks,
+                      ack_every=ack_every, ack_delay=ack_delay, event_log=event_log).run(seconds_to_run)
@@ -1,95 +1,210 @@
-import json
+import math
 import time
-from typing import List, Dict, Tuple, Optional
+from typing import Dict, Optional
+from src.protocol import Protocol, JsonProtocol
+from src.retransmission import RetransmissionQueue
+from src.metrics import MetricSeries, TimestampedSeries, new_series
+from src.timers import RttEstimator, RetransmissionTimer
+from src.delivery_rate import DeliveryRateEstimator, WindowedMaxFilter
+from src.sack import Scoreboard
+from src.eventlog import EventLog, SEND, RETRANSMIT, ACK, DUPLICATE_ACK, TIMEOUT, FAST_RETRANSMIT
+
+# Pacing rate as a multiple of cwnd / SRTT. Pacing a little faster than
+# the window keeps the window, not the pacer, the limit on throughput;
+# slow start paces at twice the window so the window can keep doubling.
+PACING_GAIN = 1.25
+SLOW_START_PACING_GAIN = 2.0
+# Duplicate ACKs that signal a lost segment
+DUPLICATE_ACK_THRESHOLD = 3
+# CUBIC constants (RFC 9438)
+CUBIC_C = 0.4
+CUBIC_BETA = 0.7
+# Growth of the Reno-equivalent window, so CUBIC is as fast as Reno would be
+CUBIC_ALPHA = 3 * (1 - CUBIC_BETA) / (1 + CUBIC_BETA)
+# HyStart++ (RFC 9406): leave slow start once the minimum RTT of a round
+# is this much above that of the previous round
+HYSTART_MIN_RTT_SAMPLES = 8
+HYSTART_MIN_RTT_THRESH = 0.004  # seconds
+HYSTART_MAX_RTT_THRESH = 0.016  # seconds
+# BBR (draft-cardwell-iccrg-bbr-congestion-control-00). Startup doubles
+# the sending rate every round trip, drain empties the queue that built.
+BBR_HIGH_GAIN = 2 / math.log(2)
+BBR_DRAIN_GAIN = 1 / BBR_HIGH_GAIN
+BBR_CWND_GAIN = 2.0
+# Probe for more bandwidth for one min RTT, drain what that queued for
+# the next, then cruise for six
+BBR_PACING_GAIN_CYCLE = [1.25, 0.75, 1, 1, 1, 1, 1, 1]
+BBR_BTL_BW_FILTER_ROUNDS = 10
+BBR_MIN_RTT_WINDOW = 10.0  # seconds
+BBR_PROBE_RTT_DURATION = 0.2  # seconds
+BBR_MIN_CWND = 4
+# The pipe is full once the bandwidth grew less than this for that many rounds
+BBR_FULL_BW_THRESH = 1.25
+BBR_FULL_BW_ROUNDS = 3
+# Share of the inflight ceiling set by the last loss to use outside of
+# bandwidth probes (BBRv2's headroom), so queues of other flows can drain
+BBR_INFLIGHT_HEADROOM = 0.85
+BBR_LOSS_BETA = 1.0
+BBR_INFLIGHT_HI_GROWTH = 1.25
+BBR_STARTUP = 'startup'
+BBR_DRAIN = 'drain'
+BBR_PROBE_BW = 'probe_bw'
+BBR_PROBE_RTT = 'probe_rtt'
+# TCP Vegas: segments to keep queued at the bottleneck. Below alpha the
+# window grows, above beta it shrinks; slow start ends above gamma.
+VEGAS_ALPHA = 2
+VEGAS_BETA = 4
+VEGAS_GAMMA = 1
 
 
 class SenderStrategy(object):
-    def __init__(self) -> None:
+    def __init__(self, metrics_capacity: Optional[int] = None) -> None:
+        """
+        Per-ACK metrics are kept in typed arrays. With metrics_capacity set,
+        only that many recent samples of each are kept, so memory stays flat
+        on long runs, while aggregates still cover the whole run.
+        """
         self.seq_num = 0
         self.next_ack = 0
         self.sent_bytes = 0
-        self.start_time = time.time()
+        # Source of the current time. The simulator swaps in a virtual clock.
+        self.clock = time.time
+        self.start_time = self.clock()
         self.total_acks = 0
         self.num_duplicate_acks = 0
         self.curr_duplicate_acks = 0
-        self.rtts: List[float] = []
-        self.cwnds: List[int] = []
-        self.unacknowledged_packets: Dict = {}
-        self.times_of_acknowledgements: List[Tuple[float, int]] = []
+        self.rtts: MetricSeries = new_series(metrics_capacity)
+        self.rtt_estimator = RttEstimator()
+        self.retransmission_timer = RetransmissionTimer(self.rtt_estimator)
+        self.cwnds: MetricSeries = new_series(metrics_capacity)
+        self.unacknowledged_packets = RetransmissionQueue()
+        self.times_of_acknowledgements = TimestampedSeries(metrics_capacity)
         self.ack_count = 0
-        self.slow_start_thresholds: List = []
+        # Segments the ack_count ACKs acknowledged between them, more than
+        # ack_count when the receiver delays its ACKs
+        self.acked_segments = 0
+        self.slow_start_thresholds: MetricSeries = new_series(metrics_capacity)
         self.time_of_retransmit: Optional[float] = None
+        # Wire format for segments and ACKs. The Sender replaces this
+        # with the protocol it was configured with.
+        self.protocol: Protocol = JsonProtocol()
+        # Log that sends, ACKs and losses are recorded in, if any, and
+        # the flow its records are tagged with
+        self.event_log: Optional[EventLog] = None
+        self.event_flow = 0
+
+    # Strategies that set their own pacing rate and do not work without
+    # it set this, and runners that can pace then always do
+    requires_pacing = False
+
+    @property
+    def srtt(self) -> Optional[float]:
+        return self.rtt_estimator.srtt
+
+    def record_rtt(self, rtt: float) -> None:
+        self.rtts.append(rtt)
+        self.rtt_estimator.on_sample(rtt)
+
+    def next_timeout(self) -> Optional[float]:
+        """
+        Time at which the strategy will want to retransmit if nothing else
+        happens first, so runners can sleep until then. None if no timer
+        is running.
+        """
+        return self.retransmission_timer.deadline
+
+    def pacing_gain(self) -> float:
+        return PACING_GAIN
+
+    def log_event(self, kind: int, seq_num: int) -> None:
+        if self.event_log is not None:
+            self.event_log.append(self.clock(), self.event_flow, kind, seq_num, getattr(self, 'cwnd', 0))
+
+    def segments_per_ack(self) -> float:
+        if self.ack_count == 0:
+            return 0.0
+        return float(self.acked_segments) / self.ack_count
+
+    def pacing_rate(self) -> Optional[float]:
+        """Segments per second a paced Sender should send at, None before the first RTT sample."""
+        cwnd = getattr(self, 'cwnd', None)
+        if cwnd is None or not self.srtt:
+            return None
+        return self.pacing_gain() * cwnd / self.srtt
 
     def next_packet_to_send(self):
         raise NotImplementedError
 
-    def process_ack(self, ack: str):
+    def process_ack(self, serialized_ack: bytes):
         raise NotImplementedError
 
 
 class FixedWindowStrategy(SenderStrategy):
-    def __init__(self, cwnd: int) -> None:
+    def __init__(self, cwnd: int, metrics_capacity: Optional[int] = None) -> None:
         self.cwnd = cwnd
 
-        super().__init__()
+        super().__init__(metrics_capacity)
 
     def window_is_open(self) -> bool:
         # Returns true if the congestion window is not full
         return self.seq_num - self.next_ack < self.cwnd
 
-    def next_packet_to_send(self) -> Optional[str]:
+    def next_packet_to_send(self) -> Optional[bytes]:
         if not self.window_is_open():
             return None
 
-        serialized_data = json.dumps({
+        serialized_data = self.protocol.encode({
             'seq_num': self.seq_num,
-            'send_ts': time.time(),
+            'send_ts': self.clock(),
             'sent_bytes': self.sent_bytes
         })
         self.unacknowledged_packets[self.seq_num] = True
+        self.log_event(SEND, self.seq_num)
         self.seq_num += 1
         return serialized_data
 
-    def process_ack(self, serialized_ack: str) -> None:
-        ack = json.loads(serialized_ack)
+    def process_ack(self, serialized_ack: bytes) -> None:
+        ack = self.protocol.decode(serialized_ack)
         if ack.get('handshake'):
             return
 
         self.total_acks += 1
-        self.times_of_acknowledgements.append(((time.time() - self.start_time), ack['seq_num']))
+        self.times_of_acknowledgements.append(((self.clock() - self.start_time), ack['seq_num']))
         if self.unacknowledged_packets.get(ack['seq_num']) is None:
             # Duplicate ack
             self.num_duplicate_acks += 1
             self.curr_duplicate_acks += 1
+            self.log_event(DUPLICATE_ACK, ack['seq_num'])
 
             if self.curr_duplicate_acks == 3:
                 # Received 3 duplicate acks, retransmit
                 self.curr_duplicate_acks = 0
                 self.seq_num = ack['seq_num'] + 1
+                self.log_event(FAST_RETRANSMIT, self.seq_num)
         else:
-            del self.unacknowledged_packets[ack['seq_num']]
+            # A delayed ACK also covers the segments before it
+            self.acked_segments += self.unacknowledged_packets.acknowledge_through(ack['seq_num'])
             self.next_ack = max(self.next_ack, ack['seq_num'] + 1)
             self.sent_bytes += ack['ack_bytes']
-            rtt = float(time.time() - ack['send_ts'])
-            self.rtts.append(rtt)
+            self.record_rtt(float(self.clock() - ack['send_ts']))
             self.ack_count += 1
+            self.log_event(ACK, ack['seq_num'])
         self.cwnds.append(self.cwnd)
 
 
 class TahoeStrategy(SenderStrategy):
-    def __init__(self, slow_start_thresh: int, initial_cwnd: int) -> None:
+    def __init__(self, slow_start_thresh: int, initial_cwnd: int, metrics_capacity: Optional[int] = None) -> None:
         self.slow_start_thresh = slow_start_thresh
 
         self.cwnd = initial_cwnd
-        self.fast_retransmit_packet = None
+        self.fast_retransmit_packet: Optional[Dict] = None
         self.time_since_retransmit = None
         self.retransmitting_packet = False
         self.ack_count = 0
 
-        self.duplicated_ack = None
-        self.slow_start_thresholds = []
+        self.duplicated_ack: Optional[Dict] = None
 
-        super().__init__()
+        super().__init__(metrics_capacity)
 
     def window_is_open(self) -> bool:
         # next_ack is the sequence number of the next acknowledgement
@@ -98,51 +213,74 @@ class TahoeStrategy(SenderStrategy):
         # more acknowledgements to come in.
         return self.seq_num - self.next_ack < self.cwnd
 
-    def next_packet_to_send(self) -> Optional[str]:
+    def pacing_gain(self) -> float:
+        if self.cwnd < self.slow_start_thresh:
+            return SLOW_START_PACING_GAIN
+        return PACING_GAIN
+
+    def on_retransmission_timeout(self) -> None:
+        # Only the first of a run of back-to-back timeouts halves the
+        # threshold, later ones would just be halving a window of 1
+        if self.rtt_estimator.backoffs == 0:
+            self.slow_start_thresh = int(max(1, self.cwnd/2))
+        self.rtt_estimator.backoff()
+        self.retransmission_timer.stop()
+        self.cwnd = 1
+        self.fast_retransmit_packet = None
+        self.retransmitting_packet = False
+        self.duplicated_ack = None
+        self.curr_duplicate_acks = 0
+        # Go back to the first unacknowledged segment and resend from there
+        self.seq_num = self.next_ack
+        self.log_event(TIMEOUT, self.next_ack)
+
+    def next_packet_to_send(self) -> Optional[bytes]:
         send_data = None
-        if self.retransmitting_packet and self.time_of_retransmit and time.time() - self.time_of_retransmit > 1:
-            # The retransmit packet timed out--resend it
-            self.retransmitting_packet = False
+        now = self.clock()
+        if self.retransmission_timer.expired(now):
+            self.on_retransmission_timeout()
 
         if self.fast_retransmit_packet and not self.retransmitting_packet:
             # Logic for resending the packet
-            self.unacknowledged_packets[self.fast_retransmit_packet['seq_num']]['send_ts'] = time.time()
+            seq_num = self.fast_retransmit_packet['seq_num']
+            self.unacknowledged_packets[seq_num]['send_ts'] = now
+            self.unacknowledged_packets.mark_retransmitted(seq_num)
             send_data = self.fast_retransmit_packet
-            serialized_data = json.dumps(send_data)
             self.retransmitting_packet = True
+            self.log_event(RETRANSMIT, seq_num)
 
-            self.time_of_retransmit = time.time()
+            self.time_of_retransmit = now
+            self.retransmission_timer.start(now)
 
         elif self.window_is_open():
+            if self.seq_num in self.unacknowledged_packets:
+                # Sent before, we went back after a timeout
+                self.unacknowledged_packets.mark_retransmitted(self.seq_num)
+                self.log_event(RETRANSMIT, self.seq_num)
+            else:
+                self.log_event(SEND, self.seq_num)
             send_data = {
                 'seq_num': self.seq_num,
-                'send_ts': time.time()
+                'send_ts': now
             }
 
-            self.unacknowledged_packets[self.seq_num] = send_data
+            self.unacknowledged_packets.add(self.seq_num, send_data)
             self.seq_num += 1
-        else:
-            # Check to see if any segments have timed out. Note that this
-            # isn't how TCP actually works--traditional TCP uses exponential
-            # backoff for computing the timeouts
-            for seq_num, segment in self.unacknowledged_packets.items():
-                if time.time() - segment['send_ts'] > 4:
-                    self.unacknowledged_packets[seq_num]['send_ts'] = time.time()
-                    return json.dumps(segment)
+            self.retransmission_timer.start_if_stopped(now)
 
         if send_data is None:
             return None
         else:
-            return json.dumps(send_data)
+            return self.protocol.encode(send_data)
 
 
-    def process_ack(self, serialized_ack: str) -> None:
-        ack = json.loads(serialized_ack)
+    def process_ack(self, serialized_ack: bytes) -> None:
+        ack = self.protocol.decode(serialized_ack)
         if ack.get('handshake'):
             return
 
         self.total_acks += 1
-        self.times_of_acknowledgements.append(((time.time() - self.start_time), ack['seq_num']))
+        self.times_of_acknowledgements.append(((self.clock() - self.start_time), ack['seq_num']))
 
 
         if self.unacknowledged_packets.get(ack['seq_num']) is None:
@@ -155,11 +293,14 @@ class TahoeStrategy(SenderStrategy):
                 self.duplicated_ack = ack
                 self.curr_duplicate_acks = 1
 
+            self.log_event(DUPLICATE_ACK, ack['seq_num'])
+
             if self.curr_duplicate_acks == 3:
                 # Received 3 duplicate acks, retransmit
                 self.fast_retransmit_packet = self.unacknowledged_packets[ack['seq_num'] + 1]
                 self.slow_start_thresh = int(max(1, self.cwnd/2))
                 self.cwnd = 1
+                self.log_event(FAST_RETRANSMIT, ack['seq_num'] + 1)
         elif ack['seq_num'] >= self.next_ack:
             if self.fast_retransmit_packet:
                 self.fast_retransmit_packet = None
@@ -167,24 +308,781 @@ class TahoeStrategy(SenderStrategy):
                 self.curr_duplicate_acks = 0
                 self.seq_num = ack['seq_num'] + 1
 
-            # Acknowledge all packets where seq_num < ack['seq_num']
-            self.unacknowledged_packets = {
-                k:v
-                for k,v in
-                self.unacknowledged_packets.items()
-                if k > ack['seq_num']
-            }
+            # Karn's rule: an ACK that covers a retransmitted segment may
+            # echo the timestamp of an earlier transmission, so no RTT sample
+            valid_rtt_sample = not self.unacknowledged_packets.retransmitted_through(ack['seq_num'])
+            previous_next_ack = self.next_ack
+            newly_acked = ack['seq_num'] + 1 - self.next_ack
+
+            # Acknowledge all packets where seq_num <= ack['seq_num']
+            self.unacknowledged_packets.acknowledge_through(ack['seq_num'])
             self.next_ack = max(self.next_ack, ack['seq_num'] + 1)
+            self.acked_segments += newly_acked
+            # After going back, the receiver may have had more than we resent
+            self.seq_num = max(self.seq_num, self.next_ack)
             self.ack_count += 1
             self.sent_bytes += ack['ack_bytes']
-            rtt = float(time.time() - ack['send_ts'])
-            self.rtts.append(rtt)
+            if valid_rtt_sample:
+                self.record_rtt(float(self.clock() - ack['send_ts']))
+
+            if self.seq_num > self.next_ack:
+                self.retransmission_timer.start(self.clock())
+            else:
+                self.retransmission_timer.stop()
             if self.cwnd < self.slow_start_thresh:
-                # In slow start
+                # In slow start, counting at most two segments per ACK
+                # (RFC 3465) so delayed ACKs do not halve the growth
+                self.cwnd += min(newly_acked, 2)
+            elif (ack['seq_num'] + 1) // self.cwnd > previous_next_ack // self.cwnd:
+                # In congestion avoidance, whenever the ACK crosses a multiple
+                # of cwnd, however many segments it covers
                 self.cwnd += 1
-            elif (ack['seq_num'] + 1) % self.cwnd == 0:
-                # In congestion avoidance
+            self.log_event(ACK, ack['seq_num'])
+
+        self.cwnds.append(self.cwnd)
+        self.slow_start_thresholds.append(self.slow_start_thresh)
+
+
+class RenoStrategy(SenderStrategy):
+    """
+    TCP Reno (RFC 5681). Three duplicate ACKs halve the window instead of
+    collapsing it: the missing segment is retransmitted and, during fast
+    recovery, every further duplicate ACK inflates the window by a segment
+    so new data keeps flowing. The first new ACK ends recovery.
+
+    Once the receiver's ACKs carry SACK blocks, recovery follows RFC 6675
+    instead: the scoreboard says which segments are missing, and those
+    are retransmitted, and new data sent, while its estimate of the
+    segments in the network (the pipe) is below the window. The window
+    is not inflated, and segments the receiver already holds are not
+    resent after a timeout.
+    """
+
+    def __init__(self, slow_start_thresh: int, initial_cwnd: int, metrics_capacity: Optional[int] = None) -> None:
+        # Both fractional once CUBIC, BBR or Vegas set them from rates and RTTs
+        self.slow_start_thresh: float = slow_start_thresh
+        self.cwnd: float = initial_cwnd
+        self.in_recovery = False
+        # Highest sequence number sent when recovery began
+        self.recover = -1
+        self.pending_retransmit: Optional[int] = None
+        self.scoreboard = Scoreboard(DUPLICATE_ACK_THRESHOLD)
+        # Whether the receiver sends SACK blocks, which it is taken to do
+        # from the first ACK that has any
+        self.sack_permitted = False
+        # Segments the ACK being processed newly SACKed
+        self.newly_sacked = 0
+
+        super().__init__(metrics_capacity)
+
+    @property
+    def sack_recovery(self) -> bool:
+        return self.in_recovery and self.sack_permitted
+
+    def window_is_open(self) -> bool:
+        if self.sack_recovery:
+            return self.scoreboard.pipe(self.next_ack, self.seq_num) < self.cwnd
+        return self.seq_num - self.next_ack < self.cwnd
+
+    def pacing_gain(self) -> float:
+        if self.cwnd < self.slow_start_thresh:
+            return SLOW_START_PACING_GAIN
+        return PACING_GAIN
+
+    def flight_size(self) -> int:
+        return self.seq_num - self.next_ack
+
+    def retransmit(self, seq_num: int, now: float) -> Optional[bytes]:
+        segment = self.unacknowledged_packets.get(seq_num)
+        if segment is None:
+            return None
+        segment['send_ts'] = now
+        self.on_segment_sent(segment, now)
+        self.unacknowledged_packets.mark_retransmitted(seq_num)
+        self.log_event(RETRANSMIT, seq_num)
+        if self.sack_recovery:
+            self.scoreboard.on_retransmit(seq_num)
+        self.time_of_retransmit = now
+        self.retransmission_timer.start_if_stopped(now)
+        return self.protocol.encode({'seq_num': seq_num, 'send_ts': now})
+
+    def on_segment_sent(self, segment: Dict, now: float) -> None:
+        """
+        Called for every segment just before it goes out, while it still
+        counts as not in flight. Subclasses can keep per-segment state in
+        segment; only seq_num and send_ts go on the wire.
+        """
+        pass
+
+    def on_congestion_event(self) -> None:
+        """Lower the threshold after a loss."""
+        self.slow_start_thresh = max(self.flight_size() // 2, 2)
+
+    def on_retransmission_timeout(self) -> None:
+        # One reduction per loss episode: not again for a timeout during
+        # fast recovery or right after another timeout
+        if self.rtt_estimator.backoffs == 0 and not self.in_recovery:
+            self.on_congestion_event()
+        self.rtt_estimator.backoff()
+        self.retransmission_timer.stop()
+        self.cwnd = 1
+        self.in_recovery = False
+        self.pending_retransmit = None
+        self.curr_duplicate_acks = 0
+        self.recover = self.seq_num - 1
+        self.scoreboard.reset_recovery()
+        # Go back to the first unacknowledged segment and resend from there
+        self.seq_num = self.next_ack
+        self.log_event(TIMEOUT, self.next_ack)
+
+    def next_packet_to_send(self) -> Optional[bytes]:
+        now = self.clock()
+        if self.retransmission_timer.expired(now):
+            self.on_retransmission_timeout()
+
+        if self.pending_retransmit is not None:
+            seq_num, self.pending_retransmit = self.pending_retransmit, None
+            segment = self.retransmit(seq_num, now)
+            if segment is not None:
+                return segment
+
+        if not self.window_is_open():
+            return None
+
+        if self.sack_recovery:
+            lost = self.scoreboard.next_lost(self.next_ack)
+            if lost is not None:
+                return self.retransmit(lost, now)
+
+        # Going back after a timeout, skip what the receiver already has
+        self.seq_num = self.scoreboard.skip_sacked(self.seq_num)
+        if self.seq_num in self.unacknowledged_packets:
+            # Sent before, we went back after a timeout
+            self.unacknowledged_packets.mark_retransmitted(self.seq_num)
+            self.log_event(RETRANSMIT, self.seq_num)
+        else:
+            self.log_event(SEND, self.seq_num)
+        send_data = {
+            'seq_num': self.seq_num,
+            'send_ts': now
+        }
+        self.on_segment_sent(send_data, now)
+        self.unacknowledged_packets.add(self.seq_num, send_data)
+        self.seq_num += 1
+        self.retransmission_timer.start_if_stopped(now)
+        return self.protocol.encode({'seq_num': send_data['seq_num'], 'send_ts': now})
+
+    def can_enter_fast_recovery(self, ack_seq_num: int) -> bool:
+        return True
+
+    def enter_fast_recovery(self) -> None:
+        self.on_congestion_event()
+        if self.sack_permitted:
+            # The pipe already leaves out the segments that were SACKed
+            self.cwnd = self.slow_start_thresh
+        else:
+            self.cwnd = self.slow_start_thresh + DUPLICATE_ACK_THRESHOLD
+        self.in_recovery = True
+        self.recover = self.seq_num - 1
+        self.scoreboard.reset_recovery()
+        self.pending_retransmit = self.next_ack
+        self.log_event(FAST_RETRANSMIT, self.next_ack)
+
+    def on_duplicate_ack(self, ack_seq_num: int) -> None:
+        self.curr_duplicate_acks += 1
+        if self.in_recovery:
+            if not self.sack_permitted:
+                # Another segment has left the network, let one more in
                 self.cwnd += 1
+        elif self.curr_duplicate_acks == DUPLICATE_ACK_THRESHOLD and self.can_enter_fast_recovery(ack_seq_num):
+            self.enter_fast_recovery()
+
+    def on_new_ack(self, ack_seq_num: int, newly_acked: int, acked_segment: Optional[Dict]) -> None:
+        """
+        Adjust the window for an ACK that acknowledged newly_acked more
+        segments, the latest of them acked_segment.
+        """
+        if self.in_recovery:
+            self.on_recovery_ack(ack_seq_num, newly_acked)
+        else:
+            self.increase_window(newly_acked)
+
+    def on_recovery_ack(self, ack_seq_num: int, newly_acked: int) -> None:
+        """
+        A new ACK arrived during fast recovery. Reno ends recovery on any
+        of them; with SACK, recovery lasts until everything that was in
+        flight when it began is acknowledged (RFC 6675).
+        """
+        if not self.sack_permitted or ack_seq_num >= self.recover:
+            self.exit_fast_recovery()
+            return
+        if self.next_ack not in self.scoreboard.retransmitted:
+            self.pending_retransmit = self.next_ack
+        self.retransmission_timer.start(self.clock())
+
+    def exit_fast_recovery(self) -> None:
+        # Deflate the window back to the halved threshold
+        self.cwnd = self.slow_start_thresh
+        self.in_recovery = False
+
+    def increase_window(self, newly_acked: int) -> None:
+        if self.cwnd < self.slow_start_thresh:
+            # Slow start, counting at most two segments per ACK (RFC 3465)
+            self.cwnd += min(newly_acked, 2)
+        else:
+            # Congestion avoidance, about one segment per round trip
+            self.cwnd += float(newly_acked) / self.cwnd
+
+    def process_ack(self, serialized_ack: bytes) -> None:
+        ack = self.protocol.decode(serialized_ack)
+        if ack.get('handshake'):
+            return
+
+        self.total_acks += 1
+        self.times_of_acknowledgements.append(((self.clock() - self.start_time), ack['seq_num']))
+
+        ack_seq_num = ack['seq_num']
+        self.newly_sacked = 0
+        if ack.get('sack'):
+            self.sack_permitted = True
+            self.newly_sacked = self.scoreboard.update(ack['sack'], max(self.next_ack, ack_seq_num + 1))
+
+        if ack_seq_num < self.next_ack:
+            self.num_duplicate_acks += 1
+            # Older ACKs that arrive reordered say nothing about loss
+            if ack_seq_num == self.next_ack - 1:
+                self.on_duplicate_ack(ack_seq_num)
+            self.log_event(DUPLICATE_ACK, ack_seq_num)
+        else:
+            newly_acked = ack_seq_num + 1 - self.next_ack
+            # Karn's rule, as in TahoeStrategy
+            valid_rtt_sample = not self.unacknowledged_packets.retransmitted_through(ack_seq_num)
+            acked_segment = self.unacknowledged_packets.get(ack_seq_num)
+
+            self.unacknowledged_packets.acknowledge_through(ack_seq_num)
+            self.scoreboard.acknowledge_through(ack_seq_num)
+            self.next_ack = ack_seq_num + 1
+            self.seq_num = max(self.seq_num, self.next_ack)
+            self.ack_count += 1
+            self.acked_segments += newly_acked
+            self.sent_bytes += ack['ack_bytes']
+            self.curr_duplicate_acks = 0
+            if valid_rtt_sample:
+                self.record_rtt(float(self.clock() - ack['send_ts']))
+
+            self.on_new_ack(ack_seq_num, newly_acked, acked_segment)
+
+            # Restart the timer for what is still in flight. During
+            # recovery that is up to on_recovery_ack.
+            if self.seq_num == self.next_ack:
+                self.retransmission_timer.stop()
+            elif not self.in_recovery:
+                self.retransmission_timer.start(self.clock())
+            self.log_event(ACK, ack_seq_num)
 
         self.cwnds.append(self.cwnd)
         self.slow_start_thresholds.append(self.slow_start_thresh)
+
+
+class NewRenoStrategy(RenoStrategy):
+    """
+    TCP NewReno (RFC 6582). Recovery lasts until everything that was in
+    flight when it began is acknowledged. An ACK short of that (a partial
+    ACK) means the next segment was lost too, so it is retransmitted
+    straight away rather than after another three duplicate ACKs or a
+    timeout, and a window with several losses is repaired in one recovery.
+
+    Only the first partial ACK restarts the retransmission timer (the
+    "Impatient" variant), so when a window lost more segments than it is
+    worth repairing one per round trip, the timeout takes over.
+    """
+
+    def __init__(self, slow_start_thresh: int, initial_cwnd: int, metrics_capacity: Optional[int] = None) -> None:
+        self.partial_acks = 0
+
+        super().__init__(slow_start_thresh, initial_cwnd, metrics_capacity)
+
+    def enter_fast_recovery(self) -> None:
+        super().enter_fast_recovery()
+        self.partial_acks = 0
+
+    def can_enter_fast_recovery(self, ack_seq_num: int) -> bool:
+        # Duplicate ACKs for data sent before the last recovery or timeout
+        # belong to a loss that has already been dealt with
+        return ack_seq_num >= self.recover
+
+    def on_recovery_ack(self, ack_seq_num: int, newly_acked: int) -> None:
+        if ack_seq_num >= self.recover:
+            self.exit_fast_recovery()
+            return
+        # Partial ACK: the next segment is lost too, unless the scoreboard
+        # already had it resent
+        if self.next_ack not in self.scoreboard.retransmitted:
+            self.pending_retransmit = self.next_ack
+        if not self.sack_permitted:
+            # Deflate by what it acknowledged and keep one segment of
+            # that for the retransmission
+            self.cwnd = max(self.cwnd - newly_acked + 1, 1)
+        self.partial_acks += 1
+        if self.partial_acks == 1:
+            self.retransmission_timer.start(self.clock())
+
+
+class CubicStrategy(NewRenoStrategy):
+    """
+    CUBIC (RFC 9438), with NewReno loss recovery.
+
+    After a loss the window is cut to CUBIC_BETA of what it was and then
+    follows a cubic function of the time since the cut: it climbs quickly
+    back towards the window where the loss happened (w_max), levels off
+    around it, and then probes beyond it ever faster. The window therefore
+    depends on elapsed time rather than on ACK counts, so flows with long
+    RTTs are not left behind the way they are with Reno's one segment per
+    round trip. On short-RTT paths, where Reno would grow faster, the
+    window follows a Reno-equivalent estimate instead.
+
+    With hystart set, slow start ends as soon as RTTs start rising (the
+    delay-increase test of HyStart++, RFC 9406) rather than when the
+    queue overflows.
+    """
+
+    def __init__(self, slow_start_thresh: int, initial_cwnd: int, metrics_capacity: Optional[int] = None,
+                 hystart: bool = True) -> None:
+        self.w_max = 0.0
+        # w_max before the latest loss, to tell whether flows are competing
+        self.w_last_max = 0.0
+        self.epoch_start: Optional[float] = None
+        # Time from the start of an epoch until the window is back at w_max
+        self.k = 0.0
+        self.w_est = 0.0
+
+        self.hystart = hystart
+        # A round of slow start ends when the ACK for this segment arrives
+        self.round_end = 0
+        self.last_round_min_rtt = math.inf
+        self.current_round_min_rtt = math.inf
+        self.round_rtt_samples = 0
+
+        super().__init__(slow_start_thresh, initial_cwnd, metrics_capacity)
+
+    def on_congestion_event(self) -> None:
+        # Fast convergence: a flow whose window keeps falling short of its
+        # previous peak gives up extra bandwidth to newcomers
+        if self.cwnd < self.w_last_max:
+            self.w_max = self.cwnd * (1 + CUBIC_BETA) / 2
+        else:
+            self.w_max = self.cwnd
+        self.w_last_max = self.cwnd
+        self.slow_start_thresh = max(int(self.cwnd * CUBIC_BETA), 2)
+        self.epoch_start = None
+
+    def record_rtt(self, rtt: float) -> None:
+        super().record_rtt(rtt)
+        self.current_round_min_rtt = min(self.current_round_min_rtt, rtt)
+        self.round_rtt_samples += 1
+
+    def rtt_is_increasing(self) -> bool:
+        if self.round_rtt_samples < HYSTART_MIN_RTT_SAMPLES or self.last_round_min_rtt == math.inf:
+            return False
+        threshold = min(max(self.last_round_min_rtt / 8, HYSTART_MIN_RTT_THRESH), HYSTART_MAX_RTT_THRESH)
+        return self.current_round_min_rtt >= self.last_round_min_rtt + threshold
+
+    def increase_window(self, newly_acked: int) -> None:
+        if self.cwnd < self.slow_start_thresh:
+            if self.hystart and self.rtt_is_increasing():
+                self.slow_start_thresh = self.cwnd
+            else:
+                super().increase_window(newly_acked)
+            if self.next_ack > self.round_end:
+                self.round_end = self.seq_num
+                self.last_round_min_rtt = self.current_round_min_rtt
+                self.current_round_min_rtt = math.inf
+                self.round_rtt_samples = 0
+            return
+
+        now = self.clock()
+        if self.epoch_start is None:
+            self.epoch_start = now
+            if self.cwnd < self.w_max:
+                self.k = ((self.w_max - self.cwnd) / CUBIC_C) ** (1.0 / 3)
+            else:
+                # No loss yet, or the window grew past w_max in slow start
+                self.k = 0.0
+                self.w_max = self.cwnd
+            self.w_est = self.cwnd
+
+        t = now - self.epoch_start
+        rtt = self.srtt or 0.0
+        self.w_est += CUBIC_ALPHA * newly_acked / self.cwnd
+        if self.cubic_window(t) < self.w_est:
+            # Reno-friendly region
+            self.cwnd = self.w_est
+            return
+
+        # Aim for where the cubic curve will be one round trip from now,
+        # without growing by more than half the window per round trip
+        target = min(max(self.cubic_window(t + rtt), self.cwnd), 1.5 * self.cwnd)
+        self.cwnd += (target - self.cwnd) * newly_acked / self.cwnd
+
+    def cubic_window(self, t: float) -> float:
+        return CUBIC_C * (t - self.k) ** 3 + self.w_max
+
+
+class BbrStrategy(NewRenoStrategy):
+    """
+    BBR v1 (draft-cardwell-iccrg-bbr-congestion-control-00), with NewReno
+    loss recovery.
+
+    Rather than reacting to loss, BBR builds a model of the path: the
+    bottleneck bandwidth, the largest delivery rate sampled over the last
+    BBR_BTL_BW_FILTER_ROUNDS round trips, and the propagation delay, the
+    smallest RTT seen in BBR_MIN_RTT_WINDOW. It paces at the bandwidth
+    and keeps about two bandwidth-delay products in flight, so a queue
+    only builds while it deliberately probes for more bandwidth, once
+    every eight round trips.
+
+    It goes through four phases. Startup doubles the rate every round
+    trip until the bandwidth stops growing, drain then empties the queue
+    that built, and probe_bw cycles through BBR_PACING_GAIN_CYCLE from
+    then on. When the min RTT has not been seen again for
+    BBR_MIN_RTT_WINDOW, probe_rtt cuts the window to BBR_MIN_CWND for a
+    while so that the queue, if any, drains and the min RTT is measured
+    afresh.
+    """
+
+    requires_pacing = True
+
+    def __init__(self, initial_cwnd: int = 10, metrics_capacity: Optional[int] = None) -> None:
+        self.delivery_rate = DeliveryRateEstimator()
+        self.btl_bw = WindowedMaxFilter(BBR_BTL_BW_FILTER_ROUNDS)
+        self.min_rtt = math.inf
+        self.min_rtt_stamp: Optional[float] = None
+        # RTT sample of the ACK being processed, if it gave one
+        self.rtt_sample: Optional[float] = None
+        # Segments a duplicate ACK already counted as delivered, which the
+        # next cumulative ACK must not count again
+        self.dup_acked = 0
+
+        self.mode = BBR_STARTUP
+        self.gain = BBR_HIGH_GAIN
+        self.cwnd_gain = BBR_HIGH_GAIN
+        # Round trips, counted by segments delivered
+        self.round_count = 0
+        self.next_round_delivered = 0
+        self.round_start = False
+        self.full_bw = 0.0
+        self.full_bw_count = 0
+        self.filled_pipe = False
+        self.cycle_index = 0
+        self.cycle_stamp = 0.0
+        self.probe_rtt_done_stamp: Optional[float] = None
+        self.probe_rtt_round_done = False
+        # Window before recovery, a timeout or probe_rtt cut it, restored afterwards
+        self.prior_cwnd = 0.0
+        self.in_timeout_recovery = False
+        # Segments in flight when the last loss happened, which the window
+        # only reaches again while probing, and whether a probe lost any
+        self.inflight_hi = math.inf
+        self.probe_lost = False
+        self.probe_reached_hi = False
+
+        # BBR has no slow start threshold; it is kept at 0 so the
+        # metrics the other strategies record stay comparable
+        super().__init__(0, initial_cwnd, metrics_capacity)
+
+    def pacing_gain(self) -> float:
+        return self.gain
+
+    def pacing_rate(self) -> Optional[float]:
+        bandwidth = self.btl_bw.get()
+        if bandwidth:
+            return self.gain * bandwidth
+        # No delivery rate sample yet, pace the initial window over the RTT
+        return super().pacing_rate()
+
+    def bdp(self, gain: float = 1.0) -> float:
+        """gain times the estimated bandwidth-delay product, in segments."""
+        if self.min_rtt == math.inf:
+            return self.cwnd
+        return gain * self.btl_bw.get() * self.min_rtt
+
+    def on_congestion_event(self) -> None:
+        # Loss is not a congestion signal for BBR, the model sets the window
+        pass
+
+    def on_segment_sent(self, segment: Dict, now: float) -> None:
+        self.delivery_rate.on_send(segment, now, self.flight_size())
+
+    def record_rtt(self, rtt: float) -> None:
+        super().record_rtt(rtt)
+        self.rtt_sample = rtt
+
+    def save_cwnd(self) -> None:
+        if self.in_recovery or self.in_timeout_recovery or self.mode == BBR_PROBE_RTT:
+            # Already cut, the window from before that is the one to restore
+            self.prior_cwnd = max(self.prior_cwnd, self.cwnd)
+        else:
+            self.prior_cwnd = self.cwnd
+
+    def enter_fast_recovery(self) -> None:
+        # Packet conservation: one segment out for each one delivered,
+        # which the duplicate ACKs take care of by inflating the window
+        self.save_cwnd()
+        self.on_loss()
+        super().enter_fast_recovery()
+        self.cwnd = max(self.in_flight() + self.newly_sacked, BBR_MIN_CWND)
+
+    def exit_fast_recovery(self) -> None:
+        self.cwnd = max(self.cwnd, self.prior_cwnd)
+        self.in_recovery = False
+
+    def in_flight(self) -> int:
+        """Segments in the network: the pipe with SACK, everything outstanding without."""
+        if self.sack_permitted:
+            return self.scoreboard.pipe(self.next_ack, self.seq_num)
+        return self.flight_size()
+
+    def on_duplicate_ack(self, ack_seq_num: int) -> None:
+        # A duplicate ACK means segments beyond the hole arrived: the ones
+        # it SACKs, or without SACK presumably one. Counting them now
+        # rather than when the hole is filled keeps the cumulative ACK
+        # from delivering a whole window at once and inflating the
+        # bandwidth estimate.
+        delivered = self.newly_sacked if self.sack_permitted else 1
+        self.dup_acked += delivered
+        self.delivery_rate.on_ack(None, delivered, self.clock())
+        super().on_duplicate_ack(ack_seq_num)
+        if self.sack_recovery:
+            # Packet conservation: as much out as was delivered
+            self.cwnd = max(self.cwnd, self.in_flight() + delivered)
+        if self.in_recovery:
+            self.bound_cwnd()
+
+    def on_new_ack(self, ack_seq_num: int, newly_acked: int, acked_segment: Optional[Dict]) -> None:
+        now = self.clock()
+        counted = min(newly_acked - 1, self.dup_acked)
+        self.dup_acked -= counted
+        self.update_model(newly_acked - counted, acked_segment, now)
+        self.update_mode(now)
+        if self.in_recovery:
+            self.on_recovery_ack(ack_seq_num, newly_acked)
+            self.bound_cwnd()
+            return
+        if self.in_timeout_recovery and ack_seq_num >= self.recover:
+            self.in_timeout_recovery = False
+            self.cwnd = max(self.cwnd, self.prior_cwnd)
+        self.set_cwnd(newly_acked)
+
+    def on_retransmission_timeout(self) -> None:
+        if not self.in_timeout_recovery:
+            self.save_cwnd()
+        if not self.in_timeout_recovery and not self.in_recovery:
+            self.on_loss()
+        super().on_retransmission_timeout()
+        # The model still holds, so once everything that was outstanding
+        # has been resent and acknowledged the window is restored
+        self.in_timeout_recovery = True
+        self.dup_acked = 0
+
+    def on_loss(self) -> None:
+        """
+        BBR v1 ignores loss, which on a queue shallower than what its
+        probes add means losing segments every cycle. As in BBRv2, a
+        loss instead caps the window at what was in flight, and ends
+        startup or a probe for bandwidth.
+        """
+        self.inflight_hi = max(self.flight_size() * BBR_LOSS_BETA, BBR_MIN_CWND)
+        self.probe_lost = True
+        if self.mode == BBR_STARTUP:
+            self.filled_pipe = True
+
+    def update_model(self, newly_acked: int, acked_segment: Optional[Dict], now: float) -> None:
+        rtt, self.rtt_sample = self.rtt_sample, None
+        min_rtt_expired = self.min_rtt_stamp is not None and now > self.min_rtt_stamp + BBR_MIN_RTT_WINDOW
+        if rtt is not None and (rtt <= self.min_rtt or min_rtt_expired):
+            self.min_rtt = rtt
+            self.min_rtt_stamp = now
+        if min_rtt_expired and self.mode != BBR_PROBE_RTT:
+            self.enter_probe_rtt()
+
+        self.round_start = False
+        if acked_segment is not None and acked_segment.get('delivered', -1) >= self.next_round_delivered:
+            self.next_round_delivered = self.delivery_rate.delivered + newly_acked
+            self.round_count += 1
+            self.round_start = True
+
+        sample = self.delivery_rate.on_ack(acked_segment, newly_acked, now)
+        # A sample over less than the min RTT may just be a burst of ACKs
+        if sample is not None and sample.interval >= self.min_rtt:
+            self.btl_bw.update(sample.delivery_rate, self.round_count)
+
+        if self.round_start and not self.filled_pipe:
+            self.check_full_pipe()
+
+    def check_full_pipe(self) -> None:
+        bandwidth = self.btl_bw.get()
+        if bandwidth >= self.full_bw * BBR_FULL_BW_THRESH:
+            self.full_bw = bandwidth
+            self.full_bw_count = 0
+            return
+        self.full_bw_count += 1
+        if self.full_bw_count >= BBR_FULL_BW_ROUNDS:
+            self.filled_pipe = True
+
+    def update_mode(self, now: float) -> None:
+        if self.mode == BBR_STARTUP and self.filled_pipe:
+            self.mode = BBR_DRAIN
+            self.gain = BBR_DRAIN_GAIN
+            self.cwnd_gain = BBR_HIGH_GAIN
+        if self.mode == BBR_DRAIN and self.flight_size() <= self.bdp():
+            self.enter_probe_bw(now)
+        elif self.mode == BBR_PROBE_BW and self.is_next_cycle_phase(now):
+            if self.gain > 1 and not self.probe_lost and self.probe_reached_hi:
+                # The path took more than the ceiling without loss, raise it
+                self.inflight_hi *= BBR_INFLIGHT_HI_GROWTH
+            self.set_cycle_phase((self.cycle_index + 1) % len(BBR_PACING_GAIN_CYCLE), now)
+        elif self.mode == BBR_PROBE_RTT:
+            self.handle_probe_rtt(now)
+
+    def enter_probe_bw(self, now: float) -> None:
+        self.mode = BBR_PROBE_BW
+        self.cwnd_gain = BBR_CWND_GAIN
+        # Start anywhere but in the draining phase
+        self.set_cycle_phase((self.round_count + 2) % len(BBR_PACING_GAIN_CYCLE), now)
+
+    def set_cycle_phase(self, index: int, now: float) -> None:
+        self.cycle_index = index
+        self.cycle_stamp = now
+        self.gain = BBR_PACING_GAIN_CYCLE[index]
+        self.probe_lost = False
+        self.probe_reached_hi = False
+
+    def is_next_cycle_phase(self, now: float) -> bool:
+        if self.flight_size() >= self.inflight_hi:
+            self.probe_reached_hi = True
+        is_full_length = now - self.cycle_stamp > self.min_rtt
+        if self.gain > 1:
+            # Keep probing until the extra data is actually in flight,
+            # unless the path already said it has no room for it
+            return self.in_recovery or (is_full_length and self.flight_size() >= self.bdp(self.gain))
+        if self.gain < 1:
+            # Stop draining early once the queue is gone
+            return is_full_length or self.flight_size() <= self.bdp()
+        return is_full_length
+
+    def enter_probe_rtt(self) -> None:
+        self.save_cwnd()
+        self.mode = BBR_PROBE_RTT
+        self.gain = 1.0
+        self.probe_rtt_done_stamp = None
+
+    def handle_probe_rtt(self, now: float) -> None:
+        if self.probe_rtt_done_stamp is None:
+            if self.flight_size() <= BBR_MIN_CWND:
+                # Hold the window at the minimum for the duration and a round trip
+                self.probe_rtt_done_stamp = now + BBR_PROBE_RTT_DURATION
+                self.probe_rtt_round_done = False
+                self.next_round_delivered = self.delivery_rate.delivered
+            return
+        if self.round_start:
+            self.probe_rtt_round_done = True
+        if self.probe_rtt_round_done and now >= self.probe_rtt_done_stamp:
+            self.min_rtt_stamp = now
+            self.cwnd = max(self.cwnd, self.prior_cwnd)
+            if self.filled_pipe:
+                self.enter_probe_bw(now)
+            else:
+                self.mode = BBR_STARTUP
+                self.gain = BBR_HIGH_GAIN
+                self.cwnd_gain = BBR_HIGH_GAIN
+
+    def target_cwnd(self) -> float:
+        ceiling = self.inflight_hi if self.gain > 1 else self.inflight_hi * BBR_INFLIGHT_HEADROOM
+        return max(min(self.bdp(self.cwnd_gain), ceiling), BBR_MIN_CWND)
+
+    def bound_cwnd(self) -> None:
+        """Keep recovery from inflating the window past what the model allows."""
+        if self.filled_pipe:
+            self.cwnd = min(self.cwnd, self.target_cwnd())
+
+    def set_cwnd(self, newly_acked: int) -> None:
+        if self.mode == BBR_PROBE_RTT:
+            self.cwnd = min(self.cwnd, BBR_MIN_CWND)
+            return
+        target = self.target_cwnd()
+        if self.filled_pipe:
+            self.cwnd = min(self.cwnd + newly_acked, target)
+        elif self.cwnd < target or not self.btl_bw.get():
+            # Until the pipe is full, grow with every ACK as slow start would
+            self.cwnd += newly_acked
+        self.cwnd = max(self.cwnd, BBR_MIN_CWND)
+
+
+class VegasStrategy(NewRenoStrategy):
+    """
+    TCP Vegas (Brakmo and Peterson, 1995), with NewReno loss recovery.
+
+    The smallest RTT ever seen, base_rtt, is taken to be the propagation
+    delay. Once per round trip the window is compared with the smallest
+    RTT of that round: cwnd / base_rtt is the throughput expected if
+    nothing were queued, cwnd / rtt the throughput actually seen, and the
+    difference, times base_rtt, is how many of the window's segments sit
+    in the bottleneck queue. The window grows by one while fewer than
+    alpha do and shrinks by one while more than beta do, so the queue
+    stays a few segments long instead of filling until it drops.
+
+    Slow start doubles the window every round trip as usual, but ends as
+    soon as more than gamma segments are queued.
+    """
+
+    def __init__(self, slow_start_thresh: int, initial_cwnd: int, metrics_capacity: Optional[int] = None,
+                 alpha: float = VEGAS_ALPHA, beta: float = VEGAS_BETA, gamma: float = VEGAS_GAMMA) -> None:
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.base_rtt = math.inf
+        # A round ends when the ACK for this segment arrives
+        self.round_end = 0
+        self.round_min_rtt = math.inf
+
+        super().__init__(slow_start_thresh, initial_cwnd, metrics_capacity)
+
+    def record_rtt(self, rtt: float) -> None:
+        super().record_rtt(rtt)
+        self.base_rtt = min(self.base_rtt, rtt)
+        self.round_min_rtt = min(self.round_min_rtt, rtt)
+
+    def queued_segments(self, rtt: float) -> float:
+        """Segments of the window in the queue: (expected - actual) * base_rtt."""
+        return self.cwnd * (rtt - self.base_rtt) / rtt
+
+    def increase_window(self, newly_acked: int) -> None:
+        if self.next_ack <= self.round_end:
+            # Mid-round, only slow start grows the window
+            if self.cwnd < self.slow_start_thresh:
+                super().increase_window(newly_acked)
+            return
+
+        rtt, self.round_min_rtt = self.round_min_rtt, math.inf
+        self.round_end = self.seq_num
+        if rtt == math.inf:
+            # Every ACK of the round covered a retransmission, so there is
+            # nothing to measure; grow as Reno would
+            super().increase_window(newly_acked)
+            return
+
+        queued = self.queued_segments(rtt)
+        if self.cwnd < self.slow_start_thresh:
+            if queued > self.gamma:
+                # Leave slow start with the window that fills the path
+                # without the queue
+                self.cwnd = max(min(self.cwnd, self.cwnd * self.base_rtt / rtt + 1), 2)
+                self.slow_start_thresh = self.cwnd
+            else:
+                super().increase_window(newly_acked)
+        elif queued < self.alpha:
+            self.cwnd += 1
+        elif queued > self.beta:
+            self.cwnd = max(self.cwnd - 1, 2)
+            # Stay out of slow start
+            self.slow_start_thresh = min(self.slow_start_thresh, self.cwnd)
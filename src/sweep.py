@@ -0,0 +1,264 @@
+"""
+Parameter sweeps over strategies, links and flow counts.
+
+expand_grid turns a dict of parameter lists into cells, one for every
+combination. run_sweep runs the cells in a process pool, each on a
+Simulation of its own (or on its own ports behind its own emulator), and
+appends a row per flow to results.csv in the result directory as each
+cell finishes. The per-ACK series of every flow are saved next to it as
+.npy files.
+
+Every cell is keyed by a hash of its parameters, so rerunning or
+extending a sweep only runs the cells that are not in results.csv yet.
+"""
+
+import contextlib
+import csv
+import hashlib
+import io
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from src.strategies import (FixedWindowStrategy, TahoeStrategy, RenoStrategy, NewRenoStrategy,
+                            CubicStrategy, BbrStrategy, VegasStrategy, SenderStrategy)
+from src.helpers import get_open_udp_port, run_with_mahi_settings
+from src.protocol import DEFAULT_PROTOCOL
+from src.reporting import summarize
+from src.senders import Sender
+from src.simulator import simulate_with_mahi_settings
+from src.sack import DEFAULT_SACK_BLOCKS
+from src.traces import load_trace, trace_path
+
+RESULTS_FILE = 'results.csv'
+SERIES_DIR = 'series'
+BACKENDS = ('simulator', 'python', 'mahimahi')
+
+# Strategy name, and the cell parameters its constructor takes in order
+STRATEGIES = {
+    'fixed': (FixedWindowStrategy, ('cwnd',)),
+    'tahoe': (TahoeStrategy, ('slow_start_thresh', 'initial_cwnd')),
+    'reno': (RenoStrategy, ('slow_start_thresh', 'initial_cwnd')),
+    'newreno': (NewRenoStrategy, ('slow_start_thresh', 'initial_cwnd')),
+    'cubic': (CubicStrategy, ('slow_start_thresh', 'initial_cwnd')),
+    'bbr': (BbrStrategy, ('initial_cwnd',)),
+    'vegas': (VegasStrategy, ('slow_start_thresh', 'initial_cwnd')),
+}
+
+# Every cell has every one of these parameters, which are also the
+# leading columns of results.csv. None marks the ones a sweep must give.
+CELL_DEFAULTS = {
+    'strategy': None,
+    'trace_file': None,
+    'queue_size': None,
+    'delay': None,
+    'loss': 0.0,
+    'flows': 1,
+    'cwnd': 10,
+    'slow_start_thresh': 64,
+    'initial_cwnd': 10,
+    'seconds_to_run': 10,
+    'seed': 0,
+    'protocol': DEFAULT_PROTOCOL,
+    'pacing': False,
+    # Only the simulator's receiver takes these two
+    'sack_blocks': DEFAULT_SACK_BLOCKS,
+    'ack_every': 1,
+    'backend': 'simulator',
+}
+PARAM_COLUMNS = list(CELL_DEFAULTS)
+METRIC_COLUMNS = [
+    'throughput', 'ack_count', 'acked_segments', 'total_acks', 'duplicate_acks',
+    'rtt_mean_ms', 'rtt_p50_ms', 'rtt_p95_ms', 'rtt_p99_ms', 'packets_sent',
+    'queue_drops', 'random_losses',
+]
+COLUMNS = ['cell_id', 'flow'] + PARAM_COLUMNS + METRIC_COLUMNS
+# Per-ACK series saved for every flow
+SERIES = ('rtts', 'cwnds', 'ack_times', 'ack_seq_nums')
+
+
+def expand_grid(grid: Dict[str, Iterable], **fixed) -> List[Dict]:
+    """
+    One cell per combination of the values in grid, in order, with the
+    parameters in fixed and the defaults in CELL_DEFAULTS filled in.
+    """
+    unknown = set(grid) | set(fixed)
+    unknown.difference_update(CELL_DEFAULTS)
+    if unknown:
+        raise ValueError("Unknown sweep parameters: %s" % ", ".join(sorted(unknown)))
+
+    names = list(grid)
+    cells = []
+    for values in itertools.product(*[list(grid[name]) for name in names]):
+        cell = dict(CELL_DEFAULTS)
+        cell.update(fixed)
+        cell.update(zip(names, values))
+        missing = [name for name, value in cell.items() if value is None]
+        if missing:
+            raise ValueError("Sweep parameters without a value: %s" % ", ".join(missing))
+        if cell['strategy'] not in STRATEGIES:
+            raise ValueError("Unknown strategy: %s" % cell['strategy'])
+        if cell['backend'] not in BACKENDS:
+            raise ValueError("Unknown backend: %s" % cell['backend'])
+        cells.append(cell)
+    return cells
+
+
+def cell_id(cell: Dict) -> str:
+    """Content hash of a cell's parameters."""
+    return hashlib.sha1(json.dumps(cell, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def make_strategy(cell: Dict) -> SenderStrategy:
+    strategy_class, arg_names = STRATEGIES[cell['strategy']]
+    return strategy_class(*[cell[name] for name in arg_names])
+
+
+def mahimahi_settings(cell: Dict) -> Dict:
+    return {
+        'delay': cell['delay'],
+        'queue_size': cell['queue_size'],
+        'trace_file': cell['trace_file'],
+        'loss': cell['loss'],
+    }
+
+
+def series_path(result_dir: str, cell_hash: str, flow: int, name: str) -> str:
+    return os.path.join(result_dir, SERIES_DIR, '%s_flow%d_%s.npy' % (cell_hash, flow, name))
+
+
+def flow_metrics(flow, seconds_to_run: float) -> Dict:
+    """The per-flow columns of results.csv, from the flow's summary."""
+    summary = summarize(flow, seconds_to_run)
+    return dict((name, summary[name]) for name in METRIC_COLUMNS if name in summary)
+
+
+def save_series(result_dir: str, cell_hash: str, index: int, strategy: SenderStrategy) -> None:
+    acknowledgements = strategy.times_of_acknowledgements
+    arrays = {
+        'rtts': strategy.rtts.to_numpy(),
+        'cwnds': strategy.cwnds.to_numpy(),
+        'ack_times': acknowledgements.timestamps.to_numpy(),
+        'ack_seq_nums': acknowledgements.values.to_numpy(),
+    }
+    for name in SERIES:
+        np.save(series_path(result_dir, cell_hash, index, name), arrays[name])
+
+
+def run_flows(cell: Dict) -> Tuple[List, Dict]:
+    """Run a cell on its backend. Returns its flows and the link's drop counts."""
+    strategies = [make_strategy(cell) for _ in range(cell['flows'])]
+    if cell['backend'] == 'simulator':
+        simulation = simulate_with_mahi_settings(
+            mahimahi_settings(cell), cell['seconds_to_run'], strategies, protocol=cell['protocol'],
+            seed=cell['seed'], pacing=cell['pacing'], sack_blocks=cell['sack_blocks'],
+            ack_every=cell['ack_every'])
+        stats = simulation.stats()
+        return simulation.flows, {'queue_drops': stats['downlink']['drops'], 'random_losses': stats['random_losses']}
+
+    senders = [Sender(get_open_udp_port(), strategy, protocol=cell['protocol'], pacing=cell['pacing'])
+               for strategy in strategies]
+    # run_with_mahi_settings prints every flow's results, which would
+    # interleave across workers. The link counters stay with the emulator.
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_with_mahi_settings(mahimahi_settings(cell), cell['seconds_to_run'], senders,
+                               emulator=cell['backend'], plot=False)
+    for sender in senders:
+        sender.sock.close()
+    return senders, {'queue_drops': math.nan, 'random_losses': math.nan}
+
+
+def run_cell(job: Tuple[Dict, str]) -> List[Dict]:
+    """Run one cell, save its series, and return its rows of results.csv."""
+    cell, result_dir = job
+    cell_hash = cell_id(cell)
+    flows, link_stats = run_flows(cell)
+
+    rows = []
+    for index, flow in enumerate(flows):
+        save_series(result_dir, cell_hash, index, flow.strategy)
+        row = {'cell_id': cell_hash, 'flow': index}
+        row.update(cell)
+        row.update(flow_metrics(flow, cell['seconds_to_run']))
+        row.update(link_stats)
+        rows.append(row)
+    return rows
+
+
+def completed_cells(result_dir: str) -> set:
+    path = os.path.join(result_dir, RESULTS_FILE)
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline='') as results_file:
+        return set(row['cell_id'] for row in csv.DictReader(results_file))
+
+
+def run_sweep(cells: List[Dict], result_dir: str, num_processes: Optional[int] = None) -> int:
+    """
+    Run every cell not already in result_dir, num_processes at a time
+    (one per CPU by default), or inline with num_processes=1. Rows are
+    written as cells finish, so an interrupted sweep keeps what it has
+    done. Returns the number of cells run.
+    """
+    os.makedirs(os.path.join(result_dir, SERIES_DIR), exist_ok=True)
+    done = completed_cells(result_dir)
+    pending = []
+    for cell in cells:
+        cell_hash = cell_id(cell)
+        if cell_hash not in done:
+            done.add(cell_hash)
+            pending.append((cell, result_dir))
+    if not pending:
+        return 0
+
+    # Compile each trace's cache once here, rather than in every worker that needs it
+    for trace_file in set(cell['trace_file'] for cell, _ in pending):
+        load_trace(trace_path(trace_file))
+
+    path = os.path.join(result_dir, RESULTS_FILE)
+    write_header = not os.path.exists(path)
+    with open(path, 'a', newline='') as results_file:
+        writer = csv.DictWriter(results_file, COLUMNS)
+        if write_header:
+            writer.writeheader()
+
+        results: Iterable[List[Dict]]
+        if num_processes == 1:
+            results = map(run_cell, pending)
+            pool = None
+        else:
+            pool = multiprocessing.get_context('fork').Pool(num_processes)
+            results = pool.imap_unordered(run_cell, pending)
+        try:
+            for finished, rows in enumerate(results, 1):
+                writer.writerows(rows)
+                results_file.flush()
+                sys.stderr.write('[sweep] %d/%d cells done\n' % (finished, len(pending)))
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+    return len(pending)
+
+
+def load_results(result_dir: str) -> Dict[str, np.ndarray]:
+    """results.csv as one array per column. Numeric columns are floats."""
+    with open(os.path.join(result_dir, RESULTS_FILE), newline='') as results_file:
+        rows = list(csv.DictReader(results_file))
+
+    columns = {}
+    for name in COLUMNS:
+        values = [row[name] for row in rows]
+        try:
+            columns[name] = np.array([float(value) for value in values])
+        except ValueError:
+            columns[name] = np.array(values, dtype=object)
+    return columns
+
+
+def load_series(result_dir: str, cell_hash: str, flow: int, name: str) -> np.ndarray:
+    return np.load(series_path(result_dir, cell_hash, flow, name), mmap_mode='r')
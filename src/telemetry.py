@@ -0,0 +1,215 @@
+"""
+Live statistics for runs that are still going.
+
+A TelemetryPublisher samples the flows it is given on a background
+thread, every interval seconds, and writes one fixed-size record per
+flow into a small memory-mapped file. Senders report their window,
+slow start threshold, segments outstanding, SRTT, ACK rate and duplicate
+ACKs, and receiver Peers their window occupancy and ACK counts. Nothing
+is added to the per-packet path: the publisher only reads attributes
+the run keeps anyway.
+
+The publisher takes no lock against the flows it samples. It reads only
+plain numeric attributes, each read atomic under the GIL, and never
+walks a structure the flow's thread may be changing (so in_flight is
+everything outstanding, not BBR's SACK-based pipe). A record's fields
+may straddle an ACK, which a live view can live with.
+
+Any number of readers can open the file, with read_stats or the
+run_telemetry.py CLI. The file is written in full under a temporary
+name and renamed into place, so a reader never finds it half made.
+Each record carries a version that the writer
+makes odd while it updates the record, so a reader retries rather than
+seeing half an update.
+
+Flows run in forked processes (run_multiplexed with num_processes > 1)
+are copies the publisher cannot see.
+"""
+
+import math
+import mmap
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+import numpy as np
+
+MAGIC = b'CCSTATS1'
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('slots', '<u4'), ('record_size', '<u4')])
+SENDER = 1
+RECEIVER = 2
+STATS_DTYPE = np.dtype([
+    ('version', '<u8'),
+    ('time', '<f8'),
+    ('flow', '<u2'),
+    ('role', 'u1'),
+    ('cwnd', '<f8'),
+    ('ssthresh', '<f8'),
+    ('in_flight', '<i8'),
+    ('srtt', '<f8'),
+    ('acks', '<i8'),
+    ('duplicate_acks', '<i8'),
+    ('ack_rate', '<f8'),
+    ('window_occupancy', '<i8'),
+    ('segments_received', '<i8'),
+    ('acks_sent', '<i8'),
+], align=True)
+DEFAULT_INTERVAL = 0.5  # seconds
+# Times a reader retries a record that keeps changing under it
+READ_RETRIES = 100
+
+
+def receiver_path(path: str) -> str:
+    """Where a receiver run alongside senders that publish to path publishes."""
+    return path + '.receiver'
+
+
+class TelemetryBlock(object):
+    """The memory-mapped file: a header, then one STATS_DTYPE record per slot."""
+
+    def __init__(self, path: str, num_slots: Optional[int] = None) -> None:
+        """Create path with num_slots records, or open it for reading if num_slots is None."""
+        self.path = path
+        if num_slots is not None:
+            size = HEADER_DTYPE.itemsize + num_slots * STATS_DTYPE.itemsize
+            # Readers may be polling path already: they see it only once
+            # the header is in
+            temporary_path = path + '.tmp'
+            with open(temporary_path, 'w+b') as block_file:
+                block_file.truncate(size)
+                self.map = mmap.mmap(block_file.fileno(), 0, access=mmap.ACCESS_WRITE)
+            header = np.ndarray(1, HEADER_DTYPE, self.map)
+            header[0] = (MAGIC, num_slots, STATS_DTYPE.itemsize)
+            os.replace(temporary_path, path)
+        else:
+            self.map = self.open_map(mmap.ACCESS_READ)
+            header = np.ndarray(1, HEADER_DTYPE, self.map)
+            if header['magic'][0] != MAGIC or header['record_size'][0] != STATS_DTYPE.itemsize:
+                raise ValueError("%s is not a telemetry block" % path)
+            num_slots = int(header['slots'][0])
+        self.records = np.ndarray(num_slots, STATS_DTYPE, self.map, offset=HEADER_DTYPE.itemsize)
+
+    def open_map(self, access: int) -> mmap.mmap:
+        with open(self.path, 'r+b' if access == mmap.ACCESS_WRITE else 'rb') as block_file:
+            return mmap.mmap(block_file.fileno(), 0, access=access)
+
+    def write(self, index: int, values: Tuple) -> None:
+        """values are the record's fields after version."""
+        records = self.records
+        version = int(records['version'][index])
+        # Odd while the record is being written
+        records['version'][index] = version + 1
+        records[index] = (version + 1,) + values
+        records['version'][index] = version + 2
+
+    def read(self) -> np.ndarray:
+        """A consistent copy of every record."""
+        records = np.empty_like(self.records)
+        versions = self.records['version']
+        for index in range(len(records)):
+            for _ in range(READ_RETRIES):
+                version = int(versions[index])
+                records[index] = self.records[index]
+                if version % 2 == 0 and int(versions[index]) == version:
+                    break
+        return records
+
+    def close(self) -> None:
+        # The map cannot close while the array still exports it
+        del self.records
+        self.map.close()
+
+
+def read_stats(path: str) -> np.ndarray:
+    block = TelemetryBlock(path)
+    try:
+        return block.read()
+    finally:
+        block.close()
+
+
+class TelemetryPublisher(object):
+    def __init__(self, path: str, interval: float = DEFAULT_INTERVAL) -> None:
+        self.path = path
+        self.interval = interval
+        self.senders: List = []
+        self.peers: List = []
+        self.block: Optional[TelemetryBlock] = None
+        self.thread: Optional[threading.Thread] = None
+        self.stopped = threading.Event()
+        # (time, total ACKs) at the previous sample of each sender
+        self.previous: List[Tuple[float, int]] = []
+
+    def add_sender(self, sender) -> None:
+        """A Sender, SimulatedFlow or AsyncSender. Must be added before start()."""
+        self.senders.append(sender)
+        self.previous.append((time.time(), 0))
+
+    def add_peer(self, peer) -> None:
+        """A receiver's Peer. Must be added before start()."""
+        self.peers.append(peer)
+
+    def add_receiver(self, receiver) -> None:
+        for peer in receiver.peers.values():
+            self.add_peer(peer)
+
+    def sample(self) -> None:
+        """Write a record for every flow now."""
+        if self.block is None:
+            self.block = TelemetryBlock(self.path, len(self.senders) + len(self.peers))
+        now = time.time()
+        for index, sender in enumerate(self.senders):
+            strategy = sender.strategy
+            in_flight = strategy.seq_num - strategy.next_ack
+            srtt = strategy.srtt
+            previous_time, previous_acks = self.previous[index]
+            acks = strategy.total_acks
+            ack_rate = (acks - previous_acks) / (now - previous_time) if now > previous_time else 0.0
+            self.previous[index] = (now, acks)
+            self.block.write(index, (
+                now, sender.port, SENDER, getattr(strategy, 'cwnd', math.nan),
+                getattr(strategy, 'slow_start_thresh', math.nan), in_flight,
+                math.nan if srtt is None else srtt, acks, strategy.num_duplicate_acks, ack_rate, 0, 0, 0,
+            ))
+        for index, peer in enumerate(self.peers, len(self.senders)):
+            self.block.write(index, (
+                now, peer.port, RECEIVER, math.nan, math.nan, 0, math.nan, 0, 0, 0.0,
+                peer.window_occupancy(), peer.segments_received, peer.acks_sent,
+            ))
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def start(self) -> 'TelemetryPublisher':
+        self.sample()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Take a last sample and stop. The file stays for readers."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.block is not None:
+            self.sample()
+            self.block.close()
+            self.block = None
+
+
+def format_stats(records: np.ndarray) -> str:
+    """A table of records, one line per flow."""
+    lines = ["%-9s %6s %9s %9s %9s %9s %10s %9s %9s" % (
+        'role', 'flow', 'cwnd', 'ssthresh', 'inflight', 'srtt_ms', 'acks/s', 'dup_acks', 'window')]
+    for record in records:
+        if record['role'] == SENDER:
+            lines.append("%-9s %6d %9.1f %9.1f %9d %9.2f %10.0f %9d %9s" % (
+                'sender', record['flow'], record['cwnd'], record['ssthresh'], record['in_flight'],
+                record['srtt'] * 1000, record['ack_rate'], record['duplicate_acks'], '-'))
+        elif record['role'] == RECEIVER:
+            lines.append("%-9s %6d %9s %9s %9s %9s %10s %9s %9d" % (
+                'receiver', record['flow'], '-', '-', '-', '-', '-', '-', record['window_occupancy']))
+    return "\n".join(lines)
+
@@ -0,0 +1,92 @@
+"""
+Retransmission timeouts, as specified in RFC 6298.
+
+RttEstimator turns RTT samples into SRTT, RTTVAR and the retransmission
+timeout (RTO), and doubles the RTO each time it expires. RetransmissionTimer
+is the single timer a strategy keeps for its oldest outstanding segment.
+Strategies expose the timer's deadline through next_timeout(), and the
+runners use wakeup_time() to sleep until it instead of polling.
+"""
+
+from typing import Optional
+
+# Gains from RFC 6298 section 2
+ALPHA = 0.125
+BETA = 0.25
+K = 4
+INITIAL_RTO = 1.0  # seconds
+# RFC 6298 asks for at least 1 second; like Linux, go lower so that a tail
+# loss on a short path does not idle the link for many round trips
+MIN_RTO = 0.2  # seconds
+MAX_RTO = 60.0  # seconds
+# Resolution of the clocks the strategies read
+CLOCK_GRANULARITY = 0.001  # seconds
+
+
+class RttEstimator(object):
+    def __init__(self, initial_rto: float = INITIAL_RTO, min_rto: float = MIN_RTO,
+                 max_rto: float = MAX_RTO) -> None:
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.rto = initial_rto
+        # Expirations since the last RTT sample
+        self.backoffs = 0
+
+    def on_sample(self, rtt: float) -> None:
+        """
+        Fold in an RTT measurement. Per Karn's rule, callers must not pass
+        samples from ACKs of retransmitted segments.
+        """
+        if self.srtt is None or self.rttvar is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - BETA) * self.rttvar + BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - ALPHA) * self.srtt + ALPHA * rtt
+        self.rto = min(self.max_rto, max(self.min_rto, self.srtt + max(CLOCK_GRANULARITY, K * self.rttvar)))
+        self.backoffs = 0
+
+    def backoff(self) -> None:
+        """Double the RTO after it expired (RFC 6298 section 5.5)."""
+        self.rto = min(self.max_rto, self.rto * 2)
+        self.backoffs += 1
+
+
+class RetransmissionTimer(object):
+    """
+    A single retransmission timer (RFC 6298 section 5). It is started when
+    a segment is sent and none is running, restarted when an ACK covers new
+    data and stopped once nothing is outstanding.
+    """
+
+    def __init__(self, estimator: RttEstimator) -> None:
+        self.estimator = estimator
+        self.deadline: Optional[float] = None
+
+    def is_running(self) -> bool:
+        return self.deadline is not None
+
+    def start(self, now: float) -> None:
+        self.deadline = now + self.estimator.rto
+
+    def start_if_stopped(self, now: float) -> None:
+        if self.deadline is None:
+            self.start(now)
+
+    def stop(self) -> None:
+        self.deadline = None
+
+    def expired(self, now: float) -> bool:
+        return self.deadline is not None and now >= self.deadline
+
+
+def wakeup_time(deadline: Optional[float], now: float, idle_interval: float) -> float:
+    """
+    When a runner should next ask a strategy whose window is closed for a
+    segment: at its timer deadline, or after idle_interval if it has none.
+    """
+    if deadline is None:
+        return now + idle_interval
+    return max(now, deadline)
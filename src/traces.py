@@ -0,0 +1,99 @@
+"""
+Loading and summarizing mahimahi trace files.
+
+Parsing the large traces line by line takes seconds, so the first load
+compiles a trace into a .npy array next to the source file and later
+loads memory-map it. The cache is rebuilt whenever the .trace file is
+newer than it. The cache is written under a temporary name and renamed
+into place, so a process loading a trace while another compiles it
+never maps a half-written file.
+"""
+
+import os
+from typing import Dict, Optional
+import numpy as np
+from src.link import MTU, IP_UDP_OVERHEAD, TRACE_DIR
+from src.protocol import BINARY_HEADER
+
+# Window over which peak rate and burstiness are measured
+RATE_WINDOW_MS = 100
+
+
+def trace_path(trace_file: str, trace_dir: str = TRACE_DIR) -> str:
+    return os.path.join(trace_dir, trace_file)
+
+
+def cache_path(path: str) -> str:
+    return path + '.npy'
+
+
+def compile_trace(path: str) -> np.ndarray:
+    """Parse a .trace file and write its timestamps to the .npy cache."""
+    with open(path, 'rb') as trace_file:
+        timestamps = np.array(trace_file.read().split(), dtype=np.int64)
+    cached = cache_path(path)
+    # Per process, so concurrent compiles don't write into each other's file
+    temporary_path = '%s.%d.tmp' % (cached, os.getpid())
+    try:
+        with open(temporary_path, 'wb') as cache_file:
+            np.save(cache_file, timestamps)
+        os.replace(temporary_path, cached)
+    except OSError:
+        # Read-only trace directory, go without a cache
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+    return timestamps
+
+
+def load_trace(path: str) -> np.ndarray:
+    """Delivery opportunity timestamps (ms) of a trace, memory-mapped from the cache."""
+    cached = cache_path(path)
+    if os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(path):
+        return np.load(cached, mmap_mode='r')
+    return compile_trace(path)
+
+
+def trace_statistics(timestamps: np.ndarray, delay: Optional[int] = None,
+                     window_ms: int = RATE_WINDOW_MS) -> Dict:
+    """
+    Rates are in bytes per second. burstiness is the coefficient of
+    variation of the rate across window_ms windows, and peak_to_mean the
+    ratio of the busiest window to the average. When delay (one-way, in
+    ms, as in the mahimahi settings) is given, the bandwidth-delay product
+    over the resulting round trip is included too.
+    """
+    period_ms = int(timestamps[-1])
+    window_ms = min(window_ms, period_ms)
+    mean_rate = len(timestamps) * MTU * 1000.0 / period_ms
+
+    per_window = np.bincount(np.asarray(timestamps) // window_ms)[:max(1, period_ms // window_ms)]
+    window_rates = per_window * MTU * 1000.0 / window_ms
+    stats = {
+        'opportunities': len(timestamps),
+        'period_ms': period_ms,
+        'mean_rate': mean_rate,
+        'peak_rate': float(window_rates.max()),
+        'min_rate': float(window_rates.min()),
+        'burstiness': float(window_rates.std() / window_rates.mean()) if window_rates.mean() > 0 else 0.0,
+        'peak_to_mean': float(window_rates.max() / mean_rate),
+    }
+    if delay is not None:
+        stats['bdp_bytes'] = mean_rate * 2 * delay / 1000.0
+    return stats
+
+
+def suggest_settings(trace_file: str, delay: int, segment_size: int = BINARY_HEADER.size,
+                     trace_dir: str = TRACE_DIR) -> Dict:
+    """
+    mahimahi settings sized from the trace: a queue of one bandwidth-delay
+    product, plus the number of segment_size-byte segments (as counted on
+    the wire) that fill the pipe, which is a sensible initial window.
+    """
+    stats = trace_statistics(load_trace(trace_path(trace_file, trace_dir)), delay)
+    bdp_bytes = int(stats['bdp_bytes'])
+    return {
+        'delay': delay,
+        'queue_size': bdp_bytes,
+        'trace_file': trace_file,
+        'initial_cwnd': max(1, bdp_bytes // (segment_size + IP_UDP_OVERHEAD)),
+    }
@@ -0,0 +1,31 @@
+import asyncio
+import unittest
+from src.aio import AsyncReceiver, AsyncSender, run_senders
+from src.helpers import get_open_udp_port
+from src.strategies import TahoeStrategy, FixedWindowStrategy
+
+
+class TestAsyncTransport(unittest.TestCase):
+    def test_flows_over_loopback(self):
+        async def experiment():
+            senders = [
+                AsyncSender(get_open_udp_port(), TahoeStrategy(10, 1)),
+                AsyncSender(get_open_udp_port(), FixedWindowStrategy(10), protocol='binary')
+            ]
+            for sender in senders:
+                await sender.open()
+
+            receiver = AsyncReceiver([('127.0.0.1', sender.port) for sender in senders])
+            handshake = asyncio.ensure_future(receiver.perform_handshakes())
+            await run_senders(senders, 0.3)
+            self.assertTrue(await handshake)
+
+            for sender in senders:
+                sender.close()
+            receiver.cleanup()
+            return senders
+
+        senders = asyncio.run(experiment())
+        for sender in senders:
+            self.assertIsNotNone(sender.peer_addr)
+            self.assertGreater(sender.strategy.ack_count, 0)
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from src.analysis import (split_flows, rtt_samples, queueing_delays, window_edges, windowed_rate,
+                          windowed_percentiles, loss_episodes, flow_time_series, flow_table, aggregate_table)
+from src.eventlog import EventLog, read_events, EVENT_DTYPE, SEND, RETRANSMIT, ACK, TIMEOUT, FAST_RETRANSMIT
+from src.protocol import BINARY_HEADER
+from src.simulator import Simulation
+from src.strategies import TahoeStrategy, NewRenoStrategy
+
+
+def make_events(records):
+    events = np.zeros(len(records), dtype=EVENT_DTYPE)
+    for index, (time, flow, kind, seq_num) in enumerate(records):
+        events[index] = (time, seq_num, 0.0, flow, kind)
+    return events
+
+
+class TestWindows(unittest.TestCase):
+    def test_percentiles_match_numpy(self):
+        rng = np.random.RandomState(0)
+        times = rng.uniform(0, 10, 5000)
+        values = rng.exponential(20, 5000)
+        edges = window_edges(0, 10, 2.0)
+        result = windowed_percentiles(times, values, edges, (5, 50, 99))
+
+        for window in range(5):
+            in_window = values[(times >= 2 * window) & (times < 2 * window + 2)]
+            np.testing.assert_allclose(result[window], np.percentile(in_window, [5, 50, 99]))
+
+    def test_empty_windows(self):
+        edges = window_edges(0, 3, 1.0)
+        result = windowed_percentiles(np.array([0.5, 2.5]), np.array([1.0, 3.0]), edges, (50,))
+        self.assertEqual(result[0, 0], 1.0)
+        self.assertTrue(np.isnan(result[1, 0]))
+        self.assertEqual(list(windowed_rate(np.array([0.5, 2.5, 2.7]), None, edges)), [1, 0, 2])
+
+
+class TestEvents(unittest.TestCase):
+    def test_rtts_skip_retransmitted_segments(self):
+        events = make_events([
+            (0.0, 1, SEND, 0), (0.0, 1, SEND, 1), (0.1, 1, ACK, 0),
+            (0.3, 1, RETRANSMIT, 1), (0.35, 1, ACK, 1),
+            (0.4, 1, SEND, 2), (0.6, 1, ACK, 2),
+        ])
+        times, rtts = rtt_samples(events)
+        self.assertEqual(list(times), [0.1, 0.6])
+        np.testing.assert_allclose(rtts, [0.1, 0.2])
+        np.testing.assert_allclose(queueing_delays(rtts), [0.0, 0.1])
+
+    def test_loss_episodes(self):
+        events = make_events([
+            (1.0, 0, FAST_RETRANSMIT, 5), (1.05, 0, FAST_RETRANSMIT, 9), (1.1, 0, TIMEOUT, 5),
+            (3.0, 0, FAST_RETRANSMIT, 40),
+        ])
+        episodes = loss_episodes(events, gap=0.2)
+        self.assertEqual(list(episodes['losses']), [3, 1])
+        self.assertEqual(list(episodes['start']), [1.0, 3.0])
+        self.assertEqual(episodes['end'][0], 1.1)
+
+    def test_split_flows(self):
+        events = make_events([(0.0, 2, SEND, 0), (0.1, 1, SEND, 0), (0.2, 2, SEND, 1)])
+        flows = split_flows(events)
+        self.assertEqual(sorted(flows), [1, 2])
+        self.assertEqual(list(flows[2]['seq_num']), [0, 1])
+
+
+class TestRecordedRun(unittest.TestCase):
+    settings = {
+        'delay': 10,
+        'queue_size': 3000,
+        'trace_file': '12mbps.trace'
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        cls.log_dir = tempfile.mkdtemp()
+        path = os.path.join(cls.log_dir, 'events.bin')
+        cls.strategies = [TahoeStrategy(10, 1), NewRenoStrategy(10, 1)]
+        with EventLog(path) as event_log:
+            Simulation(cls.settings, cls.strategies, event_log=event_log).run(5)
+        cls.events = read_events(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.log_dir)
+
+    def test_flow_table(self):
+        table = flow_table(self.events, BINARY_HEADER.size)
+        self.assertEqual(list(table['flow']), [0, 1])
+        for index, strategy in enumerate(self.strategies):
+            duration = table['duration'][index]
+            self.assertAlmostEqual(table['goodput'][index],
+                                   strategy.acked_segments * BINARY_HEADER.size / duration)
+            self.assertGreater(table['retransmission_rate'][index], 0)
+            self.assertGreater(table['loss_episodes'][index], 0)
+            self.assertGreaterEqual(table['throughput'][index], table['goodput'][index])
+            # The log's RTTs agree with the strategy's own samples
+            self.assertAlmostEqual(table['rtt_p50_ms'][index], strategy.rtts.percentile(50) * 1000, delta=1)
+
+        aggregate = aggregate_table(table)
+        self.assertEqual(aggregate['flows'], 2)
+        self.assertAlmostEqual(aggregate['goodput'], table['goodput'].sum())
+        self.assertGreater(aggregate['fairness'], 0.5)
+        self.assertLessEqual(aggregate['fairness'], 1.0)
+
+    def test_time_series(self):
+        flow_events = split_flows(self.events)[0]
+        series = flow_time_series(flow_events, BINARY_HEADER.size, window=0.5)
+        self.assertEqual(len(series['time']), 10)
+        # ACKs trail sends by a round trip, so compare over the whole run
+        self.assertGreaterEqual(series['throughput'].sum(), series['goodput'].sum())
+        self.assertTrue((series['rtt_p99_ms'] >= series['rtt_p50_ms']).all())
+        self.assertTrue((series['queueing_delay_p50_ms'] >= 0).all())
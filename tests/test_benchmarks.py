@@ -0,0 +1,42 @@
+import random
+import unittest
+from benchmarks.bench_receiver import arrival_order
+from benchmarks.bench_strategy import arrange
+from benchmarks.suite import regressions, scaling_problems
+
+
+class TestArrivalOrder(unittest.TestCase):
+    def test_every_segment_arrives_once(self):
+        for pattern in ('in_order', 'reordered', 'lossy'):
+            self.assertEqual(sorted(arrival_order(1000, 100, pattern)), list(range(1000)))
+
+    def test_lost_segments_arrive_at_the_end_of_their_window(self):
+        order = arrival_order(200, 100, 'lossy')
+        self.assertEqual(set(order[:100]), set(range(100)))
+        self.assertNotEqual(order[:100], list(range(100)))
+
+
+class TestArrange(unittest.TestCase):
+    def test_timeout_loses_only_the_new_tail(self):
+        segments = [bytes([index]) for index in range(200)]
+        self.assertEqual(arrange(segments, 'timeout', random.Random(0)), segments[:198])
+        self.assertEqual(arrange(segments[:3], 'timeout', random.Random(0), resent=3), segments[:3])
+
+
+class TestSuite(unittest.TestCase):
+    def test_regression_beyond_threshold(self):
+        baseline = {'peer/in_order/10': 1000.0, 'protocol/binary': 1000.0}
+        rates = {'peer/in_order/10': 850.0, 'protocol/binary': 700.0, 'loopback/batched': 5.0}
+        problems = regressions(rates, baseline, 0.2)
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith('protocol/binary'))
+
+    def test_rate_falling_with_window(self):
+        rates = {
+            'peer/in_order/10': 1000.0, 'peer/in_order/100000': 900.0,
+            'tahoe/lossy/10': 1000.0, 'tahoe/lossy/1000': 600.0, 'tahoe/lossy/100000': 10.0,
+            'protocol/binary': 1.0,
+        }
+        problems = scaling_problems(rates, 0.25)
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith('tahoe/lossy'))
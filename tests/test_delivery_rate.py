@@ -0,0 +1,61 @@
+import unittest
+from src.delivery_rate import DeliveryRateEstimator, WindowedMaxFilter
+
+
+class TestDeliveryRateEstimator(unittest.TestCase):
+    def test_rate_of_a_steady_flow(self):
+        # A window of 10 segments, one delivered every 10 ms
+        estimator = DeliveryRateEstimator()
+        segments = []
+        for seq_num in range(10):
+            segment = {'seq_num': seq_num, 'send_ts': 0.0}
+            estimator.on_send(segment, 0.0, seq_num)
+            segments.append(segment)
+
+        samples = []
+        for seq_num, segment in enumerate(list(segments)):
+            now = 0.1 + 0.01 * seq_num
+            samples.append(estimator.on_ack(segment, 1, now))
+            # Every ACK lets another segment out
+            next_segment = {'seq_num': 10 + seq_num, 'send_ts': now}
+            estimator.on_send(next_segment, now, 9)
+            segments.append(next_segment)
+
+        self.assertEqual(estimator.delivered, 10)
+        # The first window is measured from the first ACK...
+        self.assertAlmostEqual(samples[-1].delivery_rate, 10 / 0.19)
+        # ...and the next over a round trip, at the full rate
+        sample = estimator.on_ack(segments[10], 1, 0.2)
+        self.assertEqual(sample.delivered, 10)
+        self.assertAlmostEqual(sample.interval, 0.1)
+        self.assertAlmostEqual(sample.delivery_rate, 100.0)
+
+    def test_ack_compression_does_not_inflate_rate(self):
+        estimator = DeliveryRateEstimator()
+        segments = []
+        for seq_num in range(10):
+            segment = {'seq_num': seq_num, 'send_ts': 0.01 * seq_num}
+            estimator.on_send(segment, segment['send_ts'], seq_num)
+            segments.append(segment)
+        # All of the ACKs arrive together, the send interval is the longer one
+        sample = estimator.on_ack(segments[-1], 10, 0.2)
+        self.assertAlmostEqual(sample.interval, 0.2)
+        self.assertAlmostEqual(sample.delivery_rate, 50.0)
+
+    def test_unstamped_segments_only_count(self):
+        estimator = DeliveryRateEstimator()
+        self.assertIsNone(estimator.on_ack(None, 3, 1.0))
+        self.assertIsNone(estimator.on_ack({'seq_num': 0, 'send_ts': 0.0}, 1, 1.0))
+        self.assertEqual(estimator.delivered, 4)
+
+
+class TestWindowedMaxFilter(unittest.TestCase):
+    def test_max_expires(self):
+        window = WindowedMaxFilter(3)
+        self.assertEqual(window.get(), 0.0)
+        for now, value in enumerate([5, 9, 4, 6, 3, 2, 1]):
+            window.update(value, now)
+        # Only the samples from 4 on are in the window
+        self.assertEqual(window.get(), 3)
+        window.update(1, 7)
+        self.assertEqual(window.get(), 2)
@@ -0,0 +1,92 @@
+import socket
+import unittest
+from src.emulator import LinkEmulator, TimerWheel
+from src.helpers import get_open_udp_port
+
+NUM_DATAGRAMS = 100
+
+
+class TestTimerWheel(unittest.TestCase):
+    def test_expires_in_due_order(self):
+        wheel = TimerWheel(num_slots=16)
+        wheel.schedule(5.5, 'b')
+        wheel.schedule(2, 'a')
+        wheel.schedule(5.9, 'c')
+
+        self.assertEqual(wheel.next_due_ms(), 2)
+        self.assertEqual(wheel.expire(1.9), [])
+        self.assertEqual(wheel.expire(2), ['a'])
+        # Fractional due times round up to the next tick
+        self.assertEqual(wheel.expire(5.9), [])
+        self.assertEqual(wheel.expire(6), ['b', 'c'])
+        self.assertEqual(len(wheel), 0)
+        self.assertIsNone(wheel.next_due_ms())
+
+    def test_overflow_beyond_wheel_span(self):
+        wheel = TimerWheel(num_slots=8)
+        wheel.schedule(3, 'near')
+        wheel.schedule(20, 'far')
+
+        self.assertEqual(wheel.expire(10), ['near'])
+        self.assertEqual(wheel.next_due_ms(), 20)
+        self.assertEqual(wheel.expire(19), [])
+        self.assertEqual(wheel.expire(25), ['far'])
+
+    def test_past_due_items_expire_next(self):
+        wheel = TimerWheel(num_slots=8)
+        wheel.expire(10)
+        wheel.schedule(4, 'late')
+        self.assertEqual(wheel.expire(11), ['late'])
+
+    def test_next_due_follows_expiry(self):
+        wheel = TimerWheel(num_slots=16)
+        wheel.schedule(9, 'late')
+        wheel.schedule(3, 'early')
+        self.assertEqual(wheel.next_due_ms(), 3)
+        wheel.expire(5)
+        self.assertEqual(wheel.next_due_ms(), 9)
+        wheel.schedule(7, 'middle')
+        self.assertEqual(wheel.next_due_ms(), 7)
+
+
+class TestLinkEmulator(unittest.TestCase):
+    def test_relay_queues_and_drops(self):
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.bind(('127.0.0.1', 0))
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        relay_port = get_open_udp_port()
+        settings = {'delay': 5, 'queue_size': 2000, 'trace_file': '12mbps.trace'}
+        emulator = LinkEmulator(settings, [(sender.getsockname()[1], relay_port)])
+        flow = emulator.flows[0]
+
+        # The receiver speaks first, as its handshake does, so the relay
+        # learns where to deliver to
+        receiver.sendto(b'handshake', ('127.0.0.1', relay_port))
+        # A burst of 100-byte datagrams far bigger than the 2000-byte queue
+        for _ in range(NUM_DATAGRAMS):
+            sender.sendto(b'x' * 100, flow.sender_sock.getsockname())
+        emulator.run(0.3)
+        stats = emulator.stats()
+        emulator.cleanup()
+
+        receiver.setblocking(False)
+        delivered = 0
+        while True:
+            try:
+                receiver.recvfrom(1600)
+            except BlockingIOError:
+                break
+            delivered += 1
+        self.assertEqual(sender.recvfrom(1600)[0], b'handshake')
+        sender.close()
+        receiver.close()
+
+        downlink = stats['downlink']
+        self.assertEqual(downlink['enqueued'] + downlink['drops'], NUM_DATAGRAMS)
+        self.assertGreater(downlink['drops'], 0)
+        # The queue never held more than its limit, and everything it took was delivered
+        self.assertLessEqual(downlink['max_queue_bytes'], 2000)
+        self.assertEqual(downlink['delivered'], downlink['enqueued'])
+        self.assertEqual(delivered, downlink['delivered'])
+        self.assertEqual(stats['uplink']['delivered'], 1)
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from src.eventlog import (EventLog, read_events, EVENT_RECORD, SEND, RETRANSMIT, ACK, DUPLICATE_ACK,
+                          TIMEOUT, FAST_RETRANSMIT, RECEIVE, ACK_SENT)
+from src.simulator import Simulation
+from src.strategies import TahoeStrategy, NewRenoStrategy
+
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.log_dir, 'events.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.log_dir)
+
+    def test_round_trip_across_chunks(self):
+        with EventLog(self.path, chunk_records=4) as event_log:
+            for seq_num in range(10):
+                event_log.append(0.5 * seq_num, 7, SEND, seq_num, 3.0)
+        self.assertEqual(os.path.getsize(self.path), 10 * EVENT_RECORD.size)
+
+        events = read_events(self.path)
+        self.assertEqual(list(events['seq_num']), list(range(10)))
+        self.assertEqual(events['time'][4], 2.0)
+        self.assertTrue((events['flow'] == 7).all())
+        self.assertTrue((events['kind'] == SEND).all())
+        self.assertTrue((events['value'] == 3.0).all())
+
+    def test_appends_to_existing_log(self):
+        with EventLog(self.path) as event_log:
+            event_log.append(1.0, 0, SEND, 0)
+        with EventLog(self.path) as event_log:
+            event_log.append(2.0, 0, ACK, 0)
+        self.assertEqual(list(read_events(self.path)['kind']), [SEND, ACK])
+
+    def test_reads_log_that_was_not_closed(self):
+        event_log = EventLog(self.path)
+        event_log.append(1.0, 0, SEND, 0)
+        event_log.flush()
+        # The rest of the chunk is allocated but not written
+        self.assertEqual(len(read_events(self.path)), 1)
+        event_log.close()
+
+    def test_empty_log(self):
+        EventLog(self.path).close()
+        self.assertEqual(len(read_events(self.path)), 0)
+
+
+class TestLoggedSimulation(unittest.TestCase):
+    settings = {
+        'delay': 10,
+        'queue_size': 3000,
+        'trace_file': '12mbps.trace'
+    }
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.log_dir, 'events.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.log_dir)
+
+    def run_logged(self, strategies):
+        with EventLog(self.path) as event_log:
+            simulation = Simulation(self.settings, strategies, event_log=event_log).run(2)
+        return simulation, read_events(self.path)
+
+    def test_logs_both_ends_of_each_flow(self):
+        strategies = [TahoeStrategy(10, 1), NewRenoStrategy(10, 1)]
+        simulation, events = self.run_logged(strategies)
+
+        for flow in simulation.flows:
+            flow_events = events[events['flow'] == flow.port]
+            counts = np.bincount(flow_events['kind'], minlength=ACK_SENT + 1)
+            self.assertEqual(counts[SEND] + counts[RETRANSMIT], flow.io_stats.packets_sent)
+            self.assertEqual(counts[ACK], flow.strategy.ack_count)
+            self.assertEqual(counts[ACK] + counts[DUPLICATE_ACK], flow.strategy.total_acks)
+            self.assertEqual(counts[ACK_SENT], flow.peer.acks_sent)
+            self.assertGreater(counts[RECEIVE], 0)
+            # The queue is small enough to lose segments
+            self.assertGreater(counts[FAST_RETRANSMIT] + counts[TIMEOUT], 0)
+            self.assertGreater(counts[RETRANSMIT], 0)
+        # Records are in virtual time order
+        self.assertTrue((np.diff(events['time']) >= 0).all())
+
+    def test_loss_events_carry_the_window(self):
+        strategy = TahoeStrategy(10, 1)
+        _, events = self.run_logged([strategy])
+        # Tahoe collapses the window to one segment on any loss
+        losses = events[(events['kind'] == FAST_RETRANSMIT) | (events['kind'] == TIMEOUT)]
+        self.assertTrue((losses['value'] == 1).all())
@@ -0,0 +1,67 @@
+import pickle
+import unittest
+from unittest import mock
+import numpy as np
+from src.metrics import MetricSeries, RingSeries, TimestampedSeries, new_series
+
+
+class TestMetricSeries(unittest.TestCase):
+    def test_grows_across_chunks(self):
+        with mock.patch('src.metrics.CHUNK_SIZE', 4):
+            series = MetricSeries()
+            for i in range(10):
+                series.append(i)
+            self.assertEqual(len(series.chunks), 3)
+            self.assertEqual(len(series), 10)
+            self.assertEqual(list(series), list(range(10)))
+            self.assertEqual(series[5], 5)
+            self.assertEqual(series[-1], 9)
+            self.assertEqual(list(series.to_numpy()), list(range(10)))
+            self.assertEqual(series.mean(), 4.5)
+            self.assertEqual(series.min(), 0)
+            self.assertEqual(series.max(), 9)
+
+    def test_survives_pickling(self):
+        series = MetricSeries()
+        series.append(1.0)
+        copy = pickle.loads(pickle.dumps(series))
+        copy.append(2.0)
+        self.assertEqual(list(copy), [1.0, 2.0])
+        self.assertEqual(list(series), [1.0])
+
+
+class TestRingSeries(unittest.TestCase):
+    def test_keeps_latest_samples_and_aggregates_all(self):
+        series = RingSeries(4)
+        for i in range(1, 11):
+            series.append(i)
+        self.assertEqual(list(series), [7, 8, 9, 10])
+        self.assertEqual(list(series.to_numpy()), [7, 8, 9, 10])
+        self.assertEqual(series[0], 7)
+        self.assertEqual(series.count, 10)
+        self.assertEqual(series.mean(), 5.5)
+        self.assertEqual(series.min(), 1)
+        self.assertEqual(series.max(), 10)
+
+    def test_percentiles_are_approximate(self):
+        values = np.random.RandomState(0).lognormal(-1.5, 0.5, 10000)
+        series = RingSeries(16)
+        for value in values:
+            series.append(value)
+        for p in (50, 95, 99):
+            self.assertAlmostEqual(series.percentile(p) / np.percentile(values, p), 1.0, delta=0.02)
+
+
+class TestTimestampedSeries(unittest.TestCase):
+    def test_behaves_like_list_of_tuples(self):
+        for capacity in (None, 2):
+            series = TimestampedSeries(capacity)
+            for sample in [(0.5, 1), (1.5, 2), (2.5, 3)]:
+                series.append(sample)
+            expected = [(1.5, 2), (2.5, 3)] if capacity else [(0.5, 1), (1.5, 2), (2.5, 3)]
+            self.assertEqual(list(series), expected)
+            self.assertEqual(series[-1], (2.5, 3))
+
+    def test_new_series(self):
+        self.assertIsInstance(new_series(), MetricSeries)
+        self.assertIsInstance(new_series(8), RingSeries)
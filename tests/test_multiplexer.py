@@ -0,0 +1,76 @@
+import collections
+import select
+import socket
+import threading
+import time
+import unittest
+from src.helpers import get_open_udp_port
+from src.multiplexer import run_multiplexed
+from src.protocol import get_protocol
+from src.receiver import Receiver
+from src.senders import Sender
+from src.strategies import FixedWindowStrategy
+
+NUM_SENDERS = 4
+
+
+class AckingPeer(object):
+    """A socket on a thread that ACKs every segment sent to it, counting them by sender port."""
+
+    def __init__(self) -> None:
+        self.protocol = get_protocol('binary')
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.segments_from: collections.Counter = collections.Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            if not select.select([self.sock], [], [], 0.05)[0]:
+                continue
+            datagram, addr = self.sock.recvfrom(1600)
+            self.segments_from[addr[1]] += 1
+            ack = Receiver.construct_ack(self.protocol.decode(datagram), len(datagram))
+            self.sock.sendto(self.protocol.encode(ack), addr)
+
+    def stop(self) -> None:
+        # Let the last segments of the run arrive first
+        time.sleep(0.1)
+        self.stopped.set()
+        self.thread.join()
+        self.sock.close()
+
+
+class TestRunMultiplexed(unittest.TestCase):
+    def run_senders(self, num_processes):
+        peer = AckingPeer()
+        senders = [Sender(get_open_udp_port(), FixedWindowStrategy(10), protocol='binary')
+                   for _ in range(NUM_SENDERS)]
+        for sender in senders:
+            sender.peer_addr = peer.sock.getsockname()
+        try:
+            run_multiplexed(senders, 0.3, num_processes)
+        finally:
+            peer.stop()
+            for sender in senders:
+                sender.sock.close()
+        return senders, peer
+
+    def check_results(self, senders, peer):
+        for sender in senders:
+            strategy, io_stats = sender.strategy, sender.io_stats
+            self.assertGreater(strategy.total_acks, 0)
+            self.assertEqual(io_stats.packets_received, strategy.total_acks)
+            self.assertEqual(io_stats.packets_sent, peer.segments_from[sender.port])
+            self.assertEqual(strategy.seq_num, io_stats.packets_sent)
+            self.assertGreater(io_stats.syscalls, 0)
+
+    def test_single_loop(self):
+        self.check_results(*self.run_senders(num_processes=1))
+
+    def test_forked_shards_report_back(self):
+        senders, peer = self.run_senders(num_processes=2)
+        # The parent's senders carry what their copies in the children did
+        self.check_results(senders, peer)
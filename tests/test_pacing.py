@@ -0,0 +1,63 @@
+import socket
+import unittest
+from src.aio import AsyncSender
+from src.helpers import get_open_udp_port
+from src.multiplexer import MultiplexedRunner
+from src.pacing import Pacer
+from src.senders import Sender
+from src.strategies import BbrStrategy, FixedWindowStrategy, TahoeStrategy
+
+
+class TestPacer(unittest.TestCase):
+    def test_fixed_rate(self):
+        pacer = Pacer(FixedWindowStrategy(10), rate=1000, slack=0.0)
+        self.assertEqual(pacer.time_until_departure(5.0), 0.0)
+        pacer.on_send(5.0, 100)
+        self.assertAlmostEqual(pacer.time_until_departure(5.0), 0.1)
+        pacer.on_send(5.0, 100)
+        self.assertAlmostEqual(pacer.time_until_departure(5.05), 0.15)
+
+    def test_follows_strategy(self):
+        strategy = FixedWindowStrategy(10)
+        pacer = Pacer(strategy, slack=0.0)
+        # Unpaced until there is an RTT sample
+        pacer.on_send(0.0, 100)
+        self.assertEqual(pacer.time_until_departure(0.0), 0.0)
+
+        strategy.record_rtt(0.1)
+        self.assertAlmostEqual(strategy.pacing_rate(), 125.0)
+        pacer.on_send(0.0, 100)
+        self.assertAlmostEqual(pacer.time_until_departure(0.0), 0.008)
+
+    def test_slow_start_paces_faster(self):
+        strategy = TahoeStrategy(slow_start_thresh=8, initial_cwnd=4)
+        strategy.record_rtt(0.1)
+        self.assertAlmostEqual(strategy.pacing_rate(), 80.0)
+        strategy.cwnd = 8
+        self.assertAlmostEqual(strategy.pacing_rate(), 100.0)
+
+    def test_idle_time_earns_no_burst(self):
+        pacer = Pacer(FixedWindowStrategy(10), rate=1000, slack=0.01)
+        pacer.on_send(0.0, 100)
+        pacer.on_send(10.0, 100)
+        self.assertAlmostEqual(pacer.time_until_departure(10.0), 0.09)
+
+
+class TestPacedRunners(unittest.TestCase):
+    def test_multiplexed_runner_paces(self):
+        sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sink.bind(('127.0.0.1', 0))
+        sender = Sender(get_open_udp_port(), FixedWindowStrategy(1000), protocol='binary', pacing_rate=2000)
+        sender.peer_addr = sink.getsockname()
+        segment_size = len(sender.protocol.encode({'seq_num': 0, 'send_ts': 0.0}))
+
+        MultiplexedRunner([sender]).run(0.5)
+        sender.sock.close()
+        sink.close()
+        # An unpaced run would have sent the whole window straight away
+        self.assertGreater(sender.io_stats.packets_sent, 1)
+        self.assertLess(sender.io_stats.packets_sent, 0.5 * 2000 / segment_size * 1.5 + 2)
+
+    def test_strategies_that_require_pacing_are_paced(self):
+        self.assertIsNotNone(AsyncSender(0, BbrStrategy()).pacer)
+        self.assertIsNone(AsyncSender(0, FixedWindowStrategy(10)).pacer)
@@ -0,0 +1,59 @@
+import json
+import time
+import unittest
+from src.protocol import BinaryProtocol, JsonProtocol, BINARY_HEADER, SACK_BLOCK, get_protocol
+
+
+class TestBinaryProtocol(unittest.TestCase):
+    def test_segment_round_trip(self):
+        protocol = BinaryProtocol()
+        segment = {
+          'seq_num': 42,
+          'send_ts': time.time(),
+          'sent_bytes': 10,
+          'ack_bytes': 33
+        }
+        serialized = protocol.encode(segment)
+        self.assertEqual(len(serialized), BINARY_HEADER.size)
+        self.assertEqual(protocol.decode(serialized), segment)
+
+    def test_missing_fields_default_to_zero(self):
+        protocol = BinaryProtocol()
+        decoded = protocol.decode(protocol.encode({'seq_num': 3, 'send_ts': 1.5}))
+        self.assertEqual(decoded['seq_num'], 3)
+        self.assertEqual(decoded['sent_bytes'], 0)
+        self.assertEqual(decoded['ack_bytes'], 0)
+
+    def test_ack_with_sack_blocks(self):
+        protocol = BinaryProtocol()
+        ack = {
+          'seq_num': 3,
+          'send_ts': 1.5,
+          'sent_bytes': 0,
+          'ack_bytes': 33,
+          'sack': [[7, 9], [5, 5]]
+        }
+        serialized = protocol.encode(ack)
+        self.assertEqual(len(serialized), BINARY_HEADER.size + 2 * SACK_BLOCK.size)
+        self.assertEqual(protocol.decode(serialized), ack)
+
+    def test_handshake(self):
+        protocol = BinaryProtocol()
+        decoded = protocol.decode(protocol.encode({'handshake': True}))
+        self.assertTrue(decoded.get('handshake'))
+        self.assertFalse(protocol.decode(protocol.encode({'seq_num': 0})).get('handshake'))
+
+
+class TestJsonProtocol(unittest.TestCase):
+    def test_is_plain_json(self):
+        protocol = JsonProtocol()
+        serialized = protocol.encode({'seq_num': 1, 'send_ts': 2.0})
+        self.assertEqual(json.loads(serialized), {'seq_num': 1, 'send_ts': 2.0})
+        self.assertEqual(protocol.decode(json.dumps({'handshake': True})), {'handshake': True})
+
+
+class TestGetProtocol(unittest.TestCase):
+    def test_unknown_protocol(self):
+        self.assertEqual(get_protocol('json').name, 'json')
+        with self.assertRaises(ValueError):
+            get_protocol('xml')
@@ -1,6 +1,12 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
 import unittest
 import time
-from src.receiver import Peer
+from src.protocol import get_protocol
+from src.receiver import Peer, Receiver
 
 TEST_PORT = 8888
 TEST_WINDOW_SIZE = 10
@@ -132,3 +138,195 @@ class TestPeer(unittest.TestCase):
         # Clears out window upon catchup
         self.assertEqual(len(peer.window), 1)
 
+    def test_duplicate_segments(self):
+        peer = Peer(TEST_PORT, TEST_WINDOW_SIZE)
+
+        for seq_num in [0, 2, 2, 0]:
+            peer.add_segment({
+              'seq_num': seq_num,
+              'send_ts': time.time(),
+              'sent_bytes': 10,
+              'ack_bytes': 10
+            })
+
+        self.assertEqual(peer.next_ack()['seq_num'], 0)
+        self.assertEqual([seg['seq_num'] for seg in peer.window], [0, 2])
+
+    def test_no_ack_before_first_in_order_segment(self):
+        peer = Peer(TEST_PORT, TEST_WINDOW_SIZE)
+        peer.add_segment({
+          'seq_num': 1,
+          'send_ts': time.time(),
+          'sent_bytes': 10,
+          'ack_bytes': 10
+        })
+
+        self.assertIsNone(peer.next_ack())
+        self.assertEqual(len(peer.window), 1)
+
+    def test_reversed_arrival(self):
+        num_segments = 1000
+        peer = Peer(TEST_PORT, num_segments + 1)
+
+        for seq_num in reversed(range(num_segments)):
+            peer.add_segment({
+              'seq_num': seq_num,
+              'send_ts': time.time(),
+              'sent_bytes': 10,
+              'ack_bytes': 10
+            })
+            self.assertEqual(peer.window_occupancy(), len(peer.window))
+
+        self.assertEqual(peer.next_ack()['seq_num'], num_segments - 1)
+        self.assertTrue(peer.window_has_no_missing_segments())
+        self.assertEqual(len(peer.window), 1)
+
+    def test_sack_blocks(self):
+        peer = Peer(TEST_PORT, TEST_WINDOW_SIZE, sack_blocks=2)
+
+        def receive(seq_num):
+            return peer.receive_segment({'seq_num': seq_num, 'send_ts': 0.0}, 10)
+
+        self.assertNotIn('sack', receive(0))
+        self.assertEqual(receive(2)['sack'], [[2, 2]])
+        self.assertEqual(receive(5)['sack'], [[5, 5], [2, 2]])
+        # The newest block comes first, then the lowest others
+        self.assertEqual(receive(7)['sack'], [[7, 7], [2, 2]])
+        self.assertEqual(receive(3)['sack'], [[2, 3], [5, 5]])
+
+        ack = receive(1)
+        self.assertEqual(ack['seq_num'], 3)
+        self.assertEqual(ack['sack'], [[5, 5], [7, 7]])
+        # The stored in-order segment is left as it was
+        self.assertNotIn('sack', peer.next_ack())
+
+    def test_sack_disabled(self):
+        peer = Peer(TEST_PORT, TEST_WINDOW_SIZE, sack_blocks=0)
+        peer.receive_segment({'seq_num': 0, 'send_ts': 0.0}, 10)
+        self.assertNotIn('sack', peer.receive_segment({'seq_num': 2, 'send_ts': 0.0}, 10))
+
+    def test_delayed_acks(self):
+        now = [10.0]
+        peer = Peer(TEST_PORT, TEST_WINDOW_SIZE, sack_blocks=0, ack_every=2, ack_delay=0.04)
+        peer.clock = lambda: now[0]
+
+        def receive(seq_num):
+            return peer.receive_segment({'seq_num': seq_num, 'send_ts': 0.0}, 10)
+
+        # Every second in-order segment is acknowledged
+        self.assertIsNone(receive(0))
+        self.assertEqual(peer.delayed_ack_deadline, 10.04)
+        self.assertEqual(receive(1)['seq_num'], 1)
+        self.assertIsNone(peer.delayed_ack_deadline)
+
+        # ...or the first of them once the timer runs out
+        self.assertIsNone(receive(2))
+        self.assertIsNone(peer.flush_delayed_ack())
+        now[0] = 10.05
+        self.assertEqual(peer.flush_delayed_ack()['seq_num'], 2)
+        self.assertIsNone(peer.flush_delayed_ack())
+
+        # Out of order and hole-filling segments are acknowledged at once
+        self.assertEqual(receive(4)['seq_num'], 2)
+        self.assertEqual(receive(3)['seq_num'], 4)
+        self.assertIsNone(receive(5))
+        self.assertEqual(peer.acks_sent, 4)
+        self.assertEqual(peer.segments_received, 6)
+
+
+class TestReceiver(unittest.TestCase):
+    def test_delayed_ack_leaves_by_its_deadline(self):
+        protocol = get_protocol('binary')
+        sender_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender_sock.bind(('127.0.0.1', 0))
+        sender_sock.settimeout(1.0)
+        receiver = Receiver([sender_sock.getsockname()], protocol='binary', ack_every=3, ack_delay=0.2)
+
+        def serve():
+            receiver.perform_handshakes()
+            receiver.run()
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        try:
+            _, receiver_addr = sender_sock.recvfrom(1600)
+            sender_sock.sendto(protocol.encode({'handshake': True}), receiver_addr)
+
+            start = time.time()
+            sender_sock.sendto(protocol.encode({'seq_num': 0, 'send_ts': start}), receiver_addr)
+            # Arrives while the receiver waits for the first segment's deadline, which it leaves as is
+            time.sleep(0.1)
+            sender_sock.sendto(protocol.encode({'seq_num': 1, 'send_ts': start}), receiver_addr)
+            ack = protocol.decode(sender_sock.recvfrom(1600)[0])
+            elapsed = time.time() - start
+        finally:
+            # Closing the socket under poll() stops the receiver
+            receiver.sock.close()
+            thread.join(1.0)
+            sender_sock.close()
+
+        self.assertEqual(ack['seq_num'], 1)
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertLess(elapsed, 0.25)
+
+
+def serve(receiver, conn):
+    """Run receiver in a child process, and send back its IOStats once terminated."""
+    def report(signum, frame):
+        conn.send(receiver.io_stats)
+        os._exit(0)
+
+    signal.signal(signal.SIGTERM, report)
+    receiver.perform_handshakes()
+    receiver.run()
+
+
+class TestReceiverRuns(unittest.TestCase):
+    num_segments = 50
+
+    def run_receiver(self, batched):
+        """The seq_nums of the ACKs for num_segments in-order segments, and the receiver's IOStats."""
+        protocol = get_protocol('binary')
+        peer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        peer.bind(('127.0.0.1', 0))
+        peer.settimeout(1.0)
+        receiver = Receiver([peer.getsockname()], protocol='binary', batched=batched)
+        receiver.sock.bind(('127.0.0.1', 0))
+        # Everything is waiting on the socket before the receiver starts
+        receiver_addr = receiver.sock.getsockname()
+        peer.sendto(protocol.encode({'handshake': True}), receiver_addr)
+        for seq_num in range(self.num_segments):
+            peer.sendto(protocol.encode({'seq_num': seq_num, 'send_ts': 0.0}), receiver_addr)
+
+        context = multiprocessing.get_context('fork')
+        parent_conn, child_conn = context.Pipe(duplex=False)
+        process = context.Process(target=serve, args=(receiver, child_conn))
+        process.start()
+        child_conn.close()
+        receiver.sock.close()
+        try:
+            self.assertTrue(protocol.decode(peer.recvfrom(1600)[0]).get('handshake'))
+            acks = [protocol.decode(peer.recvfrom(1600)[0])['seq_num'] for _ in range(self.num_segments)]
+            # Time to count the last ACK once it is sent
+            time.sleep(0.1)
+        finally:
+            process.terminate()
+            io_stats = parent_conn.recv()
+            process.join()
+            peer.close()
+        return acks, io_stats
+
+    def test_batched_and_unbatched_runs_ack_the_same_segments(self):
+        unbatched_acks, unbatched = self.run_receiver(batched=False)
+        batched_acks, batched = self.run_receiver(batched=True)
+        self.assertEqual(unbatched_acks, list(range(self.num_segments)))
+        self.assertEqual(batched_acks, unbatched_acks)
+        for io_stats in (unbatched, batched):
+            self.assertEqual(io_stats.packets_received, self.num_segments)
+            self.assertEqual(io_stats.packets_sent, self.num_segments)
+
+        # A recvfrom per segment and a sendto per ACK
+        self.assertEqual(unbatched.syscalls, 2 * self.num_segments)
+        self.assertEqual(unbatched.syscalls_per_packet(), 1.0)
+        # One poll wakes the batched receiver, which drains the socket until EAGAIN
+        self.assertEqual(batched.syscalls, 2 * self.num_segments + 2)
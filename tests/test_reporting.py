@@ -0,0 +1,73 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from src.helpers import print_performance
+from src.protocol import BINARY_HEADER
+from src.reporting import downsample, summarize, write_report, show_plots
+from src.simulator import Simulation
+from src.strategies import TahoeStrategy
+
+
+class TestDownsample(unittest.TestCase):
+    def test_short_series_are_untouched(self):
+        x, y = downsample(np.arange(10), np.arange(10) * 2, max_points=10)
+        self.assertEqual(list(y), list(range(0, 20, 2)))
+
+    def test_keeps_extremes_of_each_bucket(self):
+        y = np.zeros(1001)
+        y[123] = 50
+        y[777] = -50
+        x, thinned = downsample(np.arange(1001), y, max_points=100)
+        self.assertLessEqual(len(thinned), 102)
+        self.assertEqual(thinned.max(), 50)
+        self.assertEqual(thinned.min(), -50)
+        self.assertIn(123, x)
+        self.assertIn(777, x)
+        # Points stay in order
+        self.assertTrue((np.diff(x) > 0).all())
+
+
+class TestReport(unittest.TestCase):
+    def setUp(self):
+        self.report_dir = tempfile.mkdtemp()
+        settings = {'delay': 10, 'queue_size': 3000, 'trace_file': '12mbps.trace'}
+        self.flow = Simulation(settings, [TahoeStrategy(10, 1)]).run(2).flows[0]
+
+    def tearDown(self):
+        shutil.rmtree(self.report_dir)
+
+    def test_writes_summary_and_plots(self):
+        summary = write_report(self.flow, 2, self.report_dir)
+        self.assertEqual(summary, summarize(self.flow, 2))
+        # The simulation runs the binary format by default
+        self.assertEqual(summary['throughput'], BINARY_HEADER.size * self.flow.strategy.acked_segments / 2)
+
+        with open(os.path.join(self.report_dir, 'sender_0.json')) as summary_file:
+            self.assertEqual(json.load(summary_file)['ack_count'], self.flow.strategy.ack_count)
+        for name in ('acks', 'cwnd', 'ssthresh'):
+            self.assertTrue(os.path.exists(os.path.join(self.report_dir, 'sender_0_%s.png' % name)))
+
+    def test_summary_only(self):
+        write_report(self.flow, 2, self.report_dir, plot=False)
+        self.assertEqual(os.listdir(self.report_dir), ['sender_0.json'])
+
+    def test_plots_are_only_shown_when_asked(self):
+        with mock.patch('src.helpers.show_plots') as show, contextlib.redirect_stdout(io.StringIO()):
+            print_performance(self.flow, 2)
+            show.assert_not_called()
+            print_performance(self.flow, 2, show=True)
+            show.assert_called_once_with(self.flow)
+
+    def test_show_plots_uses_pyplot_figures(self):
+        import matplotlib.pyplot as plt
+        with mock.patch.object(plt, 'show') as show:
+            show_plots(self.flow)
+        show.assert_called_once_with()
+        self.assertEqual(len(plt.get_fignums()), 3)
+        plt.close('all')
@@ -0,0 +1,58 @@
+import unittest
+from src.retransmission import RetransmissionQueue
+
+
+class TestRetransmissionQueue(unittest.TestCase):
+    def test_cumulative_ack_trims_front(self):
+        queue = RetransmissionQueue()
+        for seq_num in range(10):
+            queue.add(seq_num, {'seq_num': seq_num})
+
+        self.assertEqual(queue.acknowledge_through(4), 5)
+        self.assertEqual(len(queue), 5)
+        self.assertNotIn(4, queue)
+        self.assertEqual(queue[5]['seq_num'], 5)
+
+        # Acking an old sequence number is a no-op
+        self.assertEqual(queue.acknowledge_through(2), 0)
+        self.assertEqual(queue.acknowledge_through(100), 5)
+        self.assertEqual(len(queue), 0)
+
+    def test_selective_removal(self):
+        queue = RetransmissionQueue()
+        queue[0] = True
+        queue[1] = True
+        del queue[1]
+
+        self.assertIsNone(queue.get(1))
+        self.assertTrue(queue.get(0))
+        self.assertEqual(queue.acknowledge_through(1), 1)
+
+    def test_retransmissions_are_remembered_until_acked(self):
+        queue = RetransmissionQueue()
+        for seq_num in range(5):
+            queue.add(seq_num, {'seq_num': seq_num})
+        queue.mark_retransmitted(2)
+
+        self.assertFalse(queue.retransmitted_through(1))
+        self.assertTrue(queue.retransmitted_through(3))
+        queue.acknowledge_through(2)
+        self.assertFalse(queue.retransmitted_through(4))
+
+    def test_go_back_n_retransmissions(self):
+        queue = RetransmissionQueue()
+        for seq_num in range(100):
+            queue.add(seq_num, {'seq_num': seq_num})
+        for seq_num in range(10, 100):
+            queue.mark_retransmitted(seq_num)
+        self.assertEqual(len(queue.retransmitted), 1)
+
+        self.assertFalse(queue.retransmitted_through(9))
+        queue.pop(10)
+        self.assertFalse(queue.retransmitted_through(10))
+        self.assertTrue(queue.retransmitted_through(11))
+        queue.acknowledge_through(50)
+        self.assertFalse(queue.retransmitted_through(50))
+        self.assertTrue(queue.retransmitted_through(51))
+        queue.acknowledge_through(99)
+        self.assertEqual(queue.retransmitted.count, 0)
@@ -0,0 +1,86 @@
+import unittest
+from src.sack import RangeSet, Scoreboard
+
+
+class TestRangeSet(unittest.TestCase):
+    def test_adjacent_and_overlapping_ranges_merge(self):
+        ranges = RangeSet()
+        self.assertEqual(ranges.add(2, 2), 1)
+        self.assertEqual(ranges.add(6, 8), 3)
+        self.assertEqual(ranges.add(4, 4), 1)
+        self.assertEqual(list(ranges), [[2, 2], [4, 4], [6, 8]])
+
+        # Fills the hole at 3 and overlaps 4
+        self.assertEqual(ranges.add(3, 4), 1)
+        self.assertEqual(list(ranges), [[2, 4], [6, 8]])
+        self.assertEqual(ranges.add(1, 10), 4)
+        self.assertEqual(list(ranges), [[1, 10]])
+        self.assertEqual(ranges.count, 10)
+
+    def test_discard_and_count(self):
+        ranges = RangeSet()
+        for start, end in [(2, 3), (5, 5), (7, 9)]:
+            ranges.add(start, end)
+        self.assertIn(8, ranges)
+        self.assertNotIn(6, ranges)
+        self.assertEqual(ranges.count_above(7), 2)
+        self.assertEqual(ranges.count_above(4), 4)
+
+        self.assertEqual(ranges.discard_through(7), 4)
+        self.assertEqual(list(ranges), [[8, 9]])
+        self.assertEqual(ranges.count, 2)
+        self.assertEqual(ranges.highest(), 9)
+
+    def test_discard_splits_ranges(self):
+        ranges = RangeSet()
+        ranges.add(0, 9)
+        ranges.add(20, 29)
+
+        self.assertEqual(ranges.discard(5, 24), 10)
+        self.assertEqual(ranges.ranges, [[0, 4], [25, 29]])
+        self.assertEqual(ranges.discard(2, 2), 1)
+        self.assertEqual(ranges.ranges, [[0, 1], [3, 4], [25, 29]])
+        self.assertEqual(ranges.discard(10, 20), 0)
+        self.assertEqual(ranges.count, 9)
+
+
+class TestScoreboard(unittest.TestCase):
+    def test_holes_below_three_sacked_segments_are_lost(self):
+        # 1..9 outstanding, 1, 3 and 5 did not arrive
+        scoreboard = Scoreboard(3)
+        self.assertEqual(scoreboard.update([[6, 9], [2, 2], [4, 4]], 1), 6)
+        self.assertEqual(scoreboard.lost(1), 3)
+        # Everything has either arrived or been lost
+        self.assertEqual(scoreboard.pipe(1, 10), 0)
+
+        self.assertEqual(scoreboard.next_lost(1), 1)
+        scoreboard.on_retransmit(1)
+        self.assertEqual(scoreboard.next_lost(1), 3)
+        scoreboard.on_retransmit(3)
+        self.assertEqual(scoreboard.pipe(1, 10), 2)
+
+        # The retransmission of 1 arrived
+        self.assertEqual(scoreboard.acknowledge_through(2), 1)
+        self.assertEqual(scoreboard.pipe(3, 10), 1)
+        self.assertEqual(scoreboard.next_lost(3), 5)
+
+    def test_skip_sacked(self):
+        scoreboard = Scoreboard(3)
+        scoreboard.update([[4, 6]], 0)
+        self.assertEqual(scoreboard.skip_sacked(3), 3)
+        self.assertEqual(scoreboard.skip_sacked(4), 7)
+        self.assertEqual(scoreboard.skip_sacked(10), 10)
+
+    def test_sacked_retransmissions_leave_the_pipe(self):
+        # 0..19 outstanding, 0..9 lost and retransmitted
+        scoreboard = Scoreboard(3)
+        scoreboard.update([[10, 19]], 0)
+        for seq_num in range(10):
+            scoreboard.on_retransmit(seq_num)
+        self.assertEqual(scoreboard.pipe(0, 20), 10)
+
+        # Retransmissions of 4..6 were SACKed
+        scoreboard.update([[4, 6], [10, 19]], 0)
+        self.assertEqual(scoreboard.pipe(0, 20), 7)
+        scoreboard.acknowledge_through(3)
+        self.assertEqual(scoreboard.pipe(4, 20), 3)
@@ -0,0 +1,87 @@
+import errno
+import select
+import socket
+import sys
+import unittest
+from unittest import mock
+from src.helpers import get_open_udp_port
+from src.protocol import get_protocol
+from src.receiver import Receiver
+from src.senders import Sender
+from src.strategies import FixedWindowStrategy
+
+WINDOW = 8
+
+
+class TestBatchedSender(unittest.TestCase):
+    def setUp(self):
+        self.protocol = get_protocol('binary')
+        self.peer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.peer.bind(('127.0.0.1', 0))
+        self.peer.settimeout(1.0)
+
+    def tearDown(self):
+        self.peer.close()
+
+    def make_sender(self, **options) -> Sender:
+        sender = Sender(get_open_udp_port(), FixedWindowStrategy(WINDOW), protocol='binary', **options)
+        # As the handshake leaves it
+        sender.peer_addr = self.peer.getsockname()
+        sender.sock.setblocking(False)
+        self.addCleanup(sender.sock.close)
+        return sender
+
+    def receive(self, count: int):
+        """The next count segments to reach the peer, parsed, with their sizes."""
+        datagrams = [self.peer.recvfrom(1600)[0] for _ in range(count)]
+        return [(self.protocol.decode(datagram), len(datagram)) for datagram in datagrams]
+
+    def test_send_batch_and_recv_batch(self):
+        sender = self.make_sender(batch_size=4)
+        sender.send_batch()
+        segments = self.receive(4)
+        self.assertEqual([segment['seq_num'] for segment, _ in segments], [0, 1, 2, 3])
+        self.assertEqual((sender.io_stats.syscalls, sender.io_stats.packets_sent), (4, 4))
+
+        for segment, size in segments:
+            self.peer.sendto(self.protocol.encode(Receiver.construct_ack(segment, size)), ('127.0.0.1', sender.port))
+        select.select([sender.sock], [], [], 1.0)
+        sender.recv_batch()
+        self.assertEqual(sender.strategy.total_acks, 4)
+        self.assertEqual(sender.strategy.next_ack, 4)
+        self.assertEqual(sender.io_stats.packets_received, 4)
+        # Four ACKs, then the read that found the socket empty
+        self.assertEqual(sender.io_stats.syscalls, 4 + 5)
+
+    def test_batched_and_unbatched_send_the_same_segments(self):
+        unbatched = self.make_sender()
+        for _ in range(WINDOW + 1):
+            unbatched.send()
+        sent = [(segment['seq_num'], size) for segment, size in self.receive(WINDOW)]
+
+        batched = self.make_sender(batch_size=32)
+        batched.send_batch()
+        self.assertEqual([(segment['seq_num'], size) for segment, size in self.receive(WINDOW)], sent)
+        self.assertEqual(batched.io_stats.packets_sent, unbatched.io_stats.packets_sent)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'UDP GSO is Linux only')
+    def test_gso_sends_a_burst_in_one_syscall(self):
+        sender = self.make_sender(batch_size=32, gso=True)
+        sender.send_batch()
+        if not sender.gso:
+            self.skipTest('the kernel rejected UDP_SEGMENT')
+        self.assertEqual([segment['seq_num'] for segment, _ in self.receive(WINDOW)], list(range(WINDOW)))
+        self.assertEqual(sender.io_stats.syscalls, 1)
+        self.assertEqual(sender.io_stats.packets_sent, WINDOW)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'UDP GSO is Linux only')
+    def test_gso_falls_back_when_rejected(self):
+        sender = self.make_sender(batch_size=32, gso=True)
+        rejected = OSError(errno.EINVAL, 'Invalid argument')
+        with mock.patch.object(socket.socket, 'sendmsg', side_effect=rejected):
+            sender.send_batch()
+        self.assertFalse(sender.gso)
+        self.assertEqual([segment['seq_num'] for segment, _ in self.receive(WINDOW)], list(range(WINDOW)))
+        # The refused sendmsg, then one sendto per segment
+        self.assertEqual(sender.io_stats.syscalls, WINDOW + 1)
+        self.assertEqual(sender.io_stats.packets_sent, WINDOW)
@@ -0,0 +1,46 @@
+import contextlib
+import io
+import threading
+import unittest
+from src.helpers import get_open_udp_port
+from src.senders import Sender
+from src.strategies import FixedWindowStrategy
+from src.sharded_receiver import ShardedReceiver, shard_path
+
+NUM_SENDERS = 4
+NUM_SHARDS = 2
+
+
+class TestShardedReceiver(unittest.TestCase):
+    def test_shards_share_the_senders_and_merge_their_stats(self):
+        senders = [Sender(get_open_udp_port(), FixedWindowStrategy(10), protocol='binary')
+                   for _ in range(NUM_SENDERS)]
+        receiver = ShardedReceiver([('127.0.0.1', sender.port) for sender in senders], NUM_SHARDS,
+                                   protocol='binary').start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                for sender in senders:
+                    sender.handshake()
+            threads = [threading.Thread(target=sender.run, args=[0.5]) for sender in senders]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            stats = receiver.stop()
+            for sender in senders:
+                sender.sock.close()
+
+        # Each shard has its own socket, and senders talk to their shard's
+        self.assertEqual(len(set(sender.peer_addr for sender in senders)), NUM_SHARDS)
+        self.assertEqual(sorted(stats['peers']), sorted(sender.port for sender in senders))
+        for sender in senders:
+            segments_received, acks_sent, _ = stats['peers'][sender.port]
+            self.assertGreater(segments_received, 0)
+            self.assertGreaterEqual(acks_sent, sender.strategy.total_acks)
+        self.assertGreaterEqual(stats['io_stats'].packets_received,
+                         sum(received for received, _, _ in stats['peers'].values()))
+
+    def test_shard_path(self):
+        self.assertEqual(shard_path('events.log', 1), 'events.log.1')
+        self.assertIsNone(shard_path(None, 1))
@@ -0,0 +1,107 @@
+import statistics
+import unittest
+from src.link import Link, TraceSchedule, MTU
+from src.simulator import Simulation
+from src.strategies import FixedWindowStrategy, TahoeStrategy, CubicStrategy, BbrStrategy, VegasStrategy
+
+
+class TestTraceSchedule(unittest.TestCase):
+    def test_schedule_repeats(self):
+        schedule = TraceSchedule([1, 1, 3])
+        self.assertEqual([schedule.time_of(i) for i in range(6)], [1, 1, 3, 4, 4, 6])
+        self.assertEqual(schedule.first_after(0), 0)
+        self.assertEqual(schedule.first_after(1), 2)
+        self.assertEqual(schedule.first_after(3.5), 3)
+
+
+class TestLink(unittest.TestCase):
+    def test_opportunity_carries_mtu_bytes(self):
+        link = Link(TraceSchedule([1]))
+        for i in range(3):
+            link.enqueue(i, 1000, 0)
+
+        self.assertEqual(link.next_opportunity_ms(), 1)
+        # The second packet only partly fits and carries over
+        self.assertEqual(link.serve_opportunity(), [0])
+        self.assertEqual(link.serve_opportunity(), [1, 2])
+        self.assertFalse(link.is_busy())
+        self.assertEqual(link.delivered_bytes, 3000)
+
+    def test_droptail(self):
+        link = Link(TraceSchedule([1]), byte_limit=MTU)
+        self.assertTrue(link.enqueue('a', 1000, 0))
+        self.assertFalse(link.enqueue('b', 1000, 0))
+        self.assertEqual(link.stats()['drops'], 1)
+
+
+class TestSimulation(unittest.TestCase):
+    settings = {
+        'delay': 10,
+        'queue_size': 1000000,
+        'trace_file': '12mbps.trace'
+    }
+
+    def test_fixed_window_without_loss(self):
+        strategy = FixedWindowStrategy(10)
+        simulation = Simulation(self.settings, [strategy]).run(5)
+
+        self.assertEqual(strategy.num_duplicate_acks, 0)
+        self.assertEqual(simulation.stats()['downlink']['drops'], 0)
+        # Ten segments per round trip of a little over 20ms
+        self.assertGreater(strategy.ack_count, 2000)
+        self.assertLess(strategy.ack_count, 2500)
+        self.assertGreaterEqual(min(strategy.rtts), 0.02)
+        self.assertEqual(simulation.now(), 5)
+
+    def test_is_deterministic(self):
+        settings = dict(self.settings, queue_size=3000, loss=0.01)
+        runs = []
+        for _ in range(2):
+            strategy = TahoeStrategy(10, 1)
+            Simulation(settings, [strategy], seed=7).run(10)
+            runs.append((strategy.ack_count, strategy.num_duplicate_acks, strategy.cwnd))
+
+        self.assertEqual(runs[0], runs[1])
+        self.assertGreater(runs[0][1], 0)
+
+    def test_pacing_avoids_overflowing_a_shallow_queue(self):
+        settings = dict(self.settings, queue_size=1000)
+        results = []
+        for pacing in (False, True):
+            strategy = FixedWindowStrategy(40)
+            simulation = Simulation(settings, [strategy], pacing=pacing).run(5)
+            results.append((strategy.ack_count, simulation.stats()['downlink']['drops']))
+
+        (unpaced_acks, unpaced_drops), (paced_acks, paced_drops) = results
+        self.assertLess(paced_drops, unpaced_drops / 100)
+        self.assertGreater(paced_acks, unpaced_acks)
+
+    def test_bbr_keeps_the_queue_short(self):
+        results = []
+        for strategy in (CubicStrategy(100000, 10), BbrStrategy()):
+            Simulation(self.settings, [strategy]).run(5)
+            results.append((strategy.ack_count, statistics.median(strategy.rtts)))
+
+        (cubic_acks, cubic_rtt), (bbr_acks, bbr_rtt) = results
+        self.assertGreater(bbr_acks, cubic_acks * 0.9)
+        self.assertLess(bbr_rtt, cubic_rtt / 1.5)
+
+    def test_vegas_keeps_the_queue_short(self):
+        strategy = VegasStrategy(100000, 10)
+        simulation = Simulation(self.settings, [strategy]).run(5)
+
+        self.assertEqual(simulation.stats()['downlink']['drops'], 0)
+        # A few segments queued on top of the 20ms round trip
+        self.assertLess(strategy.rtts.percentile(99), 0.03)
+        self.assertGreater(strategy.ack_count, 100000)
+
+    def test_delayed_acks_halve_the_acks(self):
+        results = []
+        for ack_every in (1, 2):
+            strategy = CubicStrategy(100000, 10)
+            simulation = Simulation(self.settings, [strategy], ack_every=ack_every).run(5)
+            results.append((strategy.next_ack, simulation.flows[0].io_stats.packets_received))
+
+        (immediate_segments, immediate_acks), (delayed_segments, delayed_acks) = results
+        self.assertAlmostEqual(delayed_acks, immediate_acks / 2, delta=immediate_acks * 0.02)
+        self.assertGreater(delayed_segments, immediate_segments * 0.98)
@@ -1,7 +1,8 @@
 import json
 import time
 import unittest
-from src.strategies import TahoeStrategy, FixedWindowStrategy
+from src.strategies import TahoeStrategy, FixedWindowStrategy, RenoStrategy, NewRenoStrategy, CubicStrategy, BbrStrategy, VegasStrategy
+from src.strategies import BBR_STARTUP, BBR_DRAIN, BBR_PROBE_BW, BBR_PROBE_RTT, BBR_MIN_CWND
 
 
 class TestTahoeStrategy(unittest.TestCase):
@@ -148,6 +149,76 @@ class TestTahoeStrategy(unittest.TestCase):
         # TODO: Implement timeouts, so that after the timeout, we can send back
         # seq # 2. Given current implementation, we'll just get stuck at this point.
 
+    def test_retransmission_timeout_backs_off(self):
+        now = [100.0]
+        strategy = TahoeStrategy(10, 2)
+        strategy.clock = lambda: now[0]
+        strategy.next_packet_to_send()
+        strategy.next_packet_to_send()
+        self.assertEqual(strategy.next_timeout(), 101.0)
+
+        # Nothing comes back: resend from the first segment with cwnd 1
+        now[0] = 101.0
+        resent = strategy.next_packet_to_send()
+        self.assertEqual(json.loads(resent)['seq_num'], 0)
+        self.assertEqual(strategy.cwnd, 1)
+        self.assertEqual(strategy.slow_start_thresh, 1)
+        self.assertIsNone(strategy.next_packet_to_send())
+        self.assertEqual(strategy.next_timeout(), 103.0)
+
+        now[0] = 103.0
+        self.assertEqual(json.loads(strategy.next_packet_to_send())['seq_num'], 0)
+        self.assertEqual(strategy.next_timeout(), 107.0)
+
+        # Karn's rule: the ACK of a retransmitted segment is no RTT sample,
+        # and the receiver had segment 1 already
+        now[0] = 103.5
+        strategy.process_ack(json.dumps({'seq_num': 1, 'send_ts': 100.0, 'ack_bytes': 10}))
+        self.assertEqual(len(strategy.rtts), 0)
+        self.assertEqual(strategy.seq_num, 2)
+        self.assertIsNone(strategy.next_timeout())
+
+        sent = strategy.next_packet_to_send()
+        self.assertEqual(json.loads(sent)['seq_num'], 2)
+        now[0] = 103.6
+        strategy.process_ack(json.dumps({'seq_num': 2, 'send_ts': 103.5, 'ack_bytes': 10}))
+        self.assertAlmostEqual(strategy.rtts[0], 0.1)
+        self.assertEqual(strategy.rtt_estimator.backoffs, 0)
+
+class TestDelayedAcks(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+
+    def ack_every_other(self, strategy):
+        """Send what the window allows and ACK every second segment of it."""
+        seq_nums = sent_seq_nums(strategy)
+        self.now += 0.1
+        for seq_num in seq_nums[1::2]:
+            strategy.process_ack(ack_for(seq_num, self.now - 0.1))
+
+    def test_tahoe_counts_segments_not_acks(self):
+        strategy = TahoeStrategy(16, 2)
+        strategy.clock = lambda: self.now
+        # Slow start still doubles the window every round trip
+        for cwnd in (4, 8, 16):
+            self.ack_every_other(strategy)
+            self.assertEqual(strategy.cwnd, cwnd)
+        self.assertEqual(strategy.segments_per_ack(), 2)
+
+        # Congestion avoidance still grows, though no ACK lands exactly
+        # on a multiple of the window
+        self.ack_every_other(strategy)
+        self.assertGreater(strategy.cwnd, 16)
+
+    def test_fixed_window_forgets_covered_segments(self):
+        strategy = FixedWindowStrategy(4)
+        strategy.clock = lambda: self.now
+        self.ack_every_other(strategy)
+        self.assertEqual(len(strategy.unacknowledged_packets), 0)
+        self.assertEqual(strategy.acked_segments, 4)
+        self.assertEqual(strategy.ack_count, 2)
+
+
 class TestRenoSender(unittest.TestCase):
     def test_segments_received_in_order(self):
         strategy = TahoeStrategy(3, 1)
@@ -209,5 +280,356 @@ class TestRenoSender(unittest.TestCase):
         self.assertEqual(strategy.cwnd, 4)
 
 
+def ack_for(seq_num, send_ts=0.0, sack=None):
+    ack = {'seq_num': seq_num, 'send_ts': send_ts, 'sent_bytes': 10, 'ack_bytes': 10}
+    if sack:
+        ack['sack'] = sack
+    return json.dumps(ack)
+
+
+def sent_seq_nums(strategy):
+    seq_nums = []
+    while True:
+        segment = strategy.next_packet_to_send()
+        if segment is None:
+            return seq_nums
+        seq_nums.append(json.loads(segment)['seq_num'])
+
+
+class TestRenoStrategy(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        # Already in congestion avoidance, with a window of 8
+        self.strategy = self.strategy_class(2, 8)
+        self.strategy.clock = lambda: self.now
+        self.assertEqual(sent_seq_nums(self.strategy), list(range(8)))
+
+    strategy_class = RenoStrategy
+
+    def test_congestion_avoidance(self):
+        self.strategy.process_ack(ack_for(0, 99.9))
+        self.assertAlmostEqual(self.strategy.cwnd, 8.125)
+        self.assertAlmostEqual(self.strategy.srtt, 0.1)
+
+    def test_fast_recovery_halves_and_inflates(self):
+        # Segment 1 is lost
+        self.strategy.process_ack(ack_for(0))
+        for _ in range(2):
+            self.strategy.process_ack(ack_for(0))
+            self.assertFalse(self.strategy.in_recovery)
+        self.strategy.process_ack(ack_for(0))
+
+        self.assertTrue(self.strategy.in_recovery)
+        self.assertEqual(self.strategy.slow_start_thresh, 3)
+        self.assertEqual(self.strategy.cwnd, 6)
+        self.assertEqual(sent_seq_nums(self.strategy), [1])
+
+        # Each further duplicate inflates the window by one
+        self.strategy.process_ack(ack_for(0))
+        self.assertEqual(sent_seq_nums(self.strategy), [])
+        self.strategy.process_ack(ack_for(0))
+        self.assertEqual(sent_seq_nums(self.strategy), [8])
+
+        self.strategy.process_ack(ack_for(7))
+        self.assertFalse(self.strategy.in_recovery)
+        self.assertEqual(self.strategy.cwnd, 3)
+        # Karn's rule: only the first ACK gave an RTT sample
+        self.assertEqual(len(self.strategy.rtts), 1)
+        self.assertEqual(self.strategy.num_duplicate_acks, 5)
+        self.assertEqual(len(self.strategy.cwnds), 7)
+
+
+class TestNewRenoStrategy(TestRenoStrategy):
+    strategy_class = NewRenoStrategy
+
+    def test_partial_ack_retransmits_next_loss(self):
+        # Segments 1 and 4 are lost
+        for _ in range(4):
+            self.strategy.process_ack(ack_for(0))
+        self.assertEqual(sent_seq_nums(self.strategy), [1])
+        self.assertEqual(self.strategy.recover, 7)
+        first_deadline = self.strategy.next_timeout()
+
+        self.now += 0.1
+        self.strategy.process_ack(ack_for(3))
+        self.assertTrue(self.strategy.in_recovery)
+        # Deflated by the 3 segments acknowledged, plus one
+        self.assertEqual(self.strategy.cwnd, 4)
+        self.assertEqual(sent_seq_nums(self.strategy), [4])
+        self.assertGreater(self.strategy.next_timeout(), first_deadline)
+
+        # Later partial ACKs leave the timer alone
+        second_deadline = self.strategy.next_timeout()
+        self.now += 0.1
+        self.strategy.process_ack(ack_for(4))
+        self.assertEqual(self.strategy.next_timeout(), second_deadline)
+
+        self.strategy.process_ack(ack_for(7))
+        self.assertFalse(self.strategy.in_recovery)
+        self.assertEqual(self.strategy.cwnd, 3)
+
+    def test_no_second_recovery_for_old_data(self):
+        self.strategy.on_retransmission_timeout()
+        self.assertEqual(self.strategy.recover, 7)
+        self.assertEqual(sent_seq_nums(self.strategy), [0])
+        self.strategy.process_ack(ack_for(0))
+        for _ in range(3):
+            self.strategy.process_ack(ack_for(0))
+        self.assertFalse(self.strategy.in_recovery)
+
+
+class TestSackRecovery(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        self.strategy = NewRenoStrategy(2, 8)
+        self.strategy.clock = lambda: self.now
+        self.assertEqual(sent_seq_nums(self.strategy), list(range(8)))
+
+        # Segments 1, 3 and 5 are lost
+        self.strategy.process_ack(ack_for(0))
+        self.strategy.process_ack(ack_for(0, sack=[[2, 2]]))
+        self.strategy.process_ack(ack_for(0, sack=[[4, 4], [2, 2]]))
+
+    def test_several_losses_repaired_in_one_round_trip(self):
+        self.strategy.process_ack(ack_for(0, sack=[[6, 6], [2, 2], [4, 4]]))
+        self.assertTrue(self.strategy.in_recovery)
+        # No inflation, the pipe leaves out what was SACKed
+        self.assertEqual(self.strategy.cwnd, 3)
+        self.assertEqual(sent_seq_nums(self.strategy), [1])
+
+        self.strategy.process_ack(ack_for(0, sack=[[6, 7], [2, 2], [4, 4]]))
+        # 3 is lost as well, and resent before 1 is acknowledged
+        self.assertEqual(sent_seq_nums(self.strategy), [3])
+
+        self.strategy.process_ack(ack_for(2, sack=[[4, 4], [6, 7]]))
+        self.assertEqual(sent_seq_nums(self.strategy), [8])
+        self.strategy.process_ack(ack_for(4, sack=[[6, 7]]))
+        self.assertEqual(sent_seq_nums(self.strategy), [5])
+
+        self.strategy.process_ack(ack_for(7))
+        self.assertFalse(self.strategy.in_recovery)
+        self.assertEqual(self.strategy.cwnd, 3)
+        self.assertEqual(self.strategy.rtt_estimator.backoffs, 0)
+
+    def test_timeout_skips_sacked_segments(self):
+        self.strategy.process_ack(ack_for(0, sack=[[6, 7], [2, 2], [4, 4]]))
+        self.strategy.on_retransmission_timeout()
+        self.assertEqual(sent_seq_nums(self.strategy), [1])
+        self.strategy.process_ack(ack_for(2, sack=[[4, 4], [6, 7]]))
+        self.assertEqual(sent_seq_nums(self.strategy), [3, 5])
+        self.strategy.process_ack(ack_for(7))
+        # Nothing the receiver already had was resent
+        self.assertEqual(sent_seq_nums(self.strategy)[0], 8)
+
+
+class TestCubicStrategy(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+
+    def make_strategy(self, *args, **kwargs):
+        strategy = CubicStrategy(*args, **kwargs)
+        strategy.clock = lambda: self.now
+        return strategy
+
+    def ack_window(self, strategy, rtt):
+        """Send everything the window allows and ACK all of it, one ACK per segment."""
+        seq_nums = sent_seq_nums(strategy)
+        send_ts = self.now
+        self.now += rtt
+        for seq_num in seq_nums:
+            strategy.process_ack(ack_for(seq_num, send_ts))
+
+    def test_loss_cuts_window_by_beta(self):
+        strategy = self.make_strategy(2, 100)
+        strategy.next_packet_to_send()
+        strategy.cwnd = 100
+        strategy.on_congestion_event()
+        self.assertEqual(strategy.w_max, 100)
+        self.assertEqual(strategy.slow_start_thresh, 70)
+
+        # Fast convergence: a second loss below the last peak lowers w_max further
+        strategy.cwnd = 80
+        strategy.on_congestion_event()
+        self.assertEqual(strategy.w_max, 68)
+        self.assertEqual(strategy.slow_start_thresh, 56)
+
+    def test_window_is_cubic_in_time(self):
+        strategy = self.make_strategy(2, 70)
+        strategy.w_max = 100
+        strategy.w_last_max = 100
+        strategy.record_rtt(0.1)
+
+        self.ack_window(strategy, 0.1)
+        # K = cbrt((100 - 70) / 0.4), about 4.2 seconds to get back to w_max
+        self.assertAlmostEqual(strategy.k, (30 / 0.4) ** (1.0 / 3))
+        self.assertLess(strategy.cwnd, 75)
+
+        # Concave growth up to w_max, where the curve is flat...
+        while self.now < 100.0 + strategy.k:
+            self.ack_window(strategy, 0.1)
+        self.assertAlmostEqual(strategy.cwnd, 100, delta=2)
+        # ...and convex growth beyond it
+        plateau = strategy.cwnd
+        for _ in range(20):
+            self.ack_window(strategy, 0.1)
+        self.assertGreater(strategy.cwnd, plateau + 2)
+        self.assertAlmostEqual(strategy.cwnd, strategy.cubic_window(self.now - strategy.epoch_start), delta=3)
+
+    def test_reno_friendly_region(self):
+        # With a tiny RTT, Reno would outgrow the cubic curve right after a loss
+        strategy = self.make_strategy(2, 70)
+        strategy.w_max = 100
+        strategy.record_rtt(0.001)
+        for _ in range(50):
+            self.ack_window(strategy, 0.001)
+        self.assertGreater(strategy.cubic_window(self.now - strategy.epoch_start), 70)
+        self.assertAlmostEqual(strategy.cwnd, strategy.w_est)
+        self.assertGreater(strategy.cwnd, 70 + 50 * 0.5)
+
+    def test_hystart_leaves_slow_start_when_rtt_rises(self):
+        strategy = self.make_strategy(100000, 16)
+        self.ack_window(strategy, 0.1)
+        self.ack_window(strategy, 0.1)
+        self.assertLess(strategy.cwnd, strategy.slow_start_thresh)
+
+        # The queue starts to build
+        self.ack_window(strategy, 0.12)
+        self.assertLessEqual(strategy.slow_start_thresh, strategy.cwnd)
+
+    def test_without_hystart_slow_start_continues(self):
+        strategy = self.make_strategy(100000, 16, hystart=False)
+        for rtt in (0.1, 0.1, 0.12):
+            self.ack_window(strategy, rtt)
+        self.assertEqual(strategy.slow_start_thresh, 100000)
+
+
+class TestBbrStrategy(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        self.strategy = BbrStrategy()
+        self.strategy.clock = lambda: self.now
+        # (ACK time, segment) of what is on the path, when the bottleneck
+        # is next free and when the pacer lets the next segment out
+        self.in_flight = []
+        self.next_delivery = self.now
+        self.next_send = self.now
+
+    def run_path(self, seconds, rate=1000, rtt=0.02):
+        """
+        Drive the strategy over a path that delivers rate segments per
+        second after rtt, paced at the strategy's own rate.
+        """
+        end = self.now + seconds
+        while self.now < end:
+            next_ack = self.in_flight[0][0] if self.in_flight else float('inf')
+            if self.next_send <= next_ack:
+                self.now = max(self.now, self.next_send)
+                segment = self.strategy.next_packet_to_send()
+                if segment is not None:
+                    # The bottleneck serves segments one after another
+                    self.next_delivery = max(self.next_delivery, self.now + rtt / 2) + 1.0 / rate
+                    self.in_flight.append((self.next_delivery + rtt / 2, json.loads(segment)))
+                    pacing_rate = self.strategy.pacing_rate()
+                    self.next_send = self.now + (1.0 / pacing_rate if pacing_rate else 0.0)
+                    continue
+                # Window full, the next ACK opens it
+                self.next_send = next_ack
+            ack_time, segment = self.in_flight.pop(0)
+            self.now = ack_time
+            self.strategy.process_ack(ack_for(segment['seq_num'], segment['send_ts']))
+
+    def test_segments_carry_only_wire_fields(self):
+        segment = json.loads(self.strategy.next_packet_to_send())
+        self.assertEqual(set(segment), {'seq_num', 'send_ts'})
+        # The delivery rate state stays with the sender
+        self.assertEqual(self.strategy.unacknowledged_packets[0]['delivered'], 0)
+
+    def test_converges_on_bottleneck(self):
+        self.assertEqual(self.strategy.mode, BBR_STARTUP)
+        self.run_path(2)
+        self.assertEqual(self.strategy.mode, BBR_PROBE_BW)
+        self.assertAlmostEqual(self.strategy.btl_bw.get(), 1000, delta=100)
+        self.assertAlmostEqual(self.strategy.min_rtt, 0.02, delta=0.002)
+        # About twice the bandwidth-delay product of 20 segments in flight
+        self.assertAlmostEqual(self.strategy.cwnd, 40, delta=8)
+
+    def test_startup_ends_with_drain(self):
+        modes = set()
+        while self.strategy.mode == BBR_STARTUP or self.strategy.mode == BBR_DRAIN:
+            modes.add(self.strategy.mode)
+            self.run_path(0.01)
+        self.assertEqual(modes, {BBR_STARTUP, BBR_DRAIN})
+
+    def test_probe_rtt_after_min_rtt_expires(self):
+        self.run_path(2)
+        # The path gets longer, so the min RTT is never seen again
+        modes = []
+        while self.now < 115:
+            self.run_path(0.01, rtt=0.03)
+            if not modes or modes[-1] != self.strategy.mode:
+                modes.append(self.strategy.mode)
+            if self.strategy.mode == BBR_PROBE_RTT:
+                self.assertLessEqual(self.strategy.cwnd, BBR_MIN_CWND)
+        self.assertEqual(modes, [BBR_PROBE_BW, BBR_PROBE_RTT, BBR_PROBE_BW])
+        self.assertAlmostEqual(self.strategy.min_rtt, 0.03, delta=0.002)
+        self.assertGreater(self.strategy.cwnd, 50)
+
+
+class TestVegasStrategy(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+
+    def make_strategy(self, *args, **kwargs):
+        strategy = VegasStrategy(*args, **kwargs)
+        strategy.clock = lambda: self.now
+        return strategy
+
+    def ack_window(self, strategy, rtt):
+        seq_nums = sent_seq_nums(strategy)
+        send_ts = self.now
+        self.now += rtt
+        for seq_num in seq_nums:
+            strategy.process_ack(ack_for(seq_num, send_ts))
+
+    def test_window_tracks_queue_between_alpha_and_beta(self):
+        # A round is measured by the ACK that ends it, the first of the
+        # next window, so each RTT is held for two windows
+        strategy = self.make_strategy(2, 10)
+        for _ in range(2):
+            self.ack_window(strategy, 0.1)
+        self.assertAlmostEqual(strategy.base_rtt, 0.1)
+        # Nothing queued, one more segment per round trip
+        self.assertEqual(strategy.cwnd, 12)
+
+        for _ in range(2):
+            self.ack_window(strategy, 0.12)
+        # 13 * (0.12 - 0.1) / 0.12, a little over alpha, hold
+        self.assertEqual(strategy.cwnd, 13)
+        for _ in range(2):
+            self.ack_window(strategy, 0.14)
+        # Still below beta
+        self.assertEqual(strategy.cwnd, 13)
+        for _ in range(2):
+            self.ack_window(strategy, 0.2)
+        # 6.5 queued, back off
+        self.assertEqual(strategy.cwnd, 12)
+
+    def test_slow_start_ends_once_a_queue_builds(self):
+        strategy = self.make_strategy(100000, 16)
+        self.ack_window(strategy, 0.1)
+        self.ack_window(strategy, 0.1)
+        self.assertLess(strategy.cwnd, strategy.slow_start_thresh)
+
+        # A round is measured by the ACK that ends it, the first of the
+        # next window, so the queue shows one window late
+        self.ack_window(strategy, 0.125)
+        self.ack_window(strategy, 0.125)
+        self.assertEqual(strategy.slow_start_thresh, strategy.cwnd)
+        # Cut to what the path holds without the queue, plus one
+        cwnd = strategy.cwnd
+        self.ack_window(strategy, 0.125)
+        self.assertLess(strategy.cwnd, cwnd)
+
+
 class TestFixedWindowSender(unittest.TestCase):
     pass
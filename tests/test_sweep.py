@@ -0,0 +1,61 @@
+import shutil
+import tempfile
+import unittest
+from src.sweep import expand_grid, cell_id, run_sweep, load_results, load_series, completed_cells
+
+
+class TestExpandGrid(unittest.TestCase):
+    def test_every_combination(self):
+        cells = expand_grid({'strategy': ['tahoe', 'bbr'], 'queue_size': [1000, 2000, 3000]},
+                            trace_file='12mbps.trace', delay=10)
+        self.assertEqual(len(cells), 6)
+        self.assertEqual([(cell['strategy'], cell['queue_size']) for cell in cells[:3]],
+                         [('tahoe', 1000), ('tahoe', 2000), ('tahoe', 3000)])
+        # Defaults are filled in
+        self.assertEqual(cells[0]['flows'], 1)
+
+    def test_rejects_bad_parameters(self):
+        with self.assertRaises(ValueError):
+            expand_grid({'strategy': ['tahoe'], 'queue_sizes': [1000]}, trace_file='12mbps.trace', delay=10)
+        with self.assertRaises(ValueError):
+            expand_grid({'strategy': ['tahoe']}, trace_file='12mbps.trace', delay=10)
+        with self.assertRaises(ValueError):
+            expand_grid({'strategy': ['westwood']}, trace_file='12mbps.trace', delay=10, queue_size=1000)
+
+    def test_cell_id_depends_on_every_parameter(self):
+        cell = expand_grid({'strategy': ['tahoe']}, trace_file='12mbps.trace', delay=10, queue_size=1000)[0]
+        self.assertEqual(cell_id(cell), cell_id(dict(cell)))
+        self.assertNotEqual(cell_id(cell), cell_id(dict(cell, seed=1)))
+
+
+class TestRunSweep(unittest.TestCase):
+    def setUp(self):
+        self.result_dir = tempfile.mkdtemp()
+        self.cells = expand_grid({'strategy': ['fixed', 'tahoe'], 'flows': [1, 2]},
+                                 trace_file='12mbps.trace', delay=10, queue_size=100000, seconds_to_run=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.result_dir)
+
+    def test_runs_cells_and_skips_completed_ones(self):
+        self.assertEqual(run_sweep(self.cells[:2], self.result_dir, num_processes=2), 2)
+        # Only the new cells run the second time
+        self.assertEqual(run_sweep(self.cells, self.result_dir, num_processes=2), 2)
+        self.assertEqual(run_sweep(self.cells, self.result_dir, num_processes=2), 0)
+
+        results = load_results(self.result_dir)
+        # One row per flow
+        self.assertEqual(len(results['cell_id']), 6)
+        self.assertEqual(completed_cells(self.result_dir), set(cell_id(cell) for cell in self.cells))
+        self.assertTrue((results['throughput'] > 0).all())
+        self.assertEqual(set(results['strategy']), {'fixed', 'tahoe'})
+
+        rtts = load_series(self.result_dir, results['cell_id'][0], 0, 'rtts')
+        self.assertGreater(len(rtts), 0)
+
+    def test_inline_run_matches_pool(self):
+        run_sweep(self.cells[:1], self.result_dir, num_processes=1)
+        inline = load_results(self.result_dir)['ack_count']
+        shutil.rmtree(self.result_dir)
+        run_sweep(self.cells[:1], self.result_dir, num_processes=2)
+        self.assertEqual(list(load_results(self.result_dir)['ack_count']), list(inline))
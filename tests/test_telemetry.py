@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.receiver import Peer
+from src.simulator import Simulation
+from src.strategies import NewRenoStrategy, FixedWindowStrategy
+from src.telemetry import TelemetryPublisher, TelemetryBlock, read_stats, format_stats, SENDER, RECEIVER
+
+
+class TestTelemetry(unittest.TestCase):
+    settings = {
+        'delay': 10,
+        'queue_size': 100000,
+        'trace_file': '12mbps.trace'
+    }
+
+    def setUp(self):
+        self.stats_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.stats_dir, 'run.stats')
+
+    def tearDown(self):
+        shutil.rmtree(self.stats_dir)
+
+    def test_publishes_senders_and_peers(self):
+        simulation = Simulation(self.settings, [NewRenoStrategy(64, 10), FixedWindowStrategy(5)])
+        publisher = TelemetryPublisher(self.path)
+        for flow in simulation.flows:
+            publisher.add_sender(flow)
+        publisher.add_peer(simulation.flows[0].peer)
+
+        publisher.sample()
+        before = read_stats(self.path)
+        self.assertEqual(list(before['role']), [SENDER, SENDER, RECEIVER])
+        self.assertEqual(before['acks'][0], 0)
+
+        simulation.run(1)
+        publisher.sample()
+        stats = read_stats(self.path)
+        strategy = simulation.flows[0].strategy
+        self.assertEqual(stats['cwnd'][0], strategy.cwnd)
+        self.assertEqual(stats['ssthresh'][0], strategy.slow_start_thresh)
+        self.assertEqual(stats['acks'][0], strategy.total_acks)
+        self.assertEqual(stats['in_flight'][1], 5)
+        self.assertAlmostEqual(stats['srtt'][0], strategy.srtt)
+        self.assertGreater(stats['ack_rate'][0], 0)
+        self.assertEqual(stats['segments_received'][2], simulation.flows[0].peer.segments_received)
+        # Every write leaves the record's version even
+        self.assertTrue((stats['version'] % 2 == 0).all())
+        publisher.stop()
+
+        table = format_stats(stats)
+        self.assertEqual(len(table.splitlines()), 4)
+        self.assertIn('receiver', table)
+
+    def test_background_thread(self):
+        peer = Peer(1234, 100)
+        publisher = TelemetryPublisher(self.path, interval=0.01)
+        publisher.add_peer(peer)
+        publisher.start()
+        peer.add_segment({'seq_num': 0, 'send_ts': 0, 'ack_bytes': 10})
+        publisher.stop()
+        stats = read_stats(self.path)
+        self.assertEqual(stats['flow'][0], 1234)
+        self.assertEqual(stats['window_occupancy'][0], 1)
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as other_file:
+            other_file.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            TelemetryBlock(self.path)
+
+    def test_replaces_an_earlier_block_whole(self):
+        earlier = TelemetryBlock(self.path, 1)
+        reader = TelemetryBlock(self.path)
+        block = TelemetryBlock(self.path, 3)
+        # A reader that opened the earlier block keeps it; new readers get the new one
+        self.assertEqual(len(reader.records), 1)
+        self.assertEqual(len(read_stats(self.path)), 3)
+        self.assertEqual(os.listdir(self.stats_dir), ['run.stats'])
+        for each in (earlier, reader, block):
+            each.close()
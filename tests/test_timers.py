@@ -0,0 +1,59 @@
+import unittest
+from src.timers import RttEstimator, RetransmissionTimer, wakeup_time, INITIAL_RTO, MIN_RTO, MAX_RTO
+
+
+class TestRttEstimator(unittest.TestCase):
+    def test_first_and_later_samples(self):
+        estimator = RttEstimator()
+        self.assertEqual(estimator.rto, INITIAL_RTO)
+
+        estimator.on_sample(0.4)
+        self.assertEqual(estimator.srtt, 0.4)
+        self.assertEqual(estimator.rttvar, 0.2)
+        self.assertAlmostEqual(estimator.rto, 1.2)
+
+        estimator.on_sample(0.8)
+        self.assertAlmostEqual(estimator.rttvar, 0.25)
+        self.assertAlmostEqual(estimator.srtt, 0.45)
+        self.assertAlmostEqual(estimator.rto, 1.45)
+
+    def test_rto_is_clamped(self):
+        estimator = RttEstimator()
+        estimator.on_sample(0.001)
+        self.assertEqual(estimator.rto, MIN_RTO)
+        for _ in range(20):
+            estimator.backoff()
+        self.assertEqual(estimator.rto, MAX_RTO)
+
+    def test_backoff_lasts_until_next_sample(self):
+        estimator = RttEstimator()
+        estimator.on_sample(0.4)
+        estimator.backoff()
+        estimator.backoff()
+        self.assertAlmostEqual(estimator.rto, 4.8)
+        self.assertEqual(estimator.backoffs, 2)
+
+        estimator.on_sample(0.4)
+        self.assertEqual(estimator.backoffs, 0)
+        self.assertLess(estimator.rto, 1.2)
+
+
+class TestRetransmissionTimer(unittest.TestCase):
+    def test_start_stop_expire(self):
+        timer = RetransmissionTimer(RttEstimator())
+        self.assertFalse(timer.is_running())
+        self.assertFalse(timer.expired(100.0))
+
+        timer.start_if_stopped(10.0)
+        timer.start_if_stopped(10.5)
+        self.assertEqual(timer.deadline, 10.0 + INITIAL_RTO)
+        self.assertFalse(timer.expired(10.5))
+        self.assertTrue(timer.expired(10.0 + INITIAL_RTO))
+
+        timer.stop()
+        self.assertIsNone(timer.deadline)
+
+    def test_wakeup_time(self):
+        self.assertEqual(wakeup_time(None, 5.0, 0.01), 5.01)
+        self.assertEqual(wakeup_time(7.0, 5.0, 0.01), 7.0)
+        self.assertEqual(wakeup_time(4.0, 5.0, 0.01), 5.0)
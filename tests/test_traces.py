@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from src.link import MTU, TraceSchedule
+from src.traces import load_trace, cache_path, trace_statistics, suggest_settings
+
+
+class TestTraceCache(unittest.TestCase):
+    def setUp(self):
+        self.trace_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.trace_dir, 'test.trace')
+        with open(self.path, 'w') as trace_file:
+            trace_file.write("1\n1\n2\n4\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.trace_dir)
+
+    def test_compiles_and_memory_maps(self):
+        self.assertFalse(os.path.exists(cache_path(self.path)))
+        self.assertEqual(list(load_trace(self.path)), [1, 1, 2, 4])
+        self.assertTrue(os.path.exists(cache_path(self.path)))
+
+        cached = load_trace(self.path)
+        self.assertIsInstance(cached, np.memmap)
+        self.assertEqual(list(cached), [1, 1, 2, 4])
+
+    def test_stale_cache_is_rebuilt(self):
+        load_trace(self.path)
+        with open(self.path, 'w') as trace_file:
+            trace_file.write("1\n2\n")
+        cache_mtime = os.path.getmtime(cache_path(self.path))
+        os.utime(self.path, (cache_mtime + 10, cache_mtime + 10))
+
+        self.assertEqual(list(load_trace(self.path)), [1, 2])
+
+    def test_cache_is_written_whole(self):
+        load_trace(self.path)
+        self.assertEqual(sorted(os.listdir(self.trace_dir)), ['test.trace', 'test.trace.npy'])
+
+    def test_schedule_uses_the_mapped_trace(self):
+        load_trace(self.path)
+        cached = load_trace(self.path)
+        schedule = TraceSchedule(cached)
+        self.assertTrue(np.shares_memory(schedule.timestamps, cached))
+        self.assertEqual([schedule.time_of(i) for i in range(5)], [1, 1, 2, 4, 5])
+        self.assertEqual(schedule.first_after(4.5), 4)
+
+
+class TestTraceStatistics(unittest.TestCase):
+    def test_constant_rate_trace(self):
+        # One opportunity every millisecond
+        stats = trace_statistics(np.arange(1, 1001), delay=10, window_ms=100)
+        self.assertAlmostEqual(stats['mean_rate'], MTU * 1000.0)
+        self.assertAlmostEqual(stats['peak_rate'], stats['mean_rate'], delta=MTU * 10)
+        self.assertLess(stats['burstiness'], 0.05)
+        self.assertAlmostEqual(stats['bdp_bytes'], MTU * 20.0)
+
+    def test_bursty_trace(self):
+        # All of the opportunities land in the first tenth of the period
+        timestamps = np.concatenate([np.repeat(np.arange(1, 100), 10), [1000]])
+        stats = trace_statistics(timestamps, window_ms=100)
+        self.assertGreater(stats['peak_to_mean'], 5)
+        self.assertGreater(stats['burstiness'], 1)
+
+    def test_suggest_settings(self):
+        settings = suggest_settings('12mbps.trace', 50)
+        self.assertEqual(settings['queue_size'], MTU * 100)
+        self.assertGreater(settings['initial_cwnd'], 1)